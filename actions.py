@@ -0,0 +1,122 @@
+"""
+Acties zijn de getekende lijnen: gewone dicts met o.a. 'id', 'points', 'mode',
+'effect_name', 'color', 'brightness', 'speed' en de effectspecifieke parameters.
+
+Elke actie draagt drie versietellers die een nieuwe waarde krijgen zodra het
+betreffende deel verandert. De visualizer onthoudt per actie welke versies hij
+het laatst verwerkt heeft en doet alleen het werk dat bij een gewijzigde teller
+hoort:
+
+* geometry_version: de punten zijn veranderd -> opnieuw resamplen.
+* params_version: kleur, helderheid, snelheid of effectparameters zijn
+  veranderd -> params opnieuw valideren en de effectstatus resetten.
+* effect_version: er is een ander effect gekozen -> nieuwe effectinstantie.
+
+De waarden komen uit één teller voor het hele proces en worden nooit opnieuw
+uitgegeven. Daardoor betekenen een gelijk id en gelijke versies ook gelijke
+inhoud, ook nadat een oudere toestand is teruggezet (zie history.py).
+
+Elke effectinstantie krijgt een seed die van de actie afhangt (zie action_seed),
+zodat een actie overal dezelfde frames oplevert: live, bij export en in elk
+exportproces.
+"""
+import itertools
+import zlib
+from typing import get_args
+
+from effects.registry import DEFAULT_EFFECT_CLASS, get_effect_class
+from effects.schemas import EffectModel, Color
+from geometry import cumulative_arc_length, polyline_length, resample_polyline
+
+GEOMETRY_VERSION = 'geometry_version'
+PARAMS_VERSION = 'params_version'
+EFFECT_VERSION = 'effect_version'
+
+_version_counter = itertools.count(1)
+
+
+def _bump(action, key):
+    action[key] = next(_version_counter)
+
+
+def touch_geometry(action):
+    """Markeer dat de punten van de actie zijn veranderd."""
+    _bump(action, GEOMETRY_VERSION)
+
+
+def touch_params(action):
+    """Markeer dat de effectparameters (incl. kleur, helderheid, snelheid) zijn veranderd."""
+    _bump(action, PARAMS_VERSION)
+
+
+def touch_effect(action):
+    """Markeer dat de actie een ander effect heeft gekregen."""
+    _bump(action, EFFECT_VERSION)
+
+
+def versions(action):
+    """Geeft (geometry, params, effect) versies van een actie."""
+    return action.get(GEOMETRY_VERSION, 0), action.get(PARAMS_VERSION, 0), action.get(EFFECT_VERSION, 0)
+
+
+def action_seed(action):
+    """Geeft de RNG seed van een actie: 'seed' als die gezet is, anders afgeleid van het id."""
+    if 'seed' in action:
+        return action['seed']
+    return zlib.crc32(str(action.get('id', '')).encode('utf-8'))
+
+
+def _to_color(rgb):
+    return Color(red=rgb[0], green=rgb[1], blue=rgb[2])
+
+
+def build_effect_params(action, effect_class, default_color, default_brightness):
+    """
+    Bouwt het gevalideerde Params model van effect_class voor een actie.
+    Wordt alleen aangeroepen als params_version of effect_version verandert.
+
+    Elk veld van PARAMS_MODEL komt uit het gelijknamige actieveld (of
+    effect_class.DEFAULTS); 'brightness' wordt van 0-1 naar 0-100 omgezet en
+    kleuren van (R, G, B) naar Color. Een veld met List[Color] accepteert één
+    kleur of een lijst kleuren.
+    """
+    values = {}
+    for name, field in effect_class.PARAMS_MODEL.model_fields.items():
+        if name == 'brightness':
+            values[name] = int(action.get('brightness', default_brightness) * 100)
+            continue
+        value = effect_class.param_value(action, name, default_color if name == 'color' else None)
+        if value is None:
+            continue # Het model gebruikt zijn eigen standaardwaarde (of meldt het ontbrekende veld)
+        if field.annotation is Color:
+            value = _to_color(value)
+        elif get_args(field.annotation) == (Color,):
+            colors = value if isinstance(value, list) and all(isinstance(c, (list, tuple)) for c in value) else [value]
+            value = [_to_color(c) for c in colors]
+        values[name] = value
+    return effect_class.PARAMS_MODEL(**values)
+
+
+def resample_for_leds(points, arc_length=None):
+    """
+    Verdeelt een lijn in LED-posities op gelijke afstand, ongeveer één LED per
+    2 pixels lijnlengte. arc_length is de (gecachete) cumulatieve booglengte van
+    de punten, zie geometry.cumulative_arc_length. Geeft een (N, 2) float64 array.
+    """
+    if arc_length is None:
+        arc_length = cumulative_arc_length(points)
+    total_line_length = polyline_length(points, arc_length)
+    num_leds_for_this_line = max(2, int(total_line_length / 2.0)) if total_line_length > 0 else 1
+    return resample_polyline(points, num_leds_for_this_line, arc_length)
+
+
+def create_effect(action, num_leds, default_effect_name, default_color, default_brightness, default_speed):
+    """Maakt een nieuwe effectinstantie voor een actie, met gevalideerde params."""
+    EffectClass = get_effect_class(action.get('effect_name', default_effect_name)) or DEFAULT_EFFECT_CLASS
+    params_instance = build_effect_params(action, EffectClass, default_color, default_brightness)
+    current_speed = action.get('speed', default_speed)
+    # Pass the current_speed directly to the model for effects to use
+    model = EffectModel(params=params_instance, frame_skip=0, speed=current_speed, num_leds=num_leds)
+    effect = EffectClass(model)
+    effect.seed(action_seed(action))
+    return effect
@@ -0,0 +1,148 @@
+"""
+Benchmark: frametijd van de effectlijnen tegen het totale aantal LEDs.
+
+Vergelijkt het oude pad (ScatterPlotItem met een pg.mkBrush per LED) met
+LEDStripItem (één kleurarray per lijn). De lijnen draaien om de beurt de
+ingebouwde effecten; per frame wordt elk effect via render_into een stap
+verder gezet, worden de kleuren aangeleverd en wordt de scène naar een QImage
+gerenderd, zodat zowel het aanleveren van de data als het tekenen meetelt.
+
+Gebruik (vanuit de projectmap):
+    python benchmarks/bench_led_strip.py [--frames 20] [--lines 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QColor, QImage, QPainter
+import pyqtgraph as pg
+
+from led_strip_item import LEDStripItem
+from effects.schemas import (
+    EffectModel, Color, StaticParams, MeteorParams, MulticolorParams,
+    RunningLineParams, ChristmasSnowParams, FlagParams
+)
+from effects.static import StaticEffect
+from effects.meteor import MeteorEffect
+from effects.multicolor import MulticolorEffect
+from effects.running_line import RunningLineEffect
+from effects.christmas_snow import ChristmasSnowEffect
+from effects.flag import FlagEffect
+
+LED_COUNTS = (1_000, 10_000, 50_000)
+LED_SIZE = 5
+DELTA_TIME = 1.0 / 100.0
+
+RED = Color(red=255, green=0, blue=0)
+_EFFECTS = (
+    (StaticEffect, StaticParams(color=[RED], brightness=100)),
+    (MeteorEffect, MeteorParams(color=[RED], brightness=100, meteor_width=10, spark_intensity=50)),
+    (MulticolorEffect, MulticolorParams(brightness=100)),
+    (RunningLineEffect, RunningLineParams(color=[RED], brightness=100, line_width=5, number_of_lines=3,
+                                          background_color=Color(red=0, green=0, blue=0))),
+    (ChristmasSnowEffect, ChristmasSnowParams(brightness=100, red_chance=30, dark_green_chance=30)),
+    (FlagEffect, FlagParams(color=[RED, Color(red=255, green=255, blue=255), Color(red=0, green=0, blue=255)],
+                            width=[10, 10, 10], background_color=Color(red=0, green=0, blue=0), brightness=100)),
+)
+
+
+def _make_lines(total_leds, num_lines):
+    per_line = max(1, total_leds // num_lines)
+    lines = []
+    for i in range(num_lines):
+        t = np.linspace(0.0, 1.0, per_line)
+        xy = np.column_stack((t * 1900 + 10, 40 + i * (1000 / num_lines) + 20 * np.sin(t * 12 + i)))
+        lines.append(xy)
+    return lines
+
+
+def _make_effects(lines):
+    effects = []
+    for i, xy in enumerate(lines):
+        effect_class, params = _EFFECTS[i % len(_EFFECTS)]
+        effects.append(effect_class(EffectModel(params=params, frame_skip=0, speed=3, num_leds=len(xy))))
+    return effects
+
+
+def _next_colors(effect, buffer):
+    effect.render_into(buffer, DELTA_TIME)
+    return np.minimum(buffer[:, :3].astype(np.uint16) + buffer[:, 3:4], 255).astype(np.uint8)
+
+
+def _render(widget, image):
+    image.fill(0)
+    painter = QPainter(image)
+    widget.render(painter)
+    painter.end()
+
+
+def bench_scatter(widget, lines, frames, image):
+    items = []
+    for xy in lines:
+        item = pg.ScatterPlotItem(x=xy[:, 0], y=xy[:, 1], size=LED_SIZE, pen=pg.mkPen(None), antialias=True)
+        widget.addItem(item)
+        items.append(item)
+    effects = _make_effects(lines)
+    buffers = [np.zeros((len(xy), 4), dtype=np.uint8) for xy in lines]
+    start = time.perf_counter()
+    for _ in range(frames):
+        for item, xy, effect, buffer in zip(items, lines, effects, buffers):
+            colors = _next_colors(effect, buffer)
+            brushes = [pg.mkBrush(QColor(r, g, b)) for r, g, b in colors.tolist()]
+            item.setData(x=xy[:, 0], y=xy[:, 1], size=LED_SIZE, brush=brushes)
+        _render(widget, image)
+    elapsed = (time.perf_counter() - start) / frames
+    for item in items:
+        widget.removeItem(item)
+    return elapsed
+
+
+def bench_led_strip(widget, lines, frames, image):
+    items = []
+    for xy in lines:
+        item = LEDStripItem(size=LED_SIZE)
+        item.setPoints(xy)
+        widget.addItem(item)
+        items.append(item)
+    effects = _make_effects(lines)
+    buffers = [np.zeros((len(xy), 4), dtype=np.uint8) for xy in lines]
+    start = time.perf_counter()
+    for _ in range(frames):
+        for item, effect, buffer in zip(items, effects, buffers):
+            item.setColors(_next_colors(effect, buffer))
+        _render(widget, image)
+    elapsed = (time.perf_counter() - start) / frames
+    for item in items:
+        widget.removeItem(item)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20, help="aantal gemeten frames per meting")
+    parser.add_argument("--lines", type=int, default=50, help="aantal lijnen waarover de LEDs verdeeld worden")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    widget = pg.PlotWidget()
+    widget.resize(1920, 1080)
+    widget.setRange(xRange=(0, 1920), yRange=(0, 1080), padding=0)
+    image = QImage(widget.size(), QImage.Format_RGBA8888)
+
+    print(f"{'LEDs':>8} | {'ScatterPlotItem (ms)':>21} | {'LEDStripItem (ms)':>18} | {'versnelling':>11}")
+    print("-" * 68)
+    for total in LED_COUNTS:
+        lines = _make_lines(total, args.lines)
+        scatter_ms = bench_scatter(widget, lines, args.frames, image) * 1000
+        strip_ms = bench_led_strip(widget, lines, args.frames, image) * 1000
+        print(f"{total:>8} | {scatter_ms:>21.1f} | {strip_ms:>18.1f} | {scatter_ms / strip_ms:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
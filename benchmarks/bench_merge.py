@@ -0,0 +1,50 @@
+"""
+Benchmark: lijnen samenvoegen tegen het aantal segmenten.
+
+Vergelijkt de oude merge_lines (lineaire scan per verlenging, O(n²) scan per
+geforceerde samenvoeging) met merge.merge_polylines. De segmenten lijken op
+een geïmporteerde tekening: korte stukken langs een aantal kronkelende paden,
+door elkaar gehusseld en deels omgedraaid, met hier en daar een gat groter dan
+de samenvoeg-afstand. Waar de oude versie meedraait wordt ook gecontroleerd
+dat beide dezelfde punten opleveren.
+
+Gebruik (vanuit de projectmap):
+    python benchmarks/bench_merge.py [--segments 500 2000 5000] [--old-limit 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from merge import merge_polylines
+from tests.merge_reference import make_segments, old_merge
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--old-limit", type=int, default=2000, help="oude versie alleen tot dit aantal segmenten")
+    args = parser.parse_args()
+
+    print(f"{'segmenten':>10} {'oud (s)':>10} {'nieuw (s)':>10}  gelijk")
+    for count in args.segments:
+        segments = make_segments(count)
+
+        start = time.perf_counter()
+        new = [points for _, points in merge_polylines(segments)]
+        new_time = time.perf_counter() - start
+
+        if count <= args.old_limit:
+            start = time.perf_counter()
+            old = old_merge(segments)
+            old_time = f"{time.perf_counter() - start:10.3f}"
+            same = "ja" if old == new else "NEE"
+        else:
+            old_time, same = f"{'-':>10}", "-"
+        print(f"{len(segments):>10} {old_time} {new_time:10.3f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
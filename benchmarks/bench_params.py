@@ -0,0 +1,91 @@
+"""
+Benchmark: pydantic-werk per frame en de kosten van params lezen.
+
+1. Bouwt een LEDVisualizer met een lijn per ingebouwd effect en laat
+   update_drawing een aantal frames in de stabiele toestand draaien. Via de
+   hook effects.schemas.validation_count() wordt gecontroleerd dat daarbij
+   geen enkel model gevalideerd wordt; daarna wordt één parameter gewijzigd om
+   te laten zien dat de hook wel telt.
+2. Meet render_into per effect met params als pydantic model (het oude pad)
+   en als FrozenParams.
+
+Gebruik (vanuit de projectmap):
+    python benchmarks/bench_params.py [--frames 200] [--leds 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from actions import create_effect, touch_params
+from effects.registry import effect_names
+from effects.schemas import validation_count
+
+DELTA_TIME = 1.0 / 100.0
+
+
+def _action(index, effect_name):
+    y = 50 + 40 * index
+    return {'id': f"bench-{index}", 'points': [(20, y), (400, y + 10), (800, y)], 'mode': "Effect",
+            'effect_name': effect_name, 'color': (255, 0, 0), 'brightness': 1.0, 'speed': 3}
+
+
+def check_steady_state(frames):
+    from visualizer import LEDVisualizer
+    window = LEDVisualizer()
+    window.actions = [_action(i, name) for i, name in enumerate(effect_names())]
+    window.update_drawing(delta_time=DELTA_TIME) # Eerste frame: effecten aanmaken en valideren
+
+    before = validation_count()
+    start = time.perf_counter()
+    for _ in range(frames):
+        window.update_drawing(delta_time=DELTA_TIME)
+    elapsed = (time.perf_counter() - start) / frames
+    steady = validation_count() - before
+    print(f"stabiel: {steady} validaties in {frames} frames ({len(window.actions)} lijnen, {elapsed * 1000:.2f} ms/frame)")
+
+    touch_params(window.actions[0])
+    before = validation_count()
+    window.update_drawing(delta_time=DELTA_TIME)
+    print(f"na een parameterwijziging: {validation_count() - before} validaties")
+    return steady
+
+
+def bench_render(frames, num_leds):
+    print(f"render_into per frame, {num_leds} LEDs (pydantic | bevroren, in µs):")
+    buffer = np.zeros((num_leds, 4), dtype=np.uint8)
+    for index, name in enumerate(effect_names()):
+        timings = []
+        for frozen in (False, True):
+            effect = create_effect(_action(index, name), num_leds, name, (255, 0, 0), 1.0, 3)
+            if not frozen:
+                effect.params = effect.model.params
+            start = time.perf_counter()
+            for _ in range(frames):
+                effect.render_into(buffer, DELTA_TIME)
+            timings.append((time.perf_counter() - start) / frames * 1e6)
+        print(f"  {name:15s} {timings[0]:8.1f} | {timings[1]:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--leds', type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    steady = check_steady_state(args.frames)
+    bench_render(args.frames, args.leds)
+    app.quit()
+    sys.exit(1 if steady else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: heen en weer scrubben over de tijdlijn, met en zonder FrameCache.
+
+Bouwt een LEDVisualizer met een lijn per ingebouwd effect, zet de tijdlijn aan
+en loopt alle frames vooruit en daarna terug. Zonder cache (budget 0) moeten
+de stochastische effecten bij elke stap terug vanaf 0 doorspoelen; met cache
+komen de frames van de terugweg uit de cache. De frames van beide runs moeten
+gelijk zijn.
+
+Gebruik (vanuit de projectmap):
+    python benchmarks/bench_timeline.py [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from effects.registry import effect_names
+from frame_cache import DEFAULT_MEMORY_BUDGET
+
+
+def _action(index, effect_name):
+    y = 50 + 40 * index
+    return {'id': f"bench-{index}", 'points': [(20, y), (400, y + 10), (800, y)], 'mode': "Effect",
+            'effect_name': effect_name, 'color': (255, 0, 0), 'brightness': 1.0, 'speed': 3}
+
+
+def scrub(frames, memory_budget):
+    from visualizer import LEDVisualizer
+    window = LEDVisualizer()
+    window.frame_cache.memory_budget = memory_budget
+    window.actions = [_action(i, name) for i, name in enumerate(effect_names())]
+    window.timeline_panel.active_checkbox.setChecked(True) # Tekent frame 0
+
+    def colors():
+        return [item._colors.copy() for item in window.line_plot_items.values()]
+
+    shown = {0: colors()}
+    timings = []
+    # Vooruit tot het laatste frame en terug naar 0; TimelinePanel.changed tekent elk frame.
+    for order in (range(1, frames), range(frames - 2, -1, -1)):
+        start = time.perf_counter()
+        for frame in order:
+            window.timeline_panel.slider.setValue(frame)
+            if frame in shown:
+                assert all((a == b).all() for a, b in zip(shown[frame], colors())), frame
+            shown[frame] = colors()
+        timings.append((time.perf_counter() - start) / len(order))
+    cache = window.frame_cache
+    print(f"  budget {memory_budget // 1024:6d} KiB: vooruit {timings[0] * 1000:6.2f} ms/frame, "
+          f"terug {timings[1] * 1000:6.2f} ms/frame ({cache.hits} hits, {cache.misses} misses, {cache.nbytes // 1024} KiB)")
+    window.close()
+    return shown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(f"scrubben over {args.frames} frames ({len(effect_names())} lijnen):")
+    uncached = scrub(args.frames, 0)
+    cached = scrub(args.frames, DEFAULT_MEMORY_BUDGET)
+    equal = all((a == b).all() for frame in uncached for a, b in zip(uncached[frame], cached[frame]))
+    print(f"frames gelijk: {equal}")
+    app.quit()
+    sys.exit(0 if equal else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,60 @@
 # In effects/base_effect.py
 
-from .schemas import EffectModel
+import random
+
+import numpy as np
+
+from .schemas import EffectModel, freeze_params
+
+SEEK_STEP = 1.0 / 30.0 # Standaard stapgrootte (s) waarmee stochastische effecten naar een tijd doorspoelen
+# Een LED-positie die door afronding van de tijd net onder een geheel getal uitkomt, telt als dat getal.
+POSITION_EPSILON = 1e-6
+
+
+def _matches_default(value, default):
+    """Controleert of een lijstwaarde dezelfde vorm heeft als de standaardlijst (kleuren of getallen)."""
+    if not isinstance(value, list):
+        return False
+    item_types = (list, tuple) if default and isinstance(default[0], (list, tuple)) else (int, float)
+    return all(isinstance(item, item_types) for item in value)
+
 
 class Effects:
+    # Declaratie voor de effectenregistry (zie registry.py). Een effect geeft hier zijn
+    # naam in de effectenlijst, het Params model, de standaardwaarden van zijn
+    # effectspecifieke actievelden en de bedieningselementen (ui_params.py).
+    EFFECT_NAME = None
+    PARAMS_MODEL = None
+    DEFAULTS = {}
+    UI_PARAMS = ()
+
+    @classmethod
+    def param_value(cls, values, key, default=None):
+        """
+        Geeft veld key uit een actie (of ander dict met parameters), of de
+        standaardwaarde uit DEFAULTS als het ontbreekt. Een lijstveld dat niet
+        de vorm van zijn standaardlijst heeft, wordt ook vervangen.
+        """
+        default = cls.DEFAULTS.get(key, default)
+        value = values.get(key, default)
+        if isinstance(default, list) and not _matches_default(value, default):
+            return default
+        return value
+
     def __init__(self, model: EffectModel):
         self.model = model
-        self.params = model.params
+        # Gevalideerd bij het aanmaken; per frame wordt alleen de bevroren kopie gelezen.
+        self.params = freeze_params(model.params)
         self.speed = model.speed
         self._num_leds = model.num_leds
         self.current_frame = 0.0
+        # Simulatietijd in seconden sinds de start; render_into verhoogt hem met delta_time.
+        self.time = 0.0
+        self._seed = None
+        # Eigen RNG per effect: met dezelfde seed levert een effect altijd
+        # dezelfde reeks frames, ook in een ander proces.
+        self.rng = random.Random()
+        self._np_rng = None
         self._on_num_leds_change()
 
     # TOEGEVOEGD: Een standaard implementatie van de functie.
@@ -30,5 +76,139 @@ class Effects:
             self._num_leds = value
             self._on_num_leds_change()
 
+    @property
+    def np_rng(self):
+        """
+        numpy Generator voor gevectoriseerde effecten. Zijn seed komt uit self.rng,
+        dus hij volgt seed() en reset() net als self.rng.
+        """
+        if self._np_rng is None:
+            self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        return self._np_rng
+
+    def seed(self, value):
+        """Zet de seed van de RNG van dit effect."""
+        self._seed = value
+        self.rng.seed(value)
+        self._np_rng = None
+
+    def reset(self):
+        """
+        Zet het effect terug naar tijd 0: de RNG begint opnieuw bij de seed en
+        de status wordt opnieuw opgebouwd (_on_num_leds_change).
+        """
+        self.time = 0.0
+        self.current_frame = 0.0
+        if self._seed is not None:
+            self.rng.seed(self._seed)
+        self._np_rng = None
+        self._on_num_leds_change()
+
+    def advance(self, delta_time: float):
+        """
+        Zet het effect één stap van delta_time verder zonder een frame op te leveren.
+        De standaard implementatie rendert naar een kladbuffer, zodat de RNG precies
+        zo gebruikt wordt als bij gewoon afspelen; stochastische effecten kunnen dit
+        overschrijven met een versie die alleen de status bijwerkt.
+        """
+        scratch = getattr(self, '_scratch', None)
+        if scratch is None or len(scratch) != self.num_leds:
+            scratch = self._scratch = np.empty((self.num_leds, 4), dtype=np.uint8)
+        self.render_into(scratch, delta_time)
+
+    def fast_forward(self, frames: int, delta_time: float):
+        """Zet het effect frames stappen van delta_time verder zonder de frames te bewaren."""
+        for _ in range(frames):
+            self.advance(delta_time)
+
+    def seek(self, t: float, step: float = SEEK_STEP):
+        """
+        Zet het effect op tijd t. Een stochastisch effect spoelt door in stappen
+        van step, vanaf de huidige tijd of (als t eerder ligt) vanaf 0; met dezelfde
+        seed en step is het resultaat altijd hetzelfde. t wordt afgerond op een
+        veelvoud van step vanaf het vertrekpunt.
+        """
+        t = max(0.0, t)
+        if t < self.time - step / 2:
+            self.reset()
+        self.fast_forward(max(0, int(round((t - self.time) / step))), step)
+
+    def render_at(self, out: np.ndarray, t: float, step: float = SEEK_STEP):
+        """
+        Schrijft het frame op tijd t in out: het frame van de stap van t - step naar t,
+        zodat frame i van een reeks met vaste step (t = (i + 1) * step) gelijk is aan
+        gewoon afspelen (bij een AnalyticEffect op afronding van de tijd na). Frames mogen in willekeurige volgorde gevraagd worden;
+        terugspringen kost bij stochastische effecten een herstart vanaf 0.
+        """
+        self.seek(t - step, step)
+        self.render_into(out, step)
+
+    def period(self):
+        """
+        Geeft de periode van het effect in seconden voor de huidige parameters:
+        na precies deze tijd herhaalt het beeld zich. 0.0 betekent dat het beeld
+        niet verandert; None dat het effect niet periodiek is (bijv. willekeurig).
+        """
+        return None
+
+    def is_animated(self):
+        """
+        Geeft aan of het beeld van frame tot frame verandert. Zo niet, dan hoeft
+        de live weergave geen nieuwe frames te tekenen (zie frame_scheduler.py).
+        """
+        return self.period() != 0.0
+
+    def render_into(self, out: np.ndarray, delta_time: float = 0.0):
+        """
+        Schrijft het volgende frame direct in een vooraf gealloceerde
+        (num_leds, 4) uint8 array met RGBW-waarden.
+
+        Effecten die alleen get_next_frame implementeren vallen terug op
+        deze standaard implementatie, die de lijst naar de array kopieert.
+        Een effect dat render_into zelf implementeert, verhoogt self.time
+        met delta_time (AnalyticEffect doet dat al).
+        """
+        self.time += delta_time
+        frame = self.get_next_frame(delta_time)
+        out[:] = np.asarray(frame, dtype=np.uint8).reshape(-1, 4)[:len(out)]
+
     def get_next_frame(self, delta_time: float = 0.0):
-        raise NotImplementedError("get_next_frame() must be implemented by subclasses")
\ No newline at end of file
+        """
+        Retourneert het volgende frame als lijst van (R, G, B, W) tuples.
+
+        Effecten met een vectoriseerde render_into hoeven deze methode niet
+        te implementeren; het frame wordt dan uit de array opgebouwd.
+        """
+        if type(self).render_into is Effects.render_into:
+            raise NotImplementedError("get_next_frame() must be implemented by subclasses")
+        out = np.empty((self.num_leds, 4), dtype=np.uint8)
+        self.render_into(out, delta_time)
+        return [tuple(c) for c in out.tolist()]
+
+
+class AnalyticEffect(Effects):
+    """
+    Basis voor effecten waarvan het beeld alleen van self.time afhangt (en van
+    de params en het aantal LEDs). Zo'n effect implementeert draw(out); seek en
+    doorspoelen zijn dan O(1), en elk frame kan los berekend worden.
+    """
+    def draw(self, out: np.ndarray):
+        """Schrijft het beeld op tijd self.time in out (num_leds, 4)."""
+        raise NotImplementedError("draw() must be implemented by subclasses")
+
+    def render_into(self, out: np.ndarray, delta_time: float = 0.0):
+        self.time += delta_time
+        self.draw(out)
+
+    def advance(self, delta_time: float):
+        self.time += delta_time
+
+    def fast_forward(self, frames: int, delta_time: float):
+        self.time += frames * delta_time
+
+    def seek(self, t: float, step: float = SEEK_STEP):
+        self.time = max(0.0, t)
+
+    def render_at(self, out: np.ndarray, t: float, step: float = SEEK_STEP):
+        self.time = max(0.0, t)
+        self.draw(out)
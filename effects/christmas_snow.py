@@ -1,82 +1,107 @@
 # P1-Visualizer/effects/christmas_snow.py
 
-import random
+import numpy as np
 from .base_effect import Effects
 from .schemas import EffectModel, ChristmasSnowParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw_batch
+from .ui_params import SliderParam
 
 class ChristmasSnowEffect(Effects):
     """
     Een effect dat vallende sneeuwvlokken simuleert, met optionele rode en donkergroene lichten
     voor een kerstsfeer.
     """
+    EFFECT_NAME = "Christmas Snow"
+    PARAMS_MODEL = ChristmasSnowParams
+    DEFAULTS = {'red_chance': 30, 'dark_green_chance': 30}
+    UI_PARAMS = (
+        SliderParam('red_chance', "Red Chance (%)", 0, 100),
+        SliderParam('dark_green_chance', "Dark Green Chance (%)", 0, 100),
+    )
+
+    # Soorten lichtjes in _types; 0 is de achtergrond.
+    BACKGROUND, RED, DARK_GREEN, WHITE = 0, 1, 2, 3
+
     def __init__(self, model: EffectModel):
         # Attributen EERST definiëren
         self.bg_r, self.bg_g, self.bg_b = 0, 120, 0
         self.sparkle_brightness = 255
         self.fade_speed = 10
         self.star_density = 20 # Basisdichtheid
-        self.led_states = []
+        self._background = np.array([self.bg_r, self.bg_g, self.bg_b], dtype=np.int32)
+        self._colors = np.empty((0, 3), dtype=np.int32) # Huidige kleur per LED
+        self._types = np.empty(0, dtype=np.int8) # Soort lichtje per LED
         
         # DAARNA de superclass initialiseren
         super().__init__(model)
 
     def _on_num_leds_change(self):
         """Reset de status wanneer het aantal LEDs verandert."""
-        self.led_states = [[[self.bg_r, self.bg_g, self.bg_b], 0] for _ in range(self.num_leds)]
-
-    def handle_green_red(self, color, led_index):
-        """Verwerkt het vervagen van lichten terug naar de achtergrondkleur."""
-        r, g, b = color
-        red = max(self.bg_r, r - self.fade_speed) if r > self.bg_r else min(self.bg_r, r + self.fade_speed)
-        green = max(self.bg_g, g - self.fade_speed) if g > self.bg_g else min(self.bg_g, g + self.fade_speed)
-        blue = max(self.bg_b, b - self.fade_speed) if b > self.bg_b else min(self.bg_b, b + self.fade_speed)
-        
-        self.led_states[led_index][0] = [red, green, blue]
-
-        if abs(red - self.bg_r) < 10 and abs(green - self.bg_g) < 10 and abs(blue - self.bg_b) < 10:
-            self.led_states[led_index] = [[self.bg_r, self.bg_g, self.bg_b], 0]
-        return red, green, blue
+        self._colors = np.tile(self._background, (self.num_leds, 1))
+        self._types = np.zeros(self.num_leds, dtype=np.int8)
 
-    def get_next_frame(self, delta_time: float = 0.0):
+    def _fade(self, with_colors=True):
         """
-        Retourneert het volgende frame voor het Christmas Snow effect.
+        Laat de lichtjes één stap (fade_speed) naar de achtergrondkleur vervagen en geeft de
+        kleuren van dit frame (of None bij with_colors=False). Een lichtje dat op minder dan
+        10 van de achtergrond zit, wordt weer achtergrond (het toont dit frame nog zijn
+        vervaagde kleur).
         """
-        frame = []
-        
+        lit = self._types != self.BACKGROUND
+        rgb = np.tile(self._background, (self.num_leds, 1)) if with_colors else None
+        if lit.any():
+            colors = self._colors[lit]
+            colors -= np.clip(colors - self._background, -self.fade_speed, self.fade_speed)
+            if with_colors:
+                rgb[lit] = colors
+            done = (np.abs(colors - self._background) < 10).all(axis=1)
+            colors[done] = self._background
+            self._colors[lit] = colors
+            self._types[np.flatnonzero(lit)[done]] = self.BACKGROUND
+        return rgb
+
+    def _spawn(self):
+        """Laat op achtergrond-LEDs met kans star_density (per 1000, geschaald met de snelheid) een nieuw lichtje ontstaan."""
         # SNELHEIDSBEREKENING MET SELF.SPEED:
         # De snelheid van de slider (1-5) beïnvloedt de kans op nieuwe vlokken.
         dynamic_star_density = self.star_density * (self.speed / 3.0) # Normaliseer rond de middensnelheid (3)
+        spawn = (self.np_rng.random(self.num_leds) < dynamic_star_density / 1000.0) & (self._types == self.BACKGROUND)
+        count = int(np.count_nonzero(spawn))
+        if not count:
+            return
 
-        for led_index in range(self.num_leds):
-            color, light_type = self.led_states[led_index]
+        white_chance = max(0, 100 - self.params.red_chance - self.params.dark_green_chance)
+        weights = np.array([self.params.red_chance, self.params.dark_green_chance, white_chance], dtype=np.float64)
+        if weights.sum() <= 0:
+            return
+        types = self.np_rng.choice(np.array([self.RED, self.DARK_GREEN, self.WHITE], dtype=np.int8), size=count, p=weights / weights.sum())
+        colors = np.empty((count, 3), dtype=np.int32)
+        colors[types == self.RED] = (self.sparkle_brightness, 0, 0)
+        colors[types == self.WHITE] = (self.sparkle_brightness,) * 3
+        dark_green = types == self.DARK_GREEN
+        colors[dark_green, 0] = colors[dark_green, 2] = 0
+        colors[dark_green, 1] = self.bg_g - self.np_rng.integers(60, 121, size=int(np.count_nonzero(dark_green)))
 
-            if light_type == 0:
-                red, green, blue = self.bg_r, self.bg_g, self.bg_b
-            else:
-                red, green, blue = self.handle_green_red(color, led_index)
+        indices = np.flatnonzero(spawn)
+        self._types[indices] = types
+        self._colors[indices] = colors
 
-            if self.led_states[led_index][1] == 0 and random.randint(0, 1000) < dynamic_star_density:
-                faded_green = self.bg_g - random.randint(60, 120)
-                red_color_state = [[self.sparkle_brightness, 0, 0], 1]
-                dark_green_color_state = [[0, faded_green, 0], 2]
-                white_color_state = [[self.sparkle_brightness, self.sparkle_brightness, self.sparkle_brightness], 3]
-                
-                white_chance = 100 - self.params.red_chance - self.params.dark_green_chance
-                if white_chance < 0: white_chance = 0
+    def advance(self, delta_time: float):
+        """Zoals render_into, maar zonder de kleuren van het frame (voor seek en fast_forward)."""
+        self.time += delta_time
+        self._fade(with_colors=False)
+        self._spawn()
 
-                try:
-                    self.led_states[led_index] = random.choices(
-                        [red_color_state, dark_green_color_state, white_color_state],
-                        weights=[self.params.red_chance, self.params.dark_green_chance, white_chance],
-                    )[0]
-                except ValueError:
-                       self.led_states[led_index] = [[self.bg_r, self.bg_g, self.bg_b], 0]
+    def render_into(self, out, delta_time: float = 0.0):
+        """
+        Schrijft het volgende frame voor het Christmas Snow effect in de buffer.
+        Elke stap vervagen de lichtjes en ontstaan er nieuwe; een nieuw lichtje is
+        vanaf het volgende frame te zien.
+        """
+        self.time += delta_time
+        rgb = self._fade()
+        self._spawn()
 
-            brightness_mod = self.params.brightness / 100.0
-            adjusted_red = int(red * brightness_mod)
-            adjusted_green = int(green * brightness_mod)
-            adjusted_blue = int(blue * brightness_mod)
-            
-            frame.append(rgb_to_rgbw(adjusted_red, adjusted_green, adjusted_blue))
-        return frame
\ No newline at end of file
+        # Helderheid en RGBW-conversie voor de hele strip in één keer.
+        brightness_mod = self.params.brightness / 100.0
+        rgb_to_rgbw_batch((rgb * brightness_mod).astype(np.int32), out=out)
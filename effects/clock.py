@@ -0,0 +1,31 @@
+"""
+Simulatieklok: de tijd van een scène in seconden, los van de wandklok.
+
+Effecten rekenen met deze tijd (Effects.time) in plaats van met de gemeten
+tijd tussen twee timer-ticks. Met een vaste stap liggen de frames op vaste
+tijden: frame i valt op (i + 1) * step, het beeld na i + 1 stappen vanaf 0.
+Zo levert een export altijd dezelfde frames op, ook als die over processen
+verdeeld of in een andere volgorde gerenderd worden (zie Effects.render_at).
+"""
+
+
+class SimulationClock:
+    def __init__(self, step):
+        self.step = step
+        self.time = 0.0
+
+    def frame_time(self, index):
+        """Tijd van frame index (vanaf 0) in seconden."""
+        return (index + 1) * self.step
+
+    def frame_index(self, t):
+        """Index van het frame dat het dichtst bij tijd t ligt."""
+        return max(0, int(round(t / self.step)) - 1)
+
+    def tick(self, delta_time=None):
+        """Zet de klok delta_time (standaard één stap) verder en geeft de nieuwe tijd."""
+        self.time += self.step if delta_time is None else delta_time
+        return self.time
+
+    def seek(self, t):
+        self.time = max(0.0, t)
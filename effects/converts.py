@@ -1,148 +1,213 @@
+"""
+Kleurconversie voor de LED-strips.
+
+Alle RGB -> RGBW conversies in de applicatie lopen via deze module. Het beleid:
+
+* Het wit-kanaal neemt het gemeenschappelijke deel van R, G en B over
+  ("min-white"). De resterende kleur is wat er na aftrek van dat wit overblijft.
+* Zonder witpunt (``white_temperature=None``, de standaard) is wit neutraal:
+  ``W = min(R, G, B)`` en ``R' = R - W`` enzovoort.
+* Met een witpunt in Kelvin (1000-12000, stappen van 100) wordt het wit eerst
+  gecorrigeerd voor de kleur van de witte LED uit ``KELVIN_TABLE``.
+* Invoer wordt begrensd op 0-255.
+
+Per witpunt worden eenmalig opzoektabellen opgebouwd; ``rgb_to_rgbw_batch``
+converteert een complete (N, 3) array in één aanroep. ``rgb_to_rgbw`` doet
+hetzelfde voor één kleur met dezelfde tabellen, maar rekent in gewone Python
+omdat numpy per aanroep te veel overhead heeft voor drie waarden.
+"""
 import math
+from functools import lru_cache
+
+import numpy as np
+
+# Witpunt dat de applicatie gebruikt. None = neutraal wit (gewone min-white),
+# zet bv. op 6000 om de Kelvin-correctie voor alle effecten in te schakelen.
+WHITE_TEMPERATURE = None
 
-WHITE_TEMPERATURE = 6000
+KELVIN_TABLE = {
+    1000: (255, 56, 0),
+    1100: (255, 71, 0),
+    1200: (255, 83, 0),
+    1300: (255, 93, 0),
+    1400: (255, 101, 0),
+    1500: (255, 109, 0),
+    1600: (255, 115, 0),
+    1700: (255, 121, 0),
+    1800: (255, 126, 0),
+    1900: (255, 131, 0),
+    2000: (255, 138, 18),
+    2100: (255, 142, 33),
+    2200: (255, 147, 44),
+    2300: (255, 152, 54),
+    2400: (255, 157, 63),
+    2500: (255, 161, 72),
+    2600: (255, 165, 79),
+    2700: (255, 169, 87),
+    2800: (255, 173, 94),
+    2900: (255, 177, 101),
+    3000: (255, 180, 107),
+    3100: (255, 184, 114),
+    3200: (255, 187, 120),
+    3300: (255, 190, 126),
+    3400: (255, 193, 132),
+    3500: (255, 196, 137),
+    3600: (255, 199, 143),
+    3700: (255, 201, 148),
+    3800: (255, 204, 153),
+    3900: (255, 206, 159),
+    4000: (255, 209, 163),
+    4100: (255, 211, 168),
+    4200: (255, 213, 173),
+    4300: (255, 215, 177),
+    4400: (255, 217, 182),
+    4500: (255, 219, 186),
+    4600: (255, 221, 190),
+    4700: (255, 223, 194),
+    4800: (255, 225, 198),
+    4900: (255, 227, 202),
+    5000: (255, 228, 206),
+    5100: (255, 230, 210),
+    5200: (255, 232, 213),
+    5300: (255, 233, 217),
+    5400: (255, 235, 220),
+    5500: (255, 236, 224),
+    5600: (255, 238, 227),
+    5700: (255, 239, 230),
+    5800: (255, 240, 233),
+    5900: (255, 242, 236),
+    6000: (255, 243, 239),
+    6100: (255, 244, 242),
+    6200: (255, 245, 245),
+    6300: (255, 246, 247),
+    6400: (255, 248, 251),
+    6500: (255, 249, 253),
+    6600: (254, 249, 255),
+    6700: (252, 247, 255),
+    6800: (249, 246, 255),
+    6900: (247, 245, 255),
+    7000: (245, 243, 255),
+    7100: (243, 242, 255),
+    7200: (240, 241, 255),
+    7300: (239, 240, 255),
+    7400: (237, 239, 255),
+    7500: (235, 238, 255),
+    7600: (233, 237, 255),
+    7700: (231, 236, 255),
+    7800: (230, 235, 255),
+    7900: (228, 234, 255),
+    8000: (227, 233, 255),
+    8100: (225, 232, 255),
+    8200: (224, 231, 255),
+    8300: (222, 230, 255),
+    8400: (221, 230, 255),
+    8500: (220, 229, 255),
+    8600: (218, 229, 255),
+    8700: (217, 227, 255),
+    8800: (216, 227, 255),
+    8900: (215, 226, 255),
+    9000: (214, 225, 255),
+    9100: (212, 225, 255),
+    9200: (211, 224, 255),
+    9300: (210, 223, 255),
+    9400: (209, 223, 255),
+    9500: (208, 222, 255),
+    9600: (207, 221, 255),
+    9700: (207, 221, 255),
+    9800: (206, 220, 255),
+    9900: (205, 220, 255),
+    10000: (207, 218, 255),
+    10100: (207, 218, 255),
+    10200: (206, 217, 255),
+    10300: (205, 217, 255),
+    10400: (204, 216, 255),
+    10500: (204, 216, 255),
+    10600: (203, 215, 255),
+    10700: (202, 215, 255),
+    10800: (202, 214, 255),
+    10900: (201, 214, 255),
+    11000: (200, 213, 255),
+    11100: (200, 213, 255),
+    11200: (199, 212, 255),
+    11300: (198, 212, 255),
+    11400: (198, 212, 255),
+    11500: (197, 211, 255),
+    11600: (197, 211, 255),
+    11700: (197, 210, 255),
+    11800: (196, 210, 255),
+    11900: (195, 210, 255),
+    12000: (195, 209, 255),
+}
 
 
 def get_color_correction(temp):
-    kelvin_table = {
-        1000: (255, 56, 0),
-        1100: (255, 71, 0),
-        1200: (255, 83, 0),
-        1300: (255, 93, 0),
-        1400: (255, 101, 0),
-        1500: (255, 109, 0),
-        1600: (255, 115, 0),
-        1700: (255, 121, 0),
-        1800: (255, 126, 0),
-        1900: (255, 131, 0),
-        2000: (255, 138, 18),
-        2100: (255, 142, 33),
-        2200: (255, 147, 44),
-        2300: (255, 152, 54),
-        2400: (255, 157, 63),
-        2500: (255, 161, 72),
-        2600: (255, 165, 79),
-        2700: (255, 169, 87),
-        2800: (255, 173, 94),
-        2900: (255, 177, 101),
-        3000: (255, 180, 107),
-        3100: (255, 184, 114),
-        3200: (255, 187, 120),
-        3300: (255, 190, 126),
-        3400: (255, 193, 132),
-        3500: (255, 196, 137),
-        3600: (255, 199, 143),
-        3700: (255, 201, 148),
-        3800: (255, 204, 153),
-        3900: (255, 206, 159),
-        4000: (255, 209, 163),
-        4100: (255, 211, 168),
-        4200: (255, 213, 173),
-        4300: (255, 215, 177),
-        4400: (255, 217, 182),
-        4500: (255, 219, 186),
-        4600: (255, 221, 190),
-        4700: (255, 223, 194),
-        4800: (255, 225, 198),
-        4900: (255, 227, 202),
-        5000: (255, 228, 206),
-        5100: (255, 230, 210),
-        5200: (255, 232, 213),
-        5300: (255, 233, 217),
-        5400: (255, 235, 220),
-        5500: (255, 236, 224),
-        5600: (255, 238, 227),
-        5700: (255, 239, 230),
-        5800: (255, 240, 233),
-        5900: (255, 242, 236),
-        6000: (255, 243, 239),
-        6100: (255, 244, 242),
-        6200: (255, 245, 245),
-        6300: (255, 246, 247),
-        6400: (255, 248, 251),
-        6500: (255, 249, 253),
-        6600: (254, 249, 255),
-        6700: (252, 247, 255),
-        6800: (249, 246, 255),
-        6900: (247, 245, 255),
-        7000: (245, 243, 255),
-        7100: (243, 242, 255),
-        7200: (240, 241, 255),
-        7300: (239, 240, 255),
-        7400: (237, 239, 255),
-        7500: (235, 238, 255),
-        7600: (233, 237, 255),
-        7700: (231, 236, 255),
-        7800: (230, 235, 255),
-        7900: (228, 234, 255),
-        8000: (227, 233, 255),
-        8100: (225, 232, 255),
-        8200: (224, 231, 255),
-        8300: (222, 230, 255),
-        8400: (221, 230, 255),
-        8500: (220, 229, 255),
-        8600: (218, 229, 255),
-        8700: (217, 227, 255),
-        8800: (216, 227, 255),
-        8900: (215, 226, 255),
-        9000: (214, 225, 255),
-        9100: (212, 225, 255),
-        9200: (211, 224, 255),
-        9300: (210, 223, 255),
-        9400: (209, 223, 255),
-        9500: (208, 222, 255),
-        9600: (207, 221, 255),
-        9700: (207, 221, 255),
-        9800: (206, 220, 255),
-        9900: (205, 220, 255),
-        10000: (207, 218, 255),
-        10100: (207, 218, 255),
-        10200: (206, 217, 255),
-        10300: (205, 217, 255),
-        10400: (204, 216, 255),
-        10500: (204, 216, 255),
-        10600: (203, 215, 255),
-        10700: (202, 215, 255),
-        10800: (202, 214, 255),
-        10900: (201, 214, 255),
-        11000: (200, 213, 255),
-        11100: (200, 213, 255),
-        11200: (199, 212, 255),
-        11300: (198, 212, 255),
-        11400: (198, 212, 255),
-        11500: (197, 211, 255),
-        11600: (197, 211, 255),
-        11700: (197, 210, 255),
-        11800: (196, 210, 255),
-        11900: (195, 210, 255),
-        12000: (195, 209, 255),
-    }
-    return kelvin_table[temp]
-
-
-def rgb_to_rgbw(r, g, b):
-    color_corrections = get_color_correction(WHITE_TEMPERATURE)
-    k_red = color_corrections[0]
-    k_green = color_corrections[1]
-    k_blue = color_corrections[2]
-
-    white_value_red = r * 255.0 / k_red
-    white_value_green = g * 255.0 / k_green
-    white_value_blue = b * 255.0 / k_blue
-
-    min_white = min(white_value_red, white_value_green, white_value_blue)
-
-    white_output = math.floor(min_white) if min_white <= 255 else 255
-    red_output = math.floor(r - min_white * k_red / 255)
-    green_output = math.floor(g - min_white * k_green / 255)
-    blue_output = math.floor(b - min_white * k_blue / 255)
-    if red_output < 0:
-        red_output = 0
-    if green_output < 0:
-        green_output = 0
-    if blue_output < 0:
-        blue_output = 0
-    return red_output, green_output, blue_output, white_output
+    if temp is None:
+        return 255, 255, 255
+    return KELVIN_TABLE[temp]
+
+
+@lru_cache(maxsize=None)
+def _conversion_tables(white_temperature):
+    """
+    Bouwt de opzoektabel voor één witpunt: per kanaal de witwaarde
+    ``v * 255 / k`` voor v = 0..255. Geeft ook de correctie k zelf terug, om het
+    wit weer van de kanalen af te trekken.
+    """
+    k = np.array(get_color_correction(white_temperature), dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        white_lut = np.arange(256, dtype=np.float64)[None, :] * 255.0 / k[:, None]
+    # Een kanaal zonder bijdrage aan het wit (k = 0, < 2000 K) begrenst het wit niet.
+    white_lut[k == 0] = np.inf
+    white_lut.setflags(write=False)
+    return white_lut, k
+
+
+@lru_cache(maxsize=None)
+def _scalar_tables(white_temperature):
+    """De tabellen van _conversion_tables als Python-lijsten, voor rgb_to_rgbw."""
+    white_lut, k = _conversion_tables(white_temperature)
+    return white_lut.tolist(), k.tolist()
+
+
+def rgb_to_rgbw_batch(rgb, white_temperature=WHITE_TEMPERATURE, out=None):
+    """
+    Converteert een (N, 3) array met RGB-waarden naar een (N, 4) uint8 array met RGBW.
+
+    :param rgb: array-achtige (N, 3) invoer; waarden buiten 0-255 worden begrensd.
+    :param white_temperature: witpunt in Kelvin, of None voor neutraal wit.
+    :param out: optionele (N, 4) uint8 array om het resultaat in te schrijven.
+    """
+    rgb = np.clip(np.asarray(rgb).reshape(-1, 3), 0, 255).astype(np.int16, copy=False)
+    if out is None:
+        out = np.empty((len(rgb), 4), dtype=np.uint8)
+
+    if white_temperature is None:
+        # Neutraal wit: de tabellen zijn de identiteit, dus rechtstreeks rekenen.
+        white = rgb.min(axis=1)
+        out[:, :3] = rgb - white[:, None]
+        out[:, 3] = white
+        return out
+
+    white_lut, k = _conversion_tables(white_temperature)
+    min_white = np.minimum(np.minimum(white_lut[0, rgb[:, 0]], white_lut[1, rgb[:, 1]]), white_lut[2, rgb[:, 2]])
+    out[:, 3] = np.minimum(np.floor(min_white), 255)
+    out[:, :3] = np.maximum(np.floor(rgb - min_white[:, None] * k / 255), 0)
+    return out
+
+
+def rgb_to_rgbw(r, g, b, white_temperature=WHITE_TEMPERATURE):
+    """Converteert één RGB-kleur naar een (R, G, B, W) tuple; zelfde uitkomst als rgb_to_rgbw_batch."""
+    r, g, b = int(min(max(r, 0), 255)), int(min(max(g, 0), 255)), int(min(max(b, 0), 255))
+    if white_temperature is None:
+        white = min(r, g, b)
+        return r - white, g - white, b - white, white
+
+    white_lut, k = _scalar_tables(white_temperature)
+    min_white = min(white_lut[0][r], white_lut[1][g], white_lut[2][b])
+    return (max(math.floor(r - min_white * k[0] / 255), 0),
+            max(math.floor(g - min_white * k[1] / 255), 0),
+            max(math.floor(b - min_white * k[2] / 255), 0),
+            min(math.floor(min_white), 255))
 
 
 def rgb_to_hex(color: dict[str, int]) -> str:
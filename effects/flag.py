@@ -1,63 +1,89 @@
 # P1-Visualizer/effects/flag.py
 
-from .base_effect import Effects
+import numpy as np
+from .base_effect import AnalyticEffect, POSITION_EPSILON
 from .schemas import EffectModel, FlagParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw
+from .ui_params import ColorParam, SliderParam
 
-class FlagEffect(Effects):
+class FlagEffect(AnalyticEffect):
     """
     Een effect dat een vlag als één blok van links naar rechts over de strip laat lopen,
     vergelijkbaar met het 'Running Line' effect.
     """
+    EFFECT_NAME = "Flag"
+    PARAMS_MODEL = FlagParams
+    # Drie strepen; 'color' is hier een lijst kleuren in plaats van één kleur.
+    DEFAULTS = {
+        'color': [(255, 0, 0), (255, 255, 255), (0, 0, 255)],
+        'width': [10, 10, 10],
+        'background_color': (0, 0, 0),
+    }
+    UI_PARAMS = tuple(
+        param for i in range(3)
+        for param in (ColorParam('color', f"Color {i + 1}", i), SliderParam('width', f"Width {i + 1}", 1, 50, i))
+    ) + (ColorParam('background_color', "Background Color"),)
+    SPEED_MULTIPLIER = 40.0 # LEDs per seconde bij speed 1
+
     def __init__(self, model: EffectModel):
         super().__init__(model)
-        if not isinstance(self.params, FlagParams):
+        if not isinstance(model.params, FlagParams):
             raise ValueError("Parameters for FlagEffect must be of type FlagParams")
 
-        # current_frame wordt al geïnitialiseerd in de base class
+    def _on_num_leds_change(self):
+        self._track = None # Wordt bij het volgende frame opnieuw opgebouwd (zie _build_track)
+
+    def period(self):
+        # De vlag legt de strip plus zijn eigen lengte af en begint dan opnieuw.
+        total_pattern_width = sum(self.params.width)
+        if total_pattern_width == 0 or self.speed <= 0:
+            return 0.0
+        return (self.num_leds + total_pattern_width) / (self.speed * self.SPEED_MULTIPLIER)
 
-    def get_next_frame(self, delta_time: float = 0.0):
+    def _build_track(self):
         """
-        Retourneert het volgende frame voor het Flag effect.
+        Bouwt één keer per aantal LEDs (de params veranderen niet binnen een instantie) de
+        "baan" van de vlag: num_leds achtergrond, het gekleurde vlagpatroon en weer num_leds
+        achtergrond. Elk frame is daarna een aaneengesloten stuk van deze baan.
         """
         brightness_factor = self.params.brightness / 100.0
-        
-        bg_r, bg_g, bg_b = self.params.background_color.red, self.params.background_color.green, self.params.background_color.blue
-        bg_rgbw = rgb_to_rgbw(bg_r, bg_g, bg_b)
+        bg = self.params.background_color
+        bg_rgbw = rgb_to_rgbw(bg.red, bg.green, bg.blue)
+
+        # Maak een "kleurenkaart" van het vlagpatroon: één RGBW-rij per streep, herhaald per breedte.
+        stripe_colors = np.array([
+            rgb_to_rgbw(int(c.red * brightness_factor), int(c.green * brightness_factor), int(c.blue * brightness_factor))
+            for c in self.params.color[:len(self.params.width)]
+        ], dtype=np.uint8).reshape(-1, 4)
+        pattern_map = np.repeat(stripe_colors, self.params.width[:len(stripe_colors)], axis=0)
+
+        track = np.empty((2 * self.num_leds + sum(self.params.width), 4), dtype=np.uint8)
+        track[:] = bg_rgbw
+        track[self.num_leds:self.num_leds + len(pattern_map)] = pattern_map
+        return track
+
+    def draw(self, out):
+        """
+        Schrijft het frame voor het Flag effect in de buffer.
+        """
+        if self._track is None:
+            self._track = self._build_track()
 
         total_pattern_width = sum(self.params.width)
         if total_pattern_width == 0:
-             return [bg_rgbw] * self.num_leds
+            # Alleen achtergrond; de baan bestaat dan alleen uit achtergrondkleur.
+            out[:] = self._track[:len(out)]
+            return
 
         # --- NIEUWE SNELHEIDSBEREKENING ---
         # De vlag moet de hele strip + zijn eigen lengte afleggen om volledig uit beeld te verdwijnen.
         total_distance = self.num_leds + total_pattern_width
-        speed_multiplier = 40.0
-        self.current_frame = (self.current_frame + self.speed * delta_time * speed_multiplier) % total_distance
-
-        # Maak een "kleurenkaart" van het vlagpatroon voor efficiëntie.
-        pattern_map = []
-        for i, width in enumerate(self.params.width):
-            color_input = self.params.color[i]
-            scaled_red = int(color_input.red * brightness_factor)
-            scaled_green = int(color_input.green * brightness_factor) 
-            scaled_blue = int(color_input.blue * brightness_factor)
-            rgbw_color = rgb_to_rgbw(scaled_red, scaled_green, scaled_blue)
-            pattern_map.extend([rgbw_color] * width)
-
-        # Begin met een volledig lege (achtergrondkleur) strip.
-        frame = [bg_rgbw] * self.num_leds
-
-        # --- NIEUWE TEKENLOGICA ---
+        distance = (self.speed * self.time * self.SPEED_MULTIPLIER) % total_distance
+
         # Bepaal de startpositie van de vlag. 
         # Door de breedte van het patroon eraf te halen, start de vlag buiten het beeld.
-        start_pos = int(self.current_frame) - total_pattern_width
-
-        # Teken alleen de pixels van de vlag die daadwerkelijk op de strip zichtbaar zijn.
-        for i in range(total_pattern_width):
-            led_index = start_pos + i
-            # Controleer of de pixel binnen de strip valt (van 0 tot num_leds).
-            if 0 <= led_index < self.num_leds:
-                frame[led_index] = pattern_map[i]
-        
-        return frame
\ No newline at end of file
+        start_pos = int(distance + POSITION_EPSILON) - total_pattern_width
+
+        # LED p toont het vlagpatroon op p - start_pos, dus baanpositie p - start_pos + num_leds.
+        first = self.num_leds - start_pos
+        out[:] = self._track[first:first + len(out)]
@@ -1,34 +1,45 @@
-from .effects import Effects
+from .base_effect import AnalyticEffect, POSITION_EPSILON
 from .schemas import KnightRiderParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw
+from .ui_params import SliderParam
+
+class KnightRiderEffect(AnalyticEffect):
+    EFFECT_NAME = "Knight Rider"
+    PARAMS_MODEL = KnightRiderParams
+    DEFAULTS = {'line_length': 10}
+    UI_PARAMS = (SliderParam('line_length', "Line Length", 1, 100),)
+    SPEED_MULTIPLIER = 40 # LEDs per seconde bij speed 1
 
-class KnightRiderEffect(Effects):
     def __init__(self, model):
         super().__init__(model)
         self.params: KnightRiderParams = self.params
-        self.position = 0.0
-        self.direction = 1
 
-    def get_next_frame(self, delta_time: float = 0.0):
-        pixels_per_second = self.speed * 40
-        self.position += self.direction * pixels_per_second * delta_time
-        
+    def period(self):
+        # Heen en terug over de strip, min de lengte van het blok.
+        travel = self.num_leds - self.params.line_length
+        if travel <= 0 or self.speed <= 0:
+            return 0.0
+        return 2.0 * travel / (self.speed * self.SPEED_MULTIPLIER)
+
+    def position(self):
+        """Positie van het blok op tijd self.time: heen en weer tussen 0 en num_leds - line_length."""
+        travel = self.num_leds - self.params.line_length
+        if travel <= 0 or self.speed <= 0:
+            return 0.0
+        distance = (self.time * self.speed * self.SPEED_MULTIPLIER) % (2.0 * travel)
+        return distance if distance <= travel else 2.0 * travel - distance
+
+    def draw(self, out):
         line_length = self.params.line_length
-        if self.position + line_length >= self.num_leds:
-            self.position = self.num_leds - line_length
-            self.direction = -1
-        if self.position <= 0:
-            self.position = 0
-            self.direction = 1
-            
-        frame = [[0, 0, 0, 0]] * self.num_leds
+
+        out[:] = 0
         r, g, b = self.params.color[0].red, self.params.color[0].green, self.params.color[0].blue
         brightness = self.params.brightness / 100.0
         main_color = rgb_to_rgbw(int(r * brightness), int(g * brightness), int(b * brightness))
         
-        start_led = int(self.position)
-        for i in range(line_length):
-            if 0 <= start_led + i < self.num_leds:
-                frame[start_led + i] = main_color
-        
-        return frame
+        # Teken het blok als één slice, geknipt op de grenzen van de strip.
+        start_led = int(self.position() + POSITION_EPSILON)
+        lo = max(0, start_led)
+        hi = min(len(out), start_led + line_length)
+        if lo < hi:
+            out[lo:hi] = main_color
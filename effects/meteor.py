@@ -1,58 +1,121 @@
-import random
+import numpy as np
 from .effects import Effects
 from .schemas import MeteorParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw, rgb_to_rgbw_batch
+from .ui_params import SliderParam
 
 class MeteorEffect(Effects):
+    EFFECT_NAME = "Meteor"
+    PARAMS_MODEL = MeteorParams
+    DEFAULTS = {'meteor_width': 10, 'spark_intensity': 50, 'meteor_count': 1}
+    UI_PARAMS = (
+        SliderParam('meteor_width', "Meteor Width", 1, 100),
+        SliderParam('spark_intensity', "Spark Intensity", 0, 100),
+        SliderParam('meteor_count', "Meteor Count", 1, 5),
+    )
+    TAIL = 20 # Aantal LEDs dat een meteoor na het einde van de strip doorloopt voordat hij opnieuw begint
+
     def __init__(self, model):
         super().__init__(model)
         self.params: MeteorParams = self.params
         self.max_sparkle_duration = 1.0 # Levensduur in seconden
+        brightness = self.params.brightness / 100.0
+        color = self.params.color[0]
+        self._base_rgb = np.array([color.red, color.green, color.blue], dtype=np.float64) * brightness
+        self._body_rgbw = rgb_to_rgbw(*(int(c) for c in self._base_rgb))
         self._on_num_leds_change()
 
     def _on_num_leds_change(self):
-        self.position = float(self.num_leds - 1)
-        self.sparkles = {} # Slaat op: {index: resterende_tijd}
+        # De meteoren beginnen bovenaan de strip, op gelijke afstanden binnen één doorloop.
+        count = max(1, self.params.meteor_count)
+        self.positions = float(self.num_leds - 1) + np.arange(count) * (self._cycle_length() / count)
+        self.sparkle_time = np.zeros(self.num_leds, dtype=np.float32) # Resterende levensduur (s) van de vonk per LED
+        self._sparkle_span = (0, 0) # [lo, hi): buiten dit bereik is sparkle_time 0
+
+    def _cycle_length(self):
+        """Afstand in LEDs die een meteoor aflegt tussen twee starts."""
+        return self.num_leds - 1 + self.params.meteor_width + self.TAIL
 
-    def get_next_frame(self, delta_time: float):
+    def _clear_sparkles_of(self, restart):
+        """
+        Dooft de vonken van de meteoren die opnieuw beginnen (restart is een masker over
+        positions). Een meteoor laat zijn vonken boven zijn eigen positie achter, dus alles
+        onder de laagste meteoor die nog onderweg is, hoort bij de meteoren die opnieuw
+        beginnen. Met één meteoor gaan alle vonken uit.
+        """
+        moving = self.positions[~restart]
+        limit = self.num_leds
+        if len(moving):
+            limit = min(limit, max(0, int(moving.min()) + self.params.meteor_width))
+        self.sparkle_time[:limit] = 0.0
+        lo, hi = self._sparkle_span
+        lo = max(lo, limit)
+        self._sparkle_span = (lo, hi) if lo < hi else (0, 0)
+
+    def _step(self, delta_time):
+        """
+        Zet de meteoren en vonken delta_time verder. Geeft de indices van de vonken die
+        nog branden, of None als er geen zijn.
+        """
+        self.time += delta_time
         pixels_per_second = self.speed * 50
+        width = self.params.meteor_width
         
-        last_pos_int = int(self.position)
-        self.position -= pixels_per_second * delta_time
-        new_pos_int = int(self.position)
-        
-        if self.position + self.params.meteor_width < -20: # Reset
-            self.position = float(self.num_leds - 1)
-            self.sparkles.clear()
-            
-        for p in range(new_pos_int, last_pos_int):
-            sparkle_index = p + self.params.meteor_width
-            if 0 <= sparkle_index < self.num_leds and random.randint(0, 100) < self.params.spark_intensity:
-                self.sparkles[sparkle_index] = self.max_sparkle_duration
-                
-        frame = [[0, 0, 0, 0]] * self.num_leds
-        brightness = self.params.brightness / 100.0
-        r, g, b = self.params.color[0].red, self.params.color[0].green, self.params.color[0].blue
+        last_pos_int = self.positions.astype(np.int64)
+        self.positions -= pixels_per_second * delta_time
+        new_pos_int = self.positions.astype(np.int64)
+
+        restart = self.positions + width < -self.TAIL
+        if restart.any():
+            self._clear_sparkles_of(restart)
+            self.positions[restart] = float(self.num_leds - 1) # Opnieuw beginnen
         
-        for i in range(self.params.meteor_width):
-            if 0 <= int(self.position) + i < self.num_leds:
-                frame[int(self.position) + i] = rgb_to_rgbw(int(r*brightness), int(g*brightness), int(b*brightness))
-                
-        keys_to_delete = []
-        for key, time_left in self.sparkles.items():
-            time_left -= delta_time
-            if time_left <= 0:
-                keys_to_delete.append(key)
-                continue
-            sparkle_brightness = time_left / self.max_sparkle_duration
-            r_s = int(r * brightness * sparkle_brightness)
-            g_s = int(g * brightness * sparkle_brightness)
-            b_s = int(b * brightness * sparkle_brightness)
-            if 0 <= key < self.num_leds:
-                frame[key] = rgb_to_rgbw(r_s, g_s, b_s)
-            self.sparkles[key] = time_left
-            
-        for key in keys_to_delete:
-            del self.sparkles[key]
-            
-        return frame
+        # Vonken op de LEDs achter de meteoren, tussen de vorige en de nieuwe positie.
+        passed = [np.arange(new, last) + width for new, last in zip(new_pos_int.tolist(), last_pos_int.tolist()) if new < last]
+        if passed:
+            indices = np.concatenate(passed)
+            indices = indices[(indices >= 0) & (indices < self.num_leds)]
+            sparks = indices[self.np_rng.random(len(indices)) * 100 < self.params.spark_intensity]
+            if len(sparks):
+                self.sparkle_time[sparks] = self.max_sparkle_duration
+                lo, hi = self._sparkle_span
+                if lo < hi:
+                    self._sparkle_span = (min(lo, int(sparks.min())), max(hi, int(sparks.max()) + 1))
+                else:
+                    self._sparkle_span = (int(sparks.min()), int(sparks.max()) + 1)
+
+        # Verouder de vonken in één keer. Alleen het bereik met vonken wordt bijgewerkt,
+        # zodat een lange strip niet per frame meer kost.
+        lo, hi = self._sparkle_span
+        if lo >= hi:
+            return None
+        sparkle_time = self.sparkle_time[lo:hi]
+        sparkle_time -= delta_time
+        np.maximum(sparkle_time, 0.0, out=sparkle_time)
+        lit = np.flatnonzero(sparkle_time)
+        if not len(lit):
+            self._sparkle_span = (0, 0)
+            return None
+        lit += lo
+        self._sparkle_span = (int(lit[0]), int(lit[-1]) + 1)
+        return lit
+
+    def advance(self, delta_time: float):
+        """Zoals render_into, maar zonder het frame te tekenen (voor seek en fast_forward)."""
+        self._step(delta_time)
+
+    def render_into(self, out, delta_time: float = 0.0):
+        lit = self._step(delta_time)
+        width = self.params.meteor_width
+
+        out[:] = 0
+        for start in self.positions.astype(np.int64).tolist():
+            lo = max(0, start)
+            hi = min(len(out), start + width)
+            if lo < hi:
+                out[lo:hi] = self._body_rgbw
+
+        # Teken de overlevende vonken in batch, over de meteoren heen.
+        if lit is not None:
+            sparkle_brightness = (self.sparkle_time[lit] / self.max_sparkle_duration)[:, None]
+            out[lit] = rgb_to_rgbw_batch((self._base_rgb * sparkle_brightness).astype(np.int32))
@@ -1,33 +1,38 @@
 # P1-Visualizer/effects/multicolor.py
 
 import colorsys
-from .base_effect import Effects
+from .base_effect import AnalyticEffect
 from .schemas import EffectModel, MulticolorParams
-from utils import rgb_to_rgbw # Correcte import
+from .converts import rgb_to_rgbw
 
-class MulticolorEffect(Effects):
+class MulticolorEffect(AnalyticEffect):
     """
     Multicolor effect dat een regenboog van kleuren door de LEDs fietst.
     """
+    EFFECT_NAME = "Multicolor"
+    PARAMS_MODEL = MulticolorParams
+    HUE_CHANGE_PER_SECOND = 0.1 # Deel van de kleurencirkel per seconde bij speed 1
+
     def __init__(self, model: EffectModel):
         super().__init__(model)
-        if not isinstance(self.params, MulticolorParams):
+        if not isinstance(model.params, MulticolorParams):
             raise ValueError("Parameters for MulticolorEffect must be of type MulticolorParams")
-            
-        self.hue = 0.0 # Startkleur (rood in HSV)
 
-    def get_next_frame(self, delta_time: float = 0.0):
+    def period(self):
+        # Eén volledige rondgang door de kleurencirkel.
+        return 1.0 / (self.HUE_CHANGE_PER_SECOND * self.speed) if self.speed > 0 else 0.0
+
+    def draw(self, out):
         """
-        Genereert het volgende frame voor het multicolor effect.
+        Schrijft het frame voor het multicolor effect in de buffer.
         """
         brightness_factor = self.params.brightness / 100.0
         
-        # Snelheid (1-5) schaalt de basis snelheid van kleurverandering.
-        hue_change_per_second = 0.1 
-        self.hue = (self.hue + hue_change_per_second * self.speed * delta_time) % 1.0
+        # Snelheid (1-5) schaalt de basis snelheid van kleurverandering; op t = 0 rood.
+        hue = (self.HUE_CHANGE_PER_SECOND * self.speed * self.time) % 1.0
         
         # Converteer de huidige HSV-kleur naar RGB
-        r_float, g_float, b_float = colorsys.hsv_to_rgb(self.hue, 1.0, 1.0)
+        r_float, g_float, b_float = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
         
         # Pas helderheid toe en converteer naar 0-255 integer waarden
         red = int(r_float * 255 * brightness_factor)
@@ -35,4 +40,4 @@ class MulticolorEffect(Effects):
         blue = int(b_float * 255 * brightness_factor)
         
         # Converteer naar RGBW en stuur naar alle LEDs
-        return [rgb_to_rgbw(red, green, blue)] * self.num_leds
\ No newline at end of file
+        out[:] = rgb_to_rgbw(red, green, blue)
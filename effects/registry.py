@@ -0,0 +1,87 @@
+"""
+Registry van alle effecten: naam -> effectklasse.
+
+Een effect beschrijft zichzelf met klasse-attributen (zie base_effect.Effects):
+EFFECT_NAME, PARAMS_MODEL, DEFAULTS en UI_PARAMS. Daaruit bouwen actions.py de
+Params en de visualizer het parameterpaneel op; er zijn geen lijsten per
+effectnaam meer nodig.
+
+De ingebouwde effecten staan hieronder in de volgorde van de effectenlijst.
+Andere pakketten kunnen effecten toevoegen via een entry point in de groep
+ENTRY_POINT_GROUP, bijvoorbeeld in pyproject.toml:
+
+    [project.entry-points."pulseline1.effects"]
+    sparkle = "mijn_effecten.sparkle:SparkleEffect"
+
+Entry points worden pas bij het eerste opzoeken geladen, zodat ook
+exportprocessen ze zien. Een plugin die niet laadt wordt overgeslagen met een
+waarschuwing; de ingebouwde effecten blijven dan gewoon werken.
+"""
+from .base_effect import Effects
+from .breathing import BreathingEffect
+from .christmas_snow import ChristmasSnowEffect
+from .flag import FlagEffect
+from .knight_rider import KnightRiderEffect
+from .meteor import MeteorEffect
+from .multicolor import MulticolorEffect
+from .running_line import RunningLineEffect
+from .static import StaticEffect
+
+ENTRY_POINT_GROUP = "pulseline1.effects"
+DEFAULT_EFFECT_CLASS = StaticEffect # Voor acties met een onbekend effect (bijv. een verwijderde plugin)
+
+_EFFECTS = {} # naam -> klasse, in volgorde van registratie
+_entry_points_loaded = False
+
+
+def register_effect(effect_class):
+    """
+    Registreert een effectklasse onder zijn EFFECT_NAME. Een bestaande naam wordt
+    overschreven. Kan ook als decorator gebruikt worden.
+    """
+    if not (isinstance(effect_class, type) and issubclass(effect_class, Effects)):
+        raise TypeError(f"{effect_class!r} is geen subklasse van Effects")
+    if not effect_class.EFFECT_NAME or effect_class.PARAMS_MODEL is None:
+        raise ValueError(f"{effect_class.__name__} mist EFFECT_NAME of PARAMS_MODEL")
+    _EFFECTS[effect_class.EFFECT_NAME] = effect_class
+    return effect_class
+
+
+def _entry_points():
+    from importlib.metadata import entry_points
+    try:
+        return entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError: # Python < 3.10
+        return entry_points().get(ENTRY_POINT_GROUP, ())
+
+
+def load_entry_points():
+    """Laadt de effecten uit entry points (één keer per proces)."""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for entry_point in _entry_points():
+        try:
+            register_effect(entry_point.load())
+        except Exception as e:
+            print(f"WARNING: Could not load effect plugin '{entry_point.name}': {e}")
+
+
+def effect_names():
+    """Geeft de namen van alle effecten, in de volgorde van de effectenlijst."""
+    load_entry_points()
+    return list(_EFFECTS)
+
+
+def get_effect_class(effect_name):
+    """Geeft de effectklasse voor een naam, of None als die niet geregistreerd is."""
+    load_entry_points()
+    return _EFFECTS.get(effect_name)
+
+
+for _effect_class in (
+    StaticEffect, BreathingEffect, KnightRiderEffect, MeteorEffect,
+    MulticolorEffect, RunningLineEffect, ChristmasSnowEffect, FlagEffect,
+):
+    register_effect(_effect_class)
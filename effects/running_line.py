@@ -1,27 +1,56 @@
 # P1-Visualizer/effects/running_line.py
 
-from .base_effect import Effects
+import math
+
+import numpy as np
+from .base_effect import AnalyticEffect, POSITION_EPSILON
 from .schemas import EffectModel, RunningLineParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw
+from .ui_params import ColorParam, SliderParam
 
-class RunningLineEffect(Effects):
+class RunningLineEffect(AnalyticEffect):
     """
     Een effect dat meerdere 'lopende lijnen' of strepen over de LED-strip simuleert.
     Deze versie is bijgewerkt om met delta_time te werken voor soepele animatie.
     """
+    EFFECT_NAME = "Running Line"
+    PARAMS_MODEL = RunningLineParams
+    DEFAULTS = {'line_width': 5, 'number_of_lines': 3, 'background_color': (0, 0, 0)}
+    UI_PARAMS = (
+        SliderParam('line_width', "Line Width", 1, 50),
+        SliderParam('number_of_lines', "Number of Lines", 1, 10),
+        ColorParam('background_color', "Background Color"),
+    )
+    SPEED_MULTIPLIER = 100.0 # LEDs per seconde bij speed 1
+
     def __init__(self, model: EffectModel):
         super().__init__(model)
-        if not isinstance(self.params, RunningLineParams):
+        if not isinstance(model.params, RunningLineParams):
             raise ValueError("Parameters for RunningLineEffect must be of type RunningLineParams")
-        
-        # current_frame wordt al geïnitialiseerd in de base class
 
-    def get_next_frame(self, delta_time: float = 0.0):
+    def _on_num_leds_change(self):
+        self._track = None # Wordt bij het volgende frame opnieuw opgebouwd (zie _build_track)
+
+    def period(self):
+        # De lijnen beginnen op hele LEDs (zie _build_track), dus bij een aantal LEDs dat niet
+        # deelbaar is door het aantal lijnen liggen ze niet op gelijke afstanden. Het patroon
+        # herhaalt zich na num_leds / ggd(num_leds, number_of_lines) LEDs: een heel aantal
+        # LEDs waarna elke lijn precies op de plek van een latere lijn ligt.
+        number_of_lines = self.params.number_of_lines
+        if number_of_lines <= 0 or self.params.line_width <= 0 or self.speed <= 0 or self.num_leds <= 0:
+            return 0.0
+        repeat_leds = self.num_leds // math.gcd(self.num_leds, number_of_lines)
+        return repeat_leds / (self.speed * self.SPEED_MULTIPLIER)
+
+    def _build_track(self):
         """
-        Retourneert het volgende frame voor het Running Line effect.
+        Bouwt één keer per aantal LEDs (de params veranderen niet binnen een instantie) het
+        gekleurde patroon bij offset 0, twee keer achter elkaar. Een frame is het patroon
+        over de offset gedraaid, dus een aaneengesloten stuk van deze baan.
         """
         line_width = self.params.line_width
         number_of_lines = self.params.number_of_lines
+        num_leds = self.num_leds
 
         bg_r, bg_g, bg_b = self.params.background_color.red, self.params.background_color.green, self.params.background_color.blue
         bg_rgbw = rgb_to_rgbw(bg_r, bg_g, bg_b)
@@ -34,23 +63,31 @@ class RunningLineEffect(Effects):
             int(fg_b * brightness_factor)
         )
 
-        frame = [bg_rgbw] * self.num_leds
+        pattern = np.empty((num_leds, 4), dtype=np.uint8)
+        pattern[:] = bg_rgbw
+        if number_of_lines > 0 and num_leds > 0 and line_width > 0:
+            spacing = num_leds / number_of_lines
+            # Startposities van alle lijnen, daarna alle (lijn, breedte) indices in één keer.
+            starts = (np.arange(number_of_lines) * spacing + POSITION_EPSILON).astype(np.int64) % num_leds
+            idx = (starts[:, None] + np.arange(line_width)[None, :]) % num_leds
+            pattern[idx.ravel()] = fg_rgbw
+        return np.concatenate([pattern, pattern])
 
-        # --- NIEUWE SNELHEIDSBEREKENING MET DELTA_TIME ---
-        # De 'speed' (1-5 van de slider) wordt vermenigvuldigd met de verstreken tijd.
-        # De vermenigvuldigingsfactor (bv. 100.0) bepaalt de basissnelheid.
-        speed_multiplier = 100.0
-        self.current_frame += self.speed * delta_time * speed_multiplier
+    def draw(self, out):
+        """
+        Schrijft het frame voor het Running Line effect in de buffer.
+        """
+        if self._track is None:
+            self._track = self._build_track()
 
-        if number_of_lines > 0:
-            spacing = self.num_leds / number_of_lines
+        num_leds = len(out)
+        if num_leds == 0:
+            return
 
-            for i in range(number_of_lines):
-                start_pos = int((self.current_frame + i * spacing)) % self.num_leds
+        # De 'speed' (1-5 van de slider) wordt vermenigvuldigd met de simulatietijd.
+        # De vermenigvuldigingsfactor (SPEED_MULTIPLIER) bepaalt de basissnelheid.
+        offset = self.speed * self.time * self.SPEED_MULTIPLIER
+        shift = int(offset + POSITION_EPSILON) % num_leds
 
-                for width_offset in range(line_width):
-                    idx = (start_pos + width_offset) % self.num_leds
-                    if 0 <= idx < self.num_leds:
-                        frame[idx] = fg_rgbw
-        
-        return frame
\ No newline at end of file
+        # Hetzelfde als np.roll(patroon, shift), maar zonder nieuwe array per frame.
+        out[:] = self._track[num_leds - shift:2 * num_leds - shift]
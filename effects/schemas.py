@@ -1,57 +1,134 @@
 # schemas.py
+"""
+Pydantic modellen voor de effectparameters.
+
+Parameters worden alleen gevalideerd als ze veranderen (zie actions.py). Een
+effect bewaart daarna een FrozenParams kopie (freeze_params): een onveranderlijk
+object met alleen slots, zodat het lezen van params per frame geen
+modelmachinerie meer raakt. validation_count() telt alle validaties; daarmee
+kan worden nagegaan dat frames in de stabiele toestand niets valideren (zie
+benchmarks/bench_params.py).
+"""
 from pydantic import BaseModel
 from typing import List, Tuple, Dict, Any
 
+_validations = 0
+
+
+def validation_count():
+    """Aantal gevalideerde modellen uit deze module (incl. geneste Colors) sinds de start van het proces."""
+    return _validations
+
+
+class _CountedModel(BaseModel):
+    def model_post_init(self, context):
+        global _validations
+        _validations += 1
+
+
 # Basis Color model voor RGB
-class Color(BaseModel):
+class Color(_CountedModel):
     red: int
     green: int
     blue: int
 
 # Algemeen model voor effectparameters
-class EffectModel(BaseModel):
+class EffectModel(_CountedModel):
     params: Any # Dit zal worden vervangen door specifieke Params modellen
     frame_skip: int
     speed: int # Toegevoegd: snelheidsparameter om de schuifregelaarwaarde (1-5) door te geven
     num_leds: int
 
 # Specifieke Params modellen voor elk effect
-class StaticParams(BaseModel):
+class StaticParams(_CountedModel):
     color: List[Color]
     brightness: int
 
-class BreathingParams(BaseModel):
+class BreathingParams(_CountedModel):
     color: List[Color]
     brightness: int
 
-class KnightRiderParams(BaseModel):
+class KnightRiderParams(_CountedModel):
     color: List[Color]
     brightness: int
     line_length: int
 
-class MeteorParams(BaseModel):
+class MeteorParams(_CountedModel):
     color: List[Color]
     brightness: int
     meteor_width: int
     spark_intensity: int
+    meteor_count: int = 1 # Aantal meteoren dat tegelijk over de strip loopt
 
-class MulticolorParams(BaseModel):
+class MulticolorParams(_CountedModel):
     brightness: int
 
-class RunningLineParams(BaseModel):
+class RunningLineParams(_CountedModel):
     color: List[Color]
     brightness: int
     line_width: int
     number_of_lines: int
     background_color: Color
 
-class ChristmasSnowParams(BaseModel):
+class ChristmasSnowParams(_CountedModel):
     brightness: int
     red_chance: int
     dark_green_chance: int
 
-class FlagParams(BaseModel):
+class FlagParams(_CountedModel):
     color: List[Color]
     width: List[int]
     background_color: Color
     brightness: int
+
+
+class FrozenParams:
+    """
+    Onveranderlijke kopie van een gevalideerd model. De velden staan in slots;
+    lijsten worden tuples en geneste modellen (Color) worden ook bevroren.
+    """
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is frozen")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is frozen")
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, n) for n in self.__slots__))
+
+    def __repr__(self):
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+_frozen_types = {} # model klasse -> FrozenParams subklasse met dezelfde velden
+
+
+def _frozen_type(model_class):
+    frozen_type = _frozen_types.get(model_class)
+    if frozen_type is None:
+        frozen_type = type(model_class.__name__, (FrozenParams,), {
+            '__slots__': tuple(model_class.model_fields),
+            '__module__': model_class.__module__,
+        })
+        _frozen_types[model_class] = frozen_type
+    return frozen_type
+
+
+def freeze_params(value):
+    """Zet een gevalideerd model (of lijst ervan) om naar FrozenParams; andere waarden blijven gelijk."""
+    if isinstance(value, BaseModel):
+        fields = type(value).model_fields
+        return _frozen_type(type(value))(**{name: freeze_params(getattr(value, name)) for name in fields})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_params(item) for item in value)
+    return value
@@ -1,15 +1,21 @@
-from .base_effect import Effects
+from .base_effect import AnalyticEffect
 from .schemas import StaticParams
-from utils import rgb_to_rgbw
+from .converts import rgb_to_rgbw
+
+class StaticEffect(AnalyticEffect):
+    EFFECT_NAME = "Static"
+    PARAMS_MODEL = StaticParams
 
-class StaticEffect(Effects):
     def __init__(self, model):
         super().__init__(model)
         self.params: StaticParams = self.params
 
-    def get_next_frame(self, delta_time: float):
+    def period(self):
+        return 0.0
+
+    def draw(self, out):
         """
-        Retourneert een statische kleur. delta_time wordt genegeerd.
+        Vult de strip met een statische kleur; de tijd speelt geen rol.
         """
         brightness = self.params.brightness / 100.0
         r, g, b = self.params.color[0].red, self.params.color[0].green, self.params.color[0].blue
@@ -18,4 +24,4 @@ class StaticEffect(Effects):
         g_out = int(g * brightness)
         b_out = int(b * brightness)
         
-        return [rgb_to_rgbw(r_out, g_out, b_out)] * self.num_leds
+        out[:] = rgb_to_rgbw(r_out, g_out, b_out)
@@ -0,0 +1,32 @@
+"""
+Beschrijving van de effectspecifieke bedieningselementen in het parameterpaneel.
+
+Een effect somt in UI_PARAMS op welke schuifregelaars en kleurknoppen het
+nodig heeft (zie base_effect.Effects); de visualizer bouwt het paneel daaruit
+op. key is het veld in de actie. Bij een lijstveld (zoals de kleuren en
+breedtes van Flag) geeft index het element aan; het element heet in de UI dan
+'<key>_<index>'.
+"""
+from typing import NamedTuple, Optional
+
+
+class SliderParam(NamedTuple):
+    key: str
+    label: str
+    minimum: int
+    maximum: int
+    index: Optional[int] = None
+
+    @property
+    def ui_name(self):
+        return self.key if self.index is None else f"{self.key}_{self.index}"
+
+
+class ColorParam(NamedTuple):
+    key: str
+    label: str
+    index: Optional[int] = None
+
+    @property
+    def ui_name(self):
+        return self.key if self.index is None else f"{self.key}_{self.index}"
@@ -0,0 +1,95 @@
+"""
+Encoder-thread voor de video-export.
+
+De GUI-thread rendert frames en geeft ze met submit() door; een achtergrondthread
+zet ze om naar BGR, brengt het watermerk aan en schrijft ze naar de
+cv2.VideoWriter. Renderen en encoderen lopen zo gelijktijdig (OpenCV geeft de
+GIL vrij tijdens cvtColor en write).
+
+Er is een vaste pool van vooraf gealloceerde framebuffers. submit() wacht op
+een vrije buffer, dus er staan nooit meer dan `buffers` frames in de wachtrij
+en het geheugengebruik blijft begrensd.
+"""
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameEncoder:
+    """
+    :param video_writer: geopende cv2.VideoWriter.
+    :param width, height: framegrootte in pixels.
+    :param watermark: WatermarkCompositor voor BGR frames, of None.
+    :param buffers: aantal framebuffers tussen renderen en encoderen.
+    """
+    def __init__(self, video_writer, width, height, watermark=None, buffers=4):
+        self.video_writer = video_writer
+        self.watermark = watermark
+        self.frames_written = 0
+        self.error = None
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.empty((height, width, 3), dtype=np.uint8))
+        self._bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self._thread = threading.Thread(target=self._run, name="FrameEncoder", daemon=True)
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def submit(self, frame_rgb):
+        """Kopieert een (H, W, 3) RGB frame naar een vrije buffer en zet het in de wachtrij."""
+        if self.error is not None:
+            raise self.error
+        buffer = self._free.get()
+        np.copyto(buffer, frame_rgb)
+        self._filled.put(buffer)
+
+    def fps(self):
+        """Gemiddeld aantal geschreven frames per seconde sinds start()."""
+        if self._started_at is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._started_at
+        return self.frames_written / elapsed if elapsed > 0 else 0.0
+
+    def finish(self):
+        """Wacht tot alle frames geschreven zijn en stopt de thread. Geeft een fout uit de thread door."""
+        if self._thread.is_alive():
+            self._filled.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """Gooit de wachtende frames weg en stopt de thread."""
+        while True:
+            try:
+                self._free.put(self._filled.get_nowait())
+            except queue.Empty:
+                break
+        if self._thread.is_alive():
+            self._filled.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            buffer = self._filled.get()
+            if buffer is None:
+                return
+            try:
+                if self.error is None:
+                    cv2.cvtColor(buffer, cv2.COLOR_RGB2BGR, dst=self._bgr)
+                    if self.watermark is not None:
+                        self.watermark.apply(self._bgr)
+                    self.video_writer.write(self._bgr)
+                    self.frames_written += 1
+            except Exception as e:
+                # Na een fout blijven we buffers teruggeven, zodat submit() niet blokkeert.
+                self.error = e
+            finally:
+                self._free.put(buffer)
@@ -0,0 +1,48 @@
+# export_profiles.py
+"""
+Exportprofielen voor de video-export: resolutie, framerate, duur, codec en kwaliteit.
+
+De resolutie wordt bepaald door een schaalfactor op de afbeelding en een
+optionele maximale lengte van de langste zijde. De renderer werkt direct op
+die doelresolutie; er wordt niet eerst op volle grootte gerenderd.
+"""
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ExportProfile(BaseModel):
+    label: str
+    scale: float # Schaalfactor t.o.v. de afbeelding (1.0 = volledige resolutie)
+    max_dimension: Optional[int] = None # Maximale lengte van de langste zijde in pixels
+    fps: int
+    duration_seconds: float
+    codec: str # FourCC, bijv. 'mp4v' of 'avc1'
+    quality: int # 0-100, alleen gebruikt als de OpenCV-backend het ondersteunt
+    max_loop_seconds: float = 60 # Maximale lengte van een naadloze loop
+
+    @property
+    def max_loop_frames(self):
+        return max(1, int(self.fps * self.max_loop_seconds))
+
+    @property
+    def total_frames(self):
+        return max(1, int(round(self.fps * self.duration_seconds)))
+
+    def output_size(self, width, height):
+        """Geeft (breedte, hoogte) van de export voor een afbeelding van width x height; altijd even."""
+        scale = self.scale
+        if self.max_dimension:
+            scale = min(scale, self.max_dimension / max(width, height))
+        # Encoders vereisen vaak even afmetingen.
+        out_width = max(2, int(width * scale) // 2 * 2)
+        out_height = max(2, int(height * scale) // 2 * 2)
+        return out_width, out_height
+
+
+EXPORT_PROFILES = {
+    "preview": ExportProfile(label="Preview (snel, 640 px)", scale=1.0, max_dimension=640, fps=15, duration_seconds=5, codec='mp4v', quality=50, max_loop_seconds=20),
+    "web": ExportProfile(label="Web (1920 px)", scale=1.0, max_dimension=1920, fps=30, duration_seconds=10, codec='mp4v', quality=75),
+    "full": ExportProfile(label="Volledig (originele resolutie)", scale=1.0, fps=30, duration_seconds=10, codec='mp4v', quality=95),
+}
+DEFAULT_EXPORT_PROFILE = "full"
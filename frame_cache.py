@@ -0,0 +1,75 @@
+"""
+Cache van gerenderde frames voor de tijdlijn.
+
+Per (actie, frame) wordt de (num_leds, 3) uint8 kleurarray bewaard die de
+visualizer toont. Bij het scrubben over de tijdlijn worden frames die al eens
+getekend zijn dus niet opnieuw berekend; dat scheelt vooral bij stochastische
+effecten, die voor een eerder frame vanaf 0 moeten doorspoelen (zie
+Effects.render_at).
+
+De cache werkt als een ringbuffer met een geheugenbudget in bytes: bij een
+volle cache verdwijnen de langst geleden geschreven frames. Elk frame hoort
+bij een versie van zijn actie (zie actions.versions); een frame van
+een oudere versie telt als een miss en wordt bij het opnieuw renderen
+overschreven.
+"""
+from collections import OrderedDict
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024 # 64 MiB
+
+
+class FrameCache:
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict() # (action_id, frame) -> (versie, kleurarray), oudste eerst
+        self._frames_per_action = {} # action_id -> set van frames in de cache
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, action_id, version, frame):
+        """Geeft de kleurarray van frame voor deze versie van de actie, of None."""
+        entry = self._entries.get((action_id, frame))
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, action_id, version, frame, colors):
+        """
+        Bewaart colors voor frame. De array wordt niet gekopieerd en mag daarna
+        niet meer gewijzigd worden.
+        """
+        key = (action_id, frame)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._nbytes -= old[1].nbytes
+        if colors.nbytes > self.memory_budget:
+            self._frames_per_action.get(action_id, set()).discard(frame)
+            return
+        self._entries[key] = (version, colors)
+        self._frames_per_action.setdefault(action_id, set()).add(frame)
+        self._nbytes += colors.nbytes
+        while self._nbytes > self.memory_budget:
+            (old_action_id, old_frame), (_, old_colors) = self._entries.popitem(last=False)
+            self._nbytes -= old_colors.nbytes
+            self._frames_per_action[old_action_id].discard(old_frame)
+
+    def discard(self, action_id):
+        """Verwijdert alle frames van een actie."""
+        for frame in self._frames_per_action.pop(action_id, ()):
+            _, colors = self._entries.pop((action_id, frame))
+            self._nbytes -= colors.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self._frames_per_action.clear()
+        self._nbytes = 0
@@ -0,0 +1,89 @@
+"""
+Planning van de frames van de live weergave.
+
+In plaats van een vaste timer van 10 ms tekent de scheduler alleen frames als
+er iets beweegt:
+
+* render_frame(delta_time) geeft terug of er nog een effect geanimeerd is
+  (zie Effects.is_animated). Zo niet, dan stopt de scheduler tot wake() wordt
+  aangeroepen; de visualizer doet dat na elke wijziging.
+* Als het venster verborgen of geminimaliseerd is, wordt er met
+  HIDDEN_INTERVAL_MS getekend in plaats van ACTIVE_INTERVAL_MS.
+* Kost een frame meer dan LOAD_LIMIT van het interval, dan wordt het volgende
+  frame later gepland. delta_time blijft de echte verstreken tijd, dus de
+  animaties lopen op dezelfde snelheid door en er vallen alleen frames weg;
+  de event loop houdt tijd over voor muis en toetsenbord.
+"""
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+ACTIVE_INTERVAL_MS = 10 # 100 fps als het venster zichtbaar is
+HIDDEN_INTERVAL_MS = 250 # 4 fps als het venster verborgen of geminimaliseerd is
+LOAD_LIMIT = 0.5 # Maximaal deel van de tijd dat aan frames besteed wordt
+
+
+class FrameScheduler(QObject):
+    """
+    :param render_frame: functie(delta_time) die een frame tekent en True teruggeeft
+                         als er nog iets beweegt.
+    """
+    def __init__(self, render_frame, parent=None):
+        super().__init__(parent)
+        self._render_frame = render_frame
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+        self._running = False # False tijdens bijv. een export; wake() doet dan niets
+        self._idle = True # Geen frame gepland omdat er niets beweegt
+        self._hidden = False
+        self._last_frame_time = time.perf_counter()
+        self.last_frame_cost = 0.0 # Seconden voor het laatste frame
+
+    @property
+    def idle(self):
+        return self._idle
+
+    def start(self):
+        """Start (of hervat na stop) de frames."""
+        self._running = True
+        self.wake()
+
+    def stop(self):
+        """Stopt alle frames tot start() weer wordt aangeroepen."""
+        self._running = False
+        self._timer.stop()
+
+    def wake(self):
+        """Plant een frame als de scheduler stilstaat omdat er niets bewoog."""
+        if not self._running or not self._idle:
+            return
+        self._idle = False
+        # De stilstand telt niet als verstreken animatietijd.
+        self._last_frame_time = time.perf_counter()
+        self._schedule()
+
+    def set_hidden(self, hidden):
+        if hidden == self._hidden:
+            return
+        self._hidden = hidden
+        if self._timer.isActive():
+            self._schedule()
+
+    def _interval_ms(self):
+        interval = HIDDEN_INTERVAL_MS if self._hidden else ACTIVE_INTERVAL_MS
+        return max(interval, int(self.last_frame_cost * 1000 / LOAD_LIMIT))
+
+    def _schedule(self):
+        self._timer.start(self._interval_ms())
+
+    def _tick(self):
+        now = time.perf_counter()
+        delta_time = now - self._last_frame_time
+        self._last_frame_time = now
+        animated = self._render_frame(delta_time)
+        self.last_frame_cost = time.perf_counter() - now
+        if animated and self._running:
+            self._schedule()
+        else:
+            self._idle = True
@@ -0,0 +1,73 @@
+"""
+Geometrie van getekende lijnen (polylines) met NumPy.
+
+Een lijn is een (N, 2) array met punten. De cumulatieve booglengte (afstand
+langs de lijn tot elk punt) is de basis voor resamplen: posities op gelijke
+afstand langs de lijn worden met np.interp uit de punten afgeleid, zonder
+Python-lus over de segmenten.
+
+De booglengte hangt alleen van de punten af en kan dus per geometry_version
+van een actie bewaard worden (zie actions.py); functies die hem nodig hebben
+accepteren hem als optioneel argument.
+"""
+import numpy as np
+
+
+def as_polyline(points):
+    """Geeft de punten als (N, 2) float64 array."""
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def cumulative_arc_length(points):
+    """Geeft een (N,) array met de afstand langs de lijn van het eerste punt tot elk punt."""
+    points = as_polyline(points)
+    arc_length = np.zeros(len(points), dtype=np.float64)
+    if len(points) > 1:
+        np.cumsum(np.hypot(*np.diff(points, axis=0).T), out=arc_length[1:])
+    return arc_length
+
+
+def polyline_length(points, arc_length=None):
+    """Totale lengte van de lijn."""
+    if arc_length is None:
+        arc_length = cumulative_arc_length(points)
+    return float(arc_length[-1]) if len(arc_length) else 0.0
+
+
+def points_at(points, distances, arc_length=None):
+    """Geeft de (M, 2) posities op de gegeven afstanden langs de lijn (geknipt op de uiteinden)."""
+    points = as_polyline(points)
+    if arc_length is None:
+        arc_length = cumulative_arc_length(points)
+    distances = np.asarray(distances, dtype=np.float64)
+    if len(points) == 1 or arc_length[-1] == 0:
+        return np.repeat(points[:1], len(distances), axis=0)
+    return np.column_stack((
+        np.interp(distances, arc_length, points[:, 0]),
+        np.interp(distances, arc_length, points[:, 1]),
+    ))
+
+
+def resample_polyline(points, count, arc_length=None):
+    """Verdeelt de lijn in count punten op gelijke afstand, inclusief begin- en eindpunt."""
+    if arc_length is None:
+        arc_length = cumulative_arc_length(points)
+    total = polyline_length(points, arc_length)
+    if count == 1:
+        return points_at(points, [0.0], arc_length)
+    return points_at(points, np.linspace(0.0, total, count), arc_length)
+
+
+def resample_by_interval(points, interval, arc_length=None):
+    """
+    Zet punten om de interval pixels langs de lijn, vanaf het beginpunt. Het
+    eindpunt wordt toegevoegd als het meer dan een half interval van het laatste
+    punt af ligt.
+    """
+    if arc_length is None:
+        arc_length = cumulative_arc_length(points)
+    total = polyline_length(points, arc_length)
+    distances = np.arange(0.0, total + interval * 1e-9, interval)
+    if total - distances[-1] > interval / 2:
+        distances = np.append(distances, total)
+    return points_at(points, distances, arc_length)
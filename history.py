@@ -0,0 +1,124 @@
+"""
+Undo/redo-geschiedenis met gedeelde structuur.
+
+Een toestand is een tuple van onveranderlijke snapshots, één per actie. Bij
+record() wordt een actie alleen opnieuw vastgelegd als zijn versies (zie
+actions.py) afwijken van de snapshot in de vorige toestand; anders deelt de
+nieuwe toestand die snapshot. Een stap kost dus geheugen naar verhouding van
+wat er veranderd is, niet van het hele project.
+
+Bij undo/redo blijven acties waarvan het id en de versies al overeenkomen met
+de snapshot ongemoeid, met hun effectinstantie en plot items. Alleen de
+andere acties worden uit hun snapshot opnieuw opgebouwd; de visualizer ziet
+aan hun versies welke lijnen hij opnieuw moet tekenen.
+
+Het geheugen van alle bewaarde snapshots samen blijft onder memory_budget;
+daarboven vervallen de oudste undo-stappen.
+"""
+import copy
+
+import numpy as np
+
+from actions import versions
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024 # Bytes voor alle snapshots samen
+_SNAPSHOT_OVERHEAD = 1024 # Geschatte bytes per snapshot naast de punten (dict, kleuren, parameters)
+_RUNTIME_KEYS = ('effect_instance', 'plot_items', 'resampled_points') # Horen niet in de geschiedenis
+
+
+class _Snapshot:
+    """Onveranderlijke kopie van één actie. De punten staan als read-only (N, 2) array."""
+    __slots__ = ('action_id', 'versions', 'points', 'fields', 'size', 'refs')
+
+    def __init__(self, action):
+        self.action_id = action.get('id')
+        self.versions = versions(action)
+        self.points = np.array(action.get('points', ()), dtype=np.float64).reshape(-1, 2)
+        self.points.flags.writeable = False
+        self.fields = copy.deepcopy({k: v for k, v in action.items() if k != 'points' and k not in _RUNTIME_KEYS})
+        self.size = self.points.nbytes + _SNAPSHOT_OVERHEAD
+        self.refs = 0 # aantal toestanden dat deze snapshot gebruikt
+
+    def matches(self, action):
+        return self.action_id is not None and action.get('id') == self.action_id and versions(action) == self.versions
+
+    def to_action(self):
+        action = copy.deepcopy(self.fields)
+        action['points'] = [tuple(point) for point in self.points.tolist()]
+        return action
+
+
+class UndoHistory:
+    """
+    :param memory_budget: maximaal geheugen in bytes voor alle snapshots; de
+                          huidige toestand wordt altijd bewaard.
+    """
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._undo = [] # toestanden, de laatste is de huidige
+        self._redo = []
+        self.memory_usage = 0 # bytes van alle snapshots die door een toestand gebruikt worden
+
+    @property
+    def undo_depth(self):
+        return max(0, len(self._undo) - 1)
+
+    @property
+    def redo_depth(self):
+        return len(self._redo)
+
+    def record(self, actions):
+        """Legt de huidige acties vast als nieuwe toestand. Een ongewijzigde toestand wordt overgeslagen."""
+        previous = {snapshot.action_id: snapshot for snapshot in self._undo[-1]} if self._undo else {}
+        state = []
+        for action in actions:
+            snapshot = previous.get(action.get('id'))
+            if snapshot is None or not snapshot.matches(action):
+                snapshot = _Snapshot(action)
+            state.append(snapshot)
+        state = tuple(state)
+        if self._undo and len(state) == len(self._undo[-1]) and all(a is b for a, b in zip(state, self._undo[-1])):
+            return
+
+        for redo_state in self._redo:
+            self._release(redo_state)
+        self._redo.clear()
+        self._retain(state)
+        self._undo.append(state)
+        while self.memory_usage > self.memory_budget and len(self._undo) > 1:
+            self._release(self._undo.pop(0))
+
+    def undo(self, actions):
+        """Gaat een stap terug. Geeft de nieuwe lijst met acties, of None als er niets terug te zetten is."""
+        if len(self._undo) <= 1:
+            return None
+        self._redo.append(self._undo.pop())
+        return self._restore(self._undo[-1], actions)
+
+    def redo(self, actions):
+        """Zet een ongedaan gemaakte stap opnieuw. Geeft de nieuwe lijst met acties, of None."""
+        if not self._redo:
+            return None
+        state = self._redo.pop()
+        self._undo.append(state)
+        return self._restore(state, actions)
+
+    def _restore(self, state, actions):
+        live = {action.get('id'): action for action in actions}
+        restored = []
+        for snapshot in state:
+            action = live.get(snapshot.action_id)
+            restored.append(action if action is not None and snapshot.matches(action) else snapshot.to_action())
+        return restored
+
+    def _retain(self, state):
+        for snapshot in state:
+            if snapshot.refs == 0:
+                self.memory_usage += snapshot.size
+            snapshot.refs += 1
+
+    def _release(self, state):
+        for snapshot in state:
+            snapshot.refs -= 1
+            if snapshot.refs == 0:
+                self.memory_usage -= snapshot.size
@@ -0,0 +1,78 @@
+"""
+Beeldpiramide voor grote achtergrondfoto's.
+
+Niveau 0 is de afbeelding zelf; elk volgend niveau is half zo groot (INTER_AREA)
+tot de langste zijde hooguit MIN_LEVEL_SIZE pixels is. Een niveau wordt pas
+berekend als het voor het eerst nodig is, uit het vorige niveau.
+
+Posities en rechthoeken zijn altijd in pixels van niveau 0 (rij 0 = bovenkant),
+zodat de weergave niet hoeft te weten hoe groot een niveau precies is.
+"""
+import math
+
+import cv2
+
+TILE_SIZE = 512 # Pixels per tegelzijde, op elk niveau
+MIN_LEVEL_SIZE = 256 # Kleinste niveau: langste zijde in pixels
+
+
+class ImagePyramid:
+    """
+    :param image: (H, W, 3|4) uint8 afbeelding, rij 0 = bovenkant. Wordt niet gekopieerd.
+    """
+    def __init__(self, image):
+        self.height, self.width = image.shape[:2]
+        self.channels = image.shape[2]
+        self._sizes = [(self.width, self.height)]
+        while max(self._sizes[-1]) > MIN_LEVEL_SIZE:
+            width, height = self._sizes[-1]
+            self._sizes.append((max(1, (width + 1) // 2), max(1, (height + 1) // 2)))
+        self._levels = [image] + [None] * (len(self._sizes) - 1)
+
+    @property
+    def level_count(self):
+        return len(self._sizes)
+
+    def level(self, index):
+        """Geeft niveau index als (h, w, C) array; berekent het zo nodig uit het vorige niveau."""
+        if self._levels[index] is None:
+            self._levels[index] = cv2.resize(self.level(index - 1), self._sizes[index], interpolation=cv2.INTER_AREA)
+        return self._levels[index]
+
+    def level_scale(self, index):
+        """Aantal pixels van niveau 0 per pixel van dit niveau, als (x, y)."""
+        width, height = self._sizes[index]
+        return self.width / width, self.height / height
+
+    def level_for_scale(self, scale):
+        """
+        Kiest het grofste niveau dat bij scale (schermpixels per pixel van niveau 0)
+        nog minstens één pixel per schermpixel heeft.
+        """
+        if scale <= 0:
+            return self.level_count - 1
+        if scale >= 1:
+            return 0
+        return min(self.level_count - 1, int(math.floor(math.log2(1.0 / scale))))
+
+    def tiles(self, index, x0, y0, x1, y1):
+        """
+        Geeft de tegels van niveau index die de rechthoek [x0, x1) x [y0, y1) (pixels van
+        niveau 0) raken, als (tx, ty, rechthoek in pixels van niveau 0).
+        """
+        width, height = self._sizes[index]
+        scale_x, scale_y = self.level_scale(index)
+        tx0 = max(0, int(x0 / scale_x) // TILE_SIZE)
+        ty0 = max(0, int(y0 / scale_y) // TILE_SIZE)
+        tx1 = min((width - 1) // TILE_SIZE, int(math.ceil(x1 / scale_x)) // TILE_SIZE)
+        ty1 = min((height - 1) // TILE_SIZE, int(math.ceil(y1 / scale_y)) // TILE_SIZE)
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                left, top = tx * TILE_SIZE, ty * TILE_SIZE
+                right, bottom = min(width, left + TILE_SIZE), min(height, top + TILE_SIZE)
+                yield tx, ty, (left * scale_x, top * scale_y, (right - left) * scale_x, (bottom - top) * scale_y)
+
+    def tile(self, index, tx, ty):
+        """Geeft tegel (tx, ty) van niveau index als view op het niveau (geen kopie)."""
+        left, top = tx * TILE_SIZE, ty * TILE_SIZE
+        return self.level(index)[top:top + TILE_SIZE, left:left + TILE_SIZE]
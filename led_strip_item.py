@@ -0,0 +1,110 @@
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph.functions as fn
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+
+
+# Kleuren worden per kanaal op 5 bits gekwantiseerd (max. afwijking 7/255).
+# Zo blijft het aantal kleurgroepen per lijn begrensd, ook op strips met
+# tienduizenden LEDs.
+QUANT_BITS = 5
+_QUANT_SHIFT = 8 - QUANT_BITS
+_QUANT_MASK = (1 << QUANT_BITS) - 1
+
+# Gedeelde cache van pennen per (gekwantiseerde kleur, puntgrootte) voor alle lijnen.
+_pen_cache = {}
+
+
+class LEDStripItem(pg.GraphicsObject):
+    """
+    Tekent de LEDs van één effectlijn als ronde punten, rechtstreeks vanuit een
+    NumPy kleurbuffer.
+
+    In tegenstelling tot ScatterPlotItem met een brush per punt worden er per
+    frame geen QBrush/QColor objecten per LED gemaakt: de kleuren worden als
+    één (N, 3) uint8 array aangeleverd, gegroepeerd op gekwantiseerde kleur en
+    per groep met één drawPoints aanroep getekend. Het aantal allocaties per
+    frame hangt daardoor af van het aantal kleurgroepen, niet van het aantal LEDs.
+    """
+    def __init__(self, size=5, parent=None):
+        super().__init__(parent)
+        self._size = size
+        self._points = np.zeros((0, 2), dtype=np.float64)
+        self._colors = np.zeros((0, 3), dtype=np.uint8)
+        self._polygon = QPolygonF()
+        self._polygon_view = np.zeros((0, 2), dtype=np.float64)
+        self._bounds = QRectF()
+
+    @property
+    def points(self):
+        return self._points
+
+    def setPoints(self, points):
+        """Stelt de LED-posities in als (N, 2) array in data-coördinaten."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.prepareGeometryChange()
+        self._points = points
+        if len(points) != len(self._polygon_view):
+            self._polygon = fn.create_qpolygonf(len(points))
+            self._polygon_view = fn.ndarray_from_qpolygonf(self._polygon)
+            self._colors = np.zeros((len(points), 3), dtype=np.uint8)
+        if len(points):
+            x_min, y_min = points.min(axis=0)
+            x_max, y_max = points.max(axis=0)
+            self._bounds = QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
+        else:
+            self._bounds = QRectF()
+        self.update()
+
+    def setColors(self, rgb):
+        """Kopieert een (N, 3) uint8 kleurbuffer naar het item en plant een herteken."""
+        np.copyto(self._colors, rgb[:len(self._colors)], casting='unsafe')
+        self.update()
+
+    def setSize(self, size):
+        if size != self._size:
+            self.prepareGeometryChange()
+            self._size = size
+            self.update()
+
+    def _pen_for_key(self, key):
+        pen = _pen_cache.get((key, self._size))
+        if pen is None:
+            # Terug naar 8 bits: het midden van de kwantisatiestap, met 0 en 255 exact.
+            r, g, b = (key >> (2 * QUANT_BITS)) & _QUANT_MASK, (key >> QUANT_BITS) & _QUANT_MASK, key & _QUANT_MASK
+            r, g, b = ((c << _QUANT_SHIFT) | (c >> (QUANT_BITS - _QUANT_SHIFT)) for c in (r, g, b))
+            pen = QPen(QColor(r, g, b))
+            pen.setWidthF(self._size)
+            pen.setCapStyle(Qt.RoundCap)
+            pen.setCosmetic(True)
+            _pen_cache[(key, self._size)] = pen
+        return pen
+
+    def boundingRect(self):
+        if not len(self._points):
+            return QRectF()
+        # De punten worden in pixels getekend; vergroot de grenzen met de puntgrootte.
+        px, py = self.pixelSize() if self.getViewBox() is not None else (None, None)
+        if px is None:
+            return QRectF(self._bounds)
+        pad_x, pad_y = px * self._size, py * self._size
+        return self._bounds.adjusted(-pad_x, -pad_y, pad_x, pad_y)
+
+    def paint(self, p, *args):
+        n = len(self._points)
+        if n == 0:
+            return
+        colors = self._colors.astype(np.uint32)
+        keys = ((colors[:, 0] >> _QUANT_SHIFT) << (2 * QUANT_BITS)) | ((colors[:, 1] >> _QUANT_SHIFT) << QUANT_BITS) | (colors[:, 2] >> _QUANT_SHIFT)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        self._polygon_view[:] = self._points[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], n]
+
+        p.setRenderHint(QPainter.Antialiasing, True)
+        single_group = len(starts) == 1
+        for start, end, key in zip(starts.tolist(), ends.tolist(), sorted_keys[starts].tolist()):
+            p.setPen(self._pen_for_key(key))
+            p.drawPoints(self._polygon if single_group else self._polygon.mid(start, end - start))
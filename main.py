@@ -1,15 +1,21 @@
+import multiprocessing
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QIcon
 
-# Importeer de hoofd-class van de applicatie uit visualizer.py
-from visualizer import LEDVisualizer
+# Met deze vlag worden opstarttijden en de traagste imports naar stderr geschreven
+# zodra het eerste venster getoond is (zie startup_timing.py).
+STARTUP_TIMING_FLAG = "--startup-timing"
 
-def main():
+
+def main(startup_timer=None):
     """
     Hoofdfunctie om de applicatie te initialiseren en te starten.
     """
+    # Qt en de visualizer worden hier pas geïmporteerd, zodat de timer ze meet en
+    # exportprocessen (die dit bestand opnieuw importeren) ze niet hoeven te laden.
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt, QTimer
+    from PyQt5.QtGui import QIcon
+
     # Schakel High DPI scaling in voor betere weergave op hoge resolutie schermen
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -18,19 +24,39 @@ def main():
 
     # Maak de applicatie-instantie
     app = QApplication(sys.argv)
-    
+
     # Probeer het icoon in te stellen (optioneel)
     try:
         app.setWindowIcon(QIcon("logo.ico"))
     except Exception as e:
         print(f"Kon logo.ico niet laden: {e}")
 
+    # Importeer de hoofd-class van de applicatie uit visualizer.py
+    from visualizer import LEDVisualizer
+    if startup_timer is not None:
+        startup_timer.mark("visualizer geïmporteerd")
+
     # Maak en toon het hoofdvenster
     window = LEDVisualizer()
     window.showMaximized() # Start gemaximaliseerd voor een betere ervaring
-    
+    if startup_timer is not None:
+        startup_timer.mark("venster gemaakt")
+
+        def first_window():
+            startup_timer.mark("eerste venster getoond (event loop gestart)")
+            startup_timer.report()
+        QTimer.singleShot(0, first_window)
+
     # Start de event loop
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
-    main()
+    # Nodig voor de exportprocessen in de bevroren (cx_Freeze) Windows-build.
+    multiprocessing.freeze_support()
+    startup_timer = None
+    if STARTUP_TIMING_FLAG in sys.argv:
+        sys.argv.remove(STARTUP_TIMING_FLAG)
+        from startup_timing import StartupTimer
+        startup_timer = StartupTimer()
+        startup_timer.install()
+    main(startup_timer)
@@ -0,0 +1,260 @@
+"""
+Samenvoegen van lijnen (polylines) via hun eindpunten.
+
+Twee fasen, net als de oorspronkelijke merge_lines:
+
+1. Greedy chaining: begin bij de eerste nog vrije lijn en plak steeds de
+   lijn met het dichtstbijzijnde eindpunt aan het begin of eind van de keten,
+   zolang dat eindpunt binnen threshold ligt. Daarna de volgende vrije lijn.
+   Bij gelijke afstand wint de eerste lijn, in de volgorde eind->begin,
+   eind->eind, begin->eind, begin->begin.
+2. Forced chaining (optioneel): verbind steeds het dichtstbijzijnde paar
+   eindpunten van twee verschillende ketens, tot er één keten over is.
+
+Fase 1 zoekt in een uniform raster van eindpunten, in ringen van cellen rond
+elk ketenuiteinde tot niets dichterbij meer kan liggen. Meestal ligt de
+volgende lijn vlakbij en blijft het bij een paar cellen. Fase 2
+houdt per eindpunt zijn dichtstbijzijnde eindpunt van een andere keten bij in
+een heap. Eindpunten bewegen nooit: een samenvoeging maakt alleen twee
+eindpunten inwendig en twee ketens één, dus een heap-item dat ongeldig is
+geworden wordt bij het uitnemen opnieuw berekend.
+
+Ketens worden bijgehouden als deques van (lijn, omgekeerd) stukken; de punten
+worden pas aan het eind aan elkaar gezet.
+"""
+import heapq
+from collections import defaultdict, deque
+
+import numpy as np
+
+from utils import distance
+
+DEFAULT_MERGE_DISTANCE = 150 # Pixels; eindpunten die dichter bij elkaar liggen worden direct verbonden
+_CELLS_PER_THRESHOLD = 8 # Celgrootte van het raster in fase 1 is threshold / dit getal
+
+# Verbindingen in fase 1: (uiteinde van de keten, eindpunt van de andere lijn) in volgorde van voorkeur.
+_END_TO_START, _END_TO_END, _START_TO_END, _START_TO_START = range(4)
+# Verbindingen in fase 2: (is eind van de eerste keten, is eind van de tweede keten) -> voorkeur.
+_FORCED_CONNECTIONS = {(True, False): 0, (True, True): 1, (False, False): 2, (False, True): 3}
+
+
+class _Chain:
+    __slots__ = ('pieces', 'start', 'end')
+
+    def __init__(self, line_index, start, end):
+        self.pieces = deque([(line_index, False)])
+        self.start = start
+        self.end = end
+
+    def append(self, line_index, reverse, new_end):
+        self.pieces.append((line_index, reverse))
+        self.end = new_end
+
+    def prepend(self, line_index, reverse, new_start):
+        self.pieces.appendleft((line_index, reverse))
+        self.start = new_start
+
+    def extend(self, other, reverse):
+        """Plakt een andere keten achter deze, eventueel omgekeerd."""
+        if reverse:
+            self.pieces.extend((line_index, not flipped) for line_index, flipped in reversed(other.pieces))
+            self.end = other.start
+        else:
+            self.pieces.extend(other.pieces)
+            self.end = other.end
+
+    def extend_left(self, other, reverse):
+        """Plakt een andere keten vóór deze, eventueel omgekeerd."""
+        if reverse:
+            self.pieces.extendleft((line_index, not flipped) for line_index, flipped in other.pieces)
+            self.start = other.end
+        else:
+            self.pieces.extendleft((line_index, flipped) for line_index, flipped in reversed(other.pieces))
+            self.start = other.start
+
+    def points(self, polylines):
+        result = []
+        for line_index, reverse in self.pieces:
+            result.extend(reversed(polylines[line_index]) if reverse else polylines[line_index])
+        return result
+
+
+def _greedy_chains(polylines, threshold):
+    """Fase 1. Geeft de ketens in de volgorde van hun eerste lijn."""
+    count = len(polylines)
+    starts = [tuple(line[0]) for line in polylines]
+    ends = [tuple(line[-1]) for line in polylines]
+    free = [True] * count
+
+    grid = defaultdict(list) # cel -> [(lijn, is_eindpunt)] van de nog vrije lijnen
+    cell_size = threshold / _CELLS_PER_THRESHOLD if threshold > 0 else 1.0
+    def cell_of(point):
+        return int(point[0] // cell_size), int(point[1] // cell_size)
+    if threshold > 0:
+        for line_index in range(count):
+            grid[cell_of(starts[line_index])].append((line_index, False))
+            grid[cell_of(ends[line_index])].append((line_index, True))
+
+    def take(line_index):
+        free[line_index] = False
+        if threshold > 0:
+            grid[cell_of(starts[line_index])].remove((line_index, False))
+            grid[cell_of(ends[line_index])].remove((line_index, True))
+
+    def nearest_to(point, at_end):
+        """
+        Beste (afstand, lijn, verbinding) binnen threshold rond één ketenuiteinde, of None.
+        Zoekt in ringen van cellen; een cel in ring r ligt minstens (r - 1) cellen
+        ver weg, dus zodra de beste afstand daaronder ligt kan er niets beters of
+        even goeds meer komen.
+        """
+        best = None
+        cx, cy = cell_of(point)
+        ring = 0
+        while True:
+            reach = (ring - 1) * cell_size
+            if reach >= threshold or (best is not None and best[0] < reach):
+                return best
+            if ring == 0:
+                cells = ((cx, cy),)
+            else:
+                cells = [(cx + dx, cy + dy) for dx in range(-ring, ring + 1) for dy in (-ring, ring)]
+                cells += [(cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(-ring + 1, ring)]
+            for cell in cells:
+                for line_index, is_end in grid.get(cell, ()):
+                    dist = distance(point, ends[line_index] if is_end else starts[line_index])
+                    if dist >= threshold:
+                        continue
+                    if at_end:
+                        connection = _END_TO_END if is_end else _END_TO_START
+                    else:
+                        connection = _START_TO_END if is_end else _START_TO_START
+                    key = (dist, line_index, connection)
+                    if best is None or key < best:
+                        best = key
+            ring += 1
+
+    chains = []
+    for first in range(count):
+        if not free[first]:
+            continue
+        take(first)
+        chain = _Chain(first, starts[first], ends[first])
+        # Vrije lijnen worden alleen minder: de beste buur van een uiteinde blijft de beste
+        # tot die lijn genomen wordt of het uiteinde verandert, en zonder buur blijft het zo.
+        end_match = nearest_to(chain.end, True) if threshold > 0 else None
+        start_match = nearest_to(chain.start, False) if threshold > 0 else None
+        while end_match is not None or start_match is not None:
+            _, line_index, connection = min(match for match in (end_match, start_match) if match)
+            take(line_index)
+            if connection == _END_TO_START:
+                chain.append(line_index, False, ends[line_index])
+            elif connection == _END_TO_END:
+                chain.append(line_index, True, starts[line_index])
+            elif connection == _START_TO_END:
+                chain.prepend(line_index, False, starts[line_index])
+            else:
+                chain.prepend(line_index, True, ends[line_index])
+            if connection in (_END_TO_START, _END_TO_END) or (end_match is not None and end_match[1] == line_index):
+                end_match = nearest_to(chain.end, True)
+            if connection in (_START_TO_END, _START_TO_START) or (start_match is not None and start_match[1] == line_index):
+                start_match = nearest_to(chain.start, False)
+        chains.append((first, chain))
+    return chains
+
+
+def _force_chains(chains):
+    """
+    Fase 2. Verbindt steeds het dichtstbijzijnde paar eindpunten van twee ketens.
+    De keten die eerder in de lijst staat neemt de andere op. Bij gelijke afstand
+    wint het paar met de eerste ketens, in de volgorde eind->begin, eind->eind,
+    begin->begin, begin->eind (zoals de oorspronkelijke merge_lines).
+    """
+    count = len(chains)
+    if count < 2:
+        return chains
+    # Eindpunt 2c is het begin, 2c + 1 het eind van keten c. Elke keten heeft
+    # precies twee levende eindpunten; partner wijst van het ene naar het andere.
+    coords = np.array([point for _, chain in chains for point in (chain.start, chain.end)], dtype=np.float64)
+    alive = np.ones(2 * count, dtype=bool)
+    owner = np.repeat(np.arange(count), 2) # keten waar elk levend eindpunt bij hoort
+    is_end = np.tile([False, True], count) # of het eindpunt nu het eind van zijn keten is
+    partner = np.arange(2 * count) ^ 1
+    merged_chains = dict(enumerate(chain for _, chain in chains))
+
+    def pair_key(endpoint, other):
+        """Volgorde bij gelijke afstand: (eerste keten, tweede keten, soort verbinding)."""
+        if owner[endpoint] > owner[other]:
+            endpoint, other = other, endpoint
+        connection = _FORCED_CONNECTIONS[bool(is_end[endpoint]), bool(is_end[other])]
+        return int(owner[endpoint]), int(owner[other]), connection
+
+    xs, ys = coords[:, 0], coords[:, 1]
+    live = np.arange(2 * count) # levende eindpunten, af en toe opgeschoond
+
+    def nearest(endpoint):
+        """Heap-item met het beste paar voor dit eindpunt."""
+        nonlocal live
+        if len(live) > 2 * remaining + 64:
+            live = np.flatnonzero(alive)
+        dx, dy = xs[live] - xs[endpoint], ys[live] - ys[endpoint]
+        dist = np.sqrt(dx * dx + dy * dy)
+        dist[~alive[live] | (owner[live] == owner[endpoint])] = np.inf
+        best = dist.min()
+        key, other = min((pair_key(endpoint, other), int(other)) for other in live[dist == best])
+        return float(best), key, endpoint, other
+
+    # Elk geldig paar heeft altijd een heap-item met een waarde die niet groter is:
+    # dan is het kleinste item, als het nog klopt, het beste paar.
+    remaining = count
+    heap = [nearest(endpoint) for endpoint in range(2 * count)]
+    heapq.heapify(heap)
+
+    while remaining > 1:
+        dist, key, endpoint, other = heapq.heappop(heap)
+        if not alive[endpoint]:
+            continue
+        if not alive[other] or owner[other] == owner[endpoint] or pair_key(endpoint, other) != key:
+            # Buur is inmiddels inwendig, hoort bij dezelfde keten of de ketens zijn hernummerd.
+            heapq.heappush(heap, nearest(endpoint))
+            continue
+
+        first, second = (endpoint, other) if owner[endpoint] < owner[other] else (other, endpoint)
+        keep, absorb = int(owner[first]), int(owner[second])
+        kept, absorbed = merged_chains[keep], merged_chains.pop(absorb)
+        kept_other, absorbed_other = int(partner[first]), int(partner[second])
+        if is_end[first]:
+            kept.extend(absorbed, reverse=bool(is_end[second]))
+            is_end[absorbed_other], is_end[kept_other] = True, False
+        else:
+            kept.extend_left(absorbed, reverse=not is_end[second])
+            is_end[absorbed_other], is_end[kept_other] = False, True
+        alive[first] = alive[second] = False
+        owner[absorbed_other] = keep
+        partner[kept_other], partner[absorbed_other] = absorbed_other, kept_other
+        remaining -= 1
+        # De paren van de overgebleven eindpunten hebben een nieuwe volgorde gekregen.
+        if remaining > 1:
+            heapq.heappush(heap, nearest(kept_other))
+            heapq.heappush(heap, nearest(absorbed_other))
+
+    return [(chains[index][0], chain) for index, chain in sorted(merged_chains.items())]
+
+
+def merge_polylines(polylines, threshold=DEFAULT_MERGE_DISTANCE, force=True):
+    """
+    Voegt lijnen samen via hun eindpunten.
+
+    :param polylines: reeks lijnen, elk een reeks (x, y) punten.
+    :param threshold: eindpunten op minder dan deze afstand worden direct verbonden.
+    :param force: verbind daarna de overgebleven ketens tot één lijn.
+    :return: lijst van (bron, punten): bron is de index van de lijn waarmee de
+             keten begon (handig om diens eigenschappen over te nemen), punten
+             de samengevoegde lijst met punten. Lege lijnen worden overgeslagen.
+    """
+    sources = [index for index, line in enumerate(polylines) if len(line) > 0]
+    lines = [list(polylines[index]) for index in sources]
+    chains = _greedy_chains(lines, threshold)
+    if force:
+        chains = _force_chains(chains)
+    return [(sources[first], chain.points(lines)) for first, chain in chains]
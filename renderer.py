@@ -0,0 +1,365 @@
+"""
+Headless compositor voor de export.
+
+Rastert frames rechtstreeks in NumPy arrays, zonder Qt widgets: de achtergrond,
+per effectlijn de gloed (een halftransparante dikke lijn in de gemiddelde kleur)
+en de LED-stippen in hun eigen kleur. Alles wat per lijn vaststaat (LED-posities,
+de gloedmasker, de stip-stempel) wordt één keer voorbereid; per frame wordt
+alleen het effect een stap verder gezet en worden de kleuren ingevuld.
+
+Coördinaten zijn die van de plot (y omhoog, 0..hoogte); rij 0 van het frame is
+de bovenkant van de afbeelding, net als in de live weergave.
+
+Exportframes worden op vaste tijden van een simulatieklok gerenderd (frame i
+op (i + 1) * delta_time, zie effects/clock.py). Analytische effecten rekenen
+het beeld direct uit die tijd uit; stochastische effecten (RNG per actie)
+spoelen in vaste stappen door. Daardoor hangt een frame niet af van de
+frames ervoor en kan de export over meerdere processen verdeeld worden: elk
+proces bouwt dezelfde scène op en rendert zijn eigen blok. render_export_frames
+levert de frames weer op volgorde.
+"""
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from actions import create_effect, resample_for_leds
+from effects.clock import SimulationClock
+
+GLOW_ALPHA = 70 # Gelijk aan de alpha van de gloedpen in de live weergave
+LOOP_TOLERANCE_FRAMES = 0.25 # Toegestane afwijking per effectperiode bij een naadloze loop
+EXPORT_MEMORY_BUDGET = 512 * 1024 * 1024 # Maximaal aantal bytes aan frames dat de export tegelijk vasthoudt
+_SUBPIXEL_SHIFT = 4 # cv2 fixed-point coördinaten (1/16 pixel)
+
+
+def _disc_stamp(diameter):
+    """Geeft (dy, dx, alpha) van een anti-aliased schijf met de gegeven diameter in pixels."""
+    radius = diameter / 2.0
+    reach = int(np.ceil(radius))
+    offsets = np.arange(-reach, reach + 1)
+    dy, dx = np.meshgrid(offsets, offsets, indexing='ij')
+    alpha = np.clip(radius + 0.5 - np.hypot(dy, dx), 0.0, 1.0)
+    keep = alpha > 0
+    return dy[keep], dx[keep], alpha[keep].astype(np.float32), reach
+
+
+class _LineLayer:
+    """Een vaste, anti-aliased lijn (gloed of gewone lijn) als alphamasker op een ROI."""
+    def __init__(self, canvas_xy, thickness, canvas_shape, opacity):
+        pad = thickness + 2
+        height, width = canvas_shape[:2]
+        x0 = max(0, int(np.floor(canvas_xy[:, 0].min())) - pad)
+        y0 = max(0, int(np.floor(canvas_xy[:, 1].min())) - pad)
+        x1 = min(width, int(np.ceil(canvas_xy[:, 0].max())) + pad + 1)
+        y1 = min(height, int(np.ceil(canvas_xy[:, 1].max())) + pad + 1)
+        self.empty = x0 >= x1 or y0 >= y1
+        if self.empty:
+            return
+        self.roi = (slice(y0, y1), slice(x0, x1))
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        pts = np.round((canvas_xy - (x0, y0)) * (1 << _SUBPIXEL_SHIFT)).astype(np.int32)
+        if len(pts) == 1:
+            cv2.circle(mask, tuple(pts[0]), max(1, thickness // 2) << _SUBPIXEL_SHIFT, 255, -1, cv2.LINE_AA, _SUBPIXEL_SHIFT)
+        else:
+            cv2.polylines(mask, [pts.reshape(-1, 1, 2)], False, 255, thickness, cv2.LINE_AA, _SUBPIXEL_SHIFT)
+        self.alpha = (mask.astype(np.float32) * (opacity / (255.0 * 255.0)))[..., None]
+
+    def blend(self, canvas, color):
+        if self.empty:
+            return
+        roi = canvas[self.roi]
+        blended = roi + (np.asarray(color, dtype=np.float32) - roi) * self.alpha
+        np.copyto(roi, blended, casting='unsafe')
+
+
+class _EffectLayer:
+    """Gloed plus LED-stippen van één effectlijn."""
+    def __init__(self, renderer, points, led_points, effect):
+        self.effect = effect
+        glow_width = max(1, int(round(renderer.line_width * 2)))
+        self.glow = _LineLayer(renderer.to_canvas(points), glow_width, renderer.canvas.shape, GLOW_ALPHA)
+
+        led_xy = renderer.to_canvas(led_points)
+        self.frame_buffer = np.zeros((len(led_xy), 4), dtype=np.uint8)
+        self.display_rgb = np.zeros((len(led_xy), 3), dtype=np.uint8)
+        effect.num_leds = len(led_xy)
+
+        # Alleen LEDs waarvan de stempel volledig op het (opgevulde) canvas valt.
+        centers = np.round(led_xy).astype(np.int64)
+        reach = renderer.dot_reach
+        height, width = renderer.canvas.shape[:2]
+        self.visible = np.flatnonzero(
+            (centers[:, 0] >= reach) & (centers[:, 0] < width - reach) &
+            (centers[:, 1] >= reach) & (centers[:, 1] < height - reach)
+        )
+        self.cx = centers[self.visible, 0]
+        self.cy = centers[self.visible, 1]
+
+    def render(self, renderer, delta_time, t=None):
+        if t is None:
+            self.effect.render_into(self.frame_buffer, delta_time)
+        else:
+            self.effect.render_at(self.frame_buffer, t, delta_time)
+        # RGBW -> RGB voor weergave: wit telt op bij elk kanaal.
+        np.minimum(self.frame_buffer[:, :3].astype(np.uint16) + self.frame_buffer[:, 3:4], 255, out=self.display_rgb, casting='unsafe')
+
+        if len(self.display_rgb):
+            self.glow.blend(renderer.canvas, self.display_rgb.mean(axis=0).astype(np.int32))
+
+        if not len(self.visible):
+            return
+        colors = self.display_rgb[self.visible].astype(np.float32)
+        canvas = renderer.canvas
+        for dy, dx, alpha in renderer.dot_stamp:
+            ys, xs = self.cy + dy, self.cx + dx
+            if alpha >= 1.0:
+                canvas[ys, xs] = colors
+            else:
+                under = canvas[ys, xs]
+                canvas[ys, xs] = under + (colors - under) * alpha
+
+
+class OffscreenRenderer:
+    """
+    Rendert frames van de visualisatie naar RGB uint8 arrays zonder Qt.
+
+    :param background: (H, W, 3|4) uint8 afbeelding (rij 0 = bovenkant), of None.
+    :param line_width: LED-grootte in pixels van de afbeelding (zoals de slider "LED Grootte").
+    :param size: (breedte, hoogte) van de uitvoer. Met een achtergrond wordt die
+                 één keer naar deze grootte geschaald en schalen alle posities en
+                 lijndiktes mee; zonder achtergrond is size verplicht.
+    :param background_brightness: factor 0-1 voor de achtergrond (de slider
+                 "Achtergrond donkerte"); wordt na het schalen toegepast.
+    """
+    def __init__(self, background, line_width, size=None, background_brightness=1.0):
+        if background is not None:
+            source_height, source_width = background.shape[:2]
+        else:
+            source_width, source_height = size
+        width, height = size if size is not None else (source_width, source_height)
+        self.width, self.height = width, height
+        self.source_height = source_height
+        self.scale_x = width / source_width
+        self.scale_y = height / source_height
+        self.line_width = max(1.0, line_width * (self.scale_x + self.scale_y) / 2.0)
+
+        dy, dx, alpha, reach = _disc_stamp(self.line_width)
+        self.dot_stamp = list(zip(dy.tolist(), dx.tolist(), alpha.tolist()))
+        self.dot_reach = reach
+
+        # Het canvas krijgt een rand zodat stippen langs de randen niet per pixel
+        # gecontroleerd hoeven te worden; de rand valt buiten het uitvoerframe.
+        self.pad = reach + 1
+        self.canvas = np.zeros((height + 2 * self.pad, width + 2 * self.pad, 3), dtype=np.uint8)
+        self.frame = self.canvas[self.pad:self.pad + height, self.pad:self.pad + width]
+        self.background = np.zeros((height, width, 3), dtype=np.uint8)
+        if background is not None:
+            if (source_width, source_height) != (width, height):
+                background = cv2.resize(background, (width, height), interpolation=cv2.INTER_AREA)
+            if background.shape[2] == 4:
+                # Composiet op zwart, zoals in de export via de widget.
+                alpha = background[..., 3:4].astype(np.uint16)
+                self.background[:] = (background[..., :3] * alpha // 255).astype(np.uint8)
+            else:
+                self.background[:] = background[..., :3]
+            if background_brightness < 1.0:
+                # In-place op de uitvoergrootte, zonder float-kopie van de afbeelding.
+                cv2.convertScaleAbs(self.background, dst=self.background, alpha=max(0.0, background_brightness))
+        self.layers = []
+
+    def to_canvas(self, points_xy):
+        """Zet plotcoördinaten (y omhoog) om naar canvas-pixels (rij omlaag, geschaald, incl. rand)."""
+        points_xy = np.asarray(points_xy, dtype=np.float64).reshape(-1, 2)
+        return np.column_stack((
+            points_xy[:, 0] * self.scale_x + self.pad,
+            (self.source_height - points_xy[:, 1]) * self.scale_y + self.pad,
+        ))
+
+    def add_effect_line(self, points, led_points, effect):
+        """
+        Voegt een effectlijn toe. led_points zijn de geresamplede LED-posities
+        (zie actions.resample_for_leds); effect is een Effects instantie die per
+        frame een stap zet.
+        """
+        if len(points) < 1:
+            return
+        self.layers.append(_EffectLayer(self, points, led_points, effect))
+
+    def add_plain_line(self, points, color):
+        """Voegt een gewone getekende lijn toe (modus 'Vrij Tekenen'/'Lijn Tekenen')."""
+        if len(points) < 1:
+            return
+        layer = _LineLayer(self.to_canvas(points), max(1, int(round(self.line_width))), self.canvas.shape, 255)
+        self.layers.append((layer, tuple(color)))
+
+    def render_frame(self, delta_time):
+        """
+        Zet alle effecten delta_time seconden verder en rendert het frame.
+        Geeft een (H, W, 3) RGB view terug die bij de volgende aanroep overschreven wordt.
+        """
+        return self._render(delta_time, None)
+
+    def render_frame_at(self, t, step):
+        """
+        Rendert het frame op simulatietijd t (zie Effects.render_at): hetzelfde
+        beeld als na t / step keer render_frame(step), in willekeurige volgorde.
+        """
+        return self._render(step, t)
+
+    def _render(self, delta_time, t):
+        np.copyto(self.frame, self.background)
+        for layer in self.layers:
+            if isinstance(layer, tuple):
+                line, color = layer
+                line.blend(self.canvas, color)
+            else:
+                layer.render(self, delta_time, t)
+        return self.frame
+
+
+def _effect_for_action(action, default_effect_name, default_color, default_brightness, default_speed):
+    """Geeft (led_points, effect) voor een effectactie, met een nieuwe, geseede effectinstantie."""
+    led_points = resample_for_leds(action["points"])
+    effect = create_effect(action, len(led_points), default_effect_name, default_color, default_brightness, default_speed)
+    return led_points, effect
+
+
+def _is_plain_line(action):
+    return action.get("mode", "Effect") in ("Vrij Tekenen", "Lijn Tekenen")
+
+
+def build_renderer(background, line_width, actions, default_effect_name, default_color, default_brightness, default_speed, size=None, background_brightness=1.0):
+    """
+    Bouwt een OffscreenRenderer voor een lijst acties. Elke effectlijn krijgt een
+    nieuwe, geseede effectinstantie die vanaf een verse staat begint. Het aantal
+    LEDs per lijn hangt af van de lijn in de afbeelding, niet van de uitvoergrootte.
+    """
+    renderer = OffscreenRenderer(background, line_width, size, background_brightness)
+    for action in actions:
+        pts = action["points"]
+        if len(pts) < 1:
+            continue
+        if _is_plain_line(action):
+            renderer.add_plain_line(pts, action["color"])
+        else:
+            led_points, effect = _effect_for_action(action, default_effect_name, default_color, default_brightness, default_speed)
+            renderer.add_effect_line(pts, led_points, effect)
+    return renderer
+
+
+def loop_length_frames(periods, fps, max_frames, tolerance=LOOP_TOLERANCE_FRAMES):
+    """
+    Kleinste aantal frames waarna alle periodes (in seconden, zie Effects.period)
+    tegelijk rond zijn: het kleinste gemeenschappelijke veelvoud in frames. Een
+    periode hoeft geen geheel aantal frames te zijn; een afwijking tot tolerance
+    frames per periode wordt geaccepteerd.
+
+    Geeft None als een effect niet periodiek is of als er binnen max_frames geen
+    gemeenschappelijk veelvoud is.
+    """
+    if any(period is None for period in periods):
+        return None
+    frame_periods = np.array([period * fps for period in periods if period > 0], dtype=np.float64)
+    if not len(frame_periods):
+        return 1
+    lengths = np.arange(1, max_frames + 1, dtype=np.float64)[:, None]
+    cycles = np.maximum(1.0, np.round(lengths / frame_periods))
+    fits = np.all(np.abs(lengths - cycles * frame_periods) <= tolerance, axis=1)
+    hits = np.flatnonzero(fits)
+    return int(hits[0]) + 1 if len(hits) else None
+
+
+def seamless_loop_frames(scene, fps, max_frames, min_frames=1):
+    """
+    Aantal frames voor een naadloze loop van een scène (zie build_renderer), of
+    None als die niet bestaat. Korte loops worden herhaald tot minstens min_frames.
+    """
+    defaults = {key: scene[key] for key in ('default_effect_name', 'default_color', 'default_brightness', 'default_speed')}
+    periods = [
+        _effect_for_action(action, **defaults)[1].period()
+        for action in scene['actions'] if len(action["points"]) > 0 and not _is_plain_line(action)
+    ]
+    frames = loop_length_frames(periods, fps, max_frames)
+    if frames is None:
+        return None
+    return frames * max(1, math.ceil(min_frames / frames))
+
+
+# Scène van het huidige exportproces, gezet door _init_export_worker.
+_worker_scene = None
+
+
+def _init_export_worker(scene):
+    global _worker_scene
+    _worker_scene = scene
+
+
+def _render_export_chunk(start, stop, delta_time):
+    """Rendert de frames start..stop-1 als (n, H, W, 3) RGB array."""
+    renderer = build_renderer(**_worker_scene)
+    clock = SimulationClock(delta_time)
+    frames = np.empty((stop - start, renderer.height, renderer.width, 3), dtype=np.uint8)
+    for i in range(stop - start):
+        frames[i] = renderer.render_frame_at(clock.frame_time(start + i), delta_time)
+    return frames
+
+
+def _frame_bytes(scene):
+    """Grootte in bytes van één (H, W, 3) exportframe van deze scène."""
+    if scene.get('size') is not None:
+        width, height = scene['size']
+    else:
+        height, width = scene['background'].shape[:2]
+    return width * height * 3
+
+
+def render_export_frames(scene, total_frames, delta_time, workers=None, chunk_frames=30, memory_budget=EXPORT_MEMORY_BUDGET):
+    """
+    Generator die de exportframes op volgorde oplevert als (H, W, 3) RGB arrays.
+    Een opgeleverd frame is alleen geldig tot het volgende frame gevraagd wordt.
+
+    :param scene: keyword-argumenten voor build_renderer; moet picklebaar zijn.
+    :param workers: aantal processen; standaard het aantal CPU's. Bij 1 wordt
+                    alles in dit proces gerenderd.
+    :param chunk_frames: maximale blokgrootte per taak.
+    :param memory_budget: maximaal aantal bytes aan frames in dit proces. Blokgrootte
+                          en het aantal blokken dat tegelijk uitstaat (hooguit
+                          workers + 1) worden zo gekozen dat de frames erin passen;
+                          bij grote frames wordt het één frame per blok.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, total_frames))
+    if workers == 1:
+        renderer = build_renderer(**scene)
+        clock = SimulationClock(delta_time)
+        for index in range(total_frames):
+            yield renderer.render_frame_at(clock.frame_time(index), delta_time)
+        return
+
+    # Frames die tegelijk in dit proces mogen bestaan; minstens één blok van één frame.
+    max_frames = max(1, memory_budget // _frame_bytes(scene))
+    chunk = max(1, min(chunk_frames, math.ceil(total_frames / workers), max_frames // (workers + 1)))
+    in_flight = max(1, min(workers + 1, max_frames // chunk)) # Blokken die uitstaan, inclusief het blok dat opgeleverd wordt
+    bounds = [(start, min(start + chunk, total_frames)) for start in range(0, total_frames, chunk)]
+    # 'spawn' werkt op elk platform hetzelfde en erft geen Qt-staat van de GUI.
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_export_worker,
+        initargs=(scene,),
+    )
+    pending = deque()
+    try:
+        next_chunk = 0
+        while next_chunk < len(bounds) or pending:
+            while next_chunk < len(bounds) and len(pending) < in_flight:
+                pending.append(executor.submit(_render_export_chunk, *bounds[next_chunk], delta_time))
+                next_chunk += 1
+            yield from pending.popleft().result()
+    finally:
+        # Ook bij annuleren (generator.close()) wachtende blokken niet meer renderen.
+        executor.shutdown(wait=False, cancel_futures=True)
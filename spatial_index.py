@@ -0,0 +1,170 @@
+"""
+Ruimtelijke index voor hit-testing van lijnen in "Lijn Bewerken" modus.
+
+Een uniform raster van vierkante cellen. Elk segment van elke actie wordt
+geregistreerd in de cellen die de bounding boxes van zijn stukken (van
+hooguit één cel lang) raken; een actie met één punt krijgt een segment van
+lengte nul. Een klik bekijkt alleen de cellen
+binnen de kliktolerantie en rekent de afstanden tot die kandidaten in één
+keer met NumPy uit.
+
+De index wordt lui bijgewerkt: bij elke hit_test worden alleen acties met een
+nieuwe geometry_version (zie actions.py) opnieuw geïndexeerd.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from actions import GEOMETRY_VERSION
+from geometry import as_polyline
+
+DEFAULT_CELL_SIZE = 40.0 # Pixels; minstens twee keer de kliktolerantie houdt een query op 2x2 cellen
+
+
+class _IndexedAction:
+    __slots__ = ('version', 'cells')
+
+    def __init__(self, version, cells):
+        self.version = version
+        self.cells = cells # cellen waarin de actie geregistreerd is
+
+
+class ActionHitIndex:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        self._actions = {} # action_id -> _IndexedAction
+        # cel -> {action_id: (segmentindices, beginpunten, eindpunten)}; de punten
+        # staan er al bij zodat een query geen indexering per actie hoeft te doen.
+        self._grid = defaultdict(dict)
+        self._positions = {} # action_id -> index in de lijst van de laatste sync
+
+    def clear(self):
+        self._actions.clear()
+        self._grid.clear()
+        self._positions.clear()
+
+    def discard(self, action_id):
+        """Verwijdert een actie uit de index."""
+        indexed = self._actions.pop(action_id, None)
+        if indexed is None:
+            return
+        for cell in indexed.cells:
+            bucket = self._grid.get(cell)
+            if bucket is not None:
+                bucket.pop(action_id, None)
+                if not bucket:
+                    del self._grid[cell]
+
+    def _index_action(self, action_id, version, points):
+        self.discard(action_id)
+        points = as_polyline(points)
+        if len(points) == 0:
+            return
+        # Segment i loopt van punt i naar punt i + 1; één punt wordt een segment van lengte nul.
+        starts = points[:-1] if len(points) > 1 else points
+        ends = points[1:] if len(points) > 1 else points
+        segment_ends = np.minimum(np.arange(len(starts)) + 1, len(points) - 1)
+
+        # Lange segmenten worden in stukken van hooguit één cel gesplitst, zodat een
+        # schuine lijn niet zijn hele bounding box vult maar alleen de cellen langs de lijn.
+        pieces = np.maximum(1, np.ceil(np.hypot(*(ends - starts).T) / self.cell_size)).astype(np.int64)
+        piece_segments = np.repeat(np.arange(len(starts)), pieces)
+        piece_index = np.arange(len(piece_segments)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        deltas = (ends - starts)[piece_segments]
+        piece_starts = starts[piece_segments] + deltas * (piece_index / pieces[piece_segments])[:, None]
+        piece_ends = starts[piece_segments] + deltas * ((piece_index + 1) / pieces[piece_segments])[:, None]
+        lo = np.floor(np.minimum(piece_starts, piece_ends) / self.cell_size).astype(np.int64)
+        hi = np.floor(np.maximum(piece_starts, piece_ends) / self.cell_size).astype(np.int64)
+
+        # Alle (segment, cel) paren uit de bounding boxes van de stukken, zonder Python-lus per segment.
+        spans = hi - lo + 1
+        counts = spans[:, 0] * spans[:, 1]
+        piece_ids = np.repeat(np.arange(len(piece_segments)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = lo[piece_ids, 0] + offsets // spans[piece_ids, 1]
+        cell_y = lo[piece_ids, 1] + offsets % spans[piece_ids, 1]
+        segment_ids = piece_segments[piece_ids]
+
+        order = np.lexsort((segment_ids, cell_y, cell_x))
+        cell_x, cell_y, segment_ids = cell_x[order], cell_y[order], segment_ids[order]
+        unique = np.r_[True, (np.diff(cell_x) != 0) | (np.diff(cell_y) != 0) | (np.diff(segment_ids) != 0)]
+        cell_x, cell_y, segment_ids = cell_x[unique], cell_y[unique], segment_ids[unique]
+        boundaries = np.flatnonzero((np.diff(cell_x) != 0) | (np.diff(cell_y) != 0)) + 1
+        cells = []
+        for group_start, group in zip(np.r_[0, boundaries].tolist(), np.split(segment_ids, boundaries)):
+            cell = (int(cell_x[group_start]), int(cell_y[group_start]))
+            cells.append(cell)
+            self._grid[cell][action_id] = (group, starts[group], ends[group], segment_ends[group])
+        self._actions[action_id] = _IndexedAction(version, cells)
+
+    def sync(self, actions):
+        """Werkt de index bij voor acties met een gewijzigde geometrie en verwijdert verdwenen acties."""
+        positions = {}
+        indexed_actions = self._actions
+        for index, action in enumerate(actions):
+            action_id = action.get('id')
+            positions[action_id] = index
+            version = action.get(GEOMETRY_VERSION, 0)
+            indexed = indexed_actions.get(action_id)
+            if indexed is None or indexed.version != version:
+                self._index_action(action_id, version, action["points"])
+        if len(indexed_actions) > len(positions):
+            for action_id in [action_id for action_id in indexed_actions if action_id not in positions]:
+                self.discard(action_id)
+        self._positions = positions
+
+    def hit_test(self, actions, point, tolerance):
+        """
+        Zoekt wat er onder een klik ligt.
+
+        Geeft (actie-index, punt-index) van het dichtstbijzijnde punt binnen
+        tolerance; anders (actie-index, -1) van de dichtstbijzijnde lijn binnen
+        tolerance; anders (-1, -1). Bij gelijke afstand wint de eerste actie en
+        het eerste punt, net als bij een lineaire scan.
+        """
+        self.sync(actions)
+        x, y = point
+        x0, y0 = int(np.floor((x - tolerance) / self.cell_size)), int(np.floor((y - tolerance) / self.cell_size))
+        x1, y1 = int(np.floor((x + tolerance) / self.cell_size)), int(np.floor((y + tolerance) / self.cell_size))
+
+        # Verzamel de kandidaat-segmenten van alle cellen rond de klik in vlakke lijsten.
+        segment_ids, starts, ends, end_ids, owners = [], [], [], [], []
+        positions = self._positions
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self._grid.get((cx, cy))
+                if not bucket:
+                    continue
+                for action_id, (group, group_starts, group_ends, group_end_ids) in bucket.items():
+                    segment_ids.append(group)
+                    starts.append(group_starts)
+                    ends.append(group_ends)
+                    end_ids.append(group_end_ids)
+                    owners.append(np.full(len(group), positions[action_id]))
+        if not segment_ids:
+            return -1, -1
+
+        segment_ids, end_ids, owners = np.concatenate(segment_ids), np.concatenate(end_ids), np.concatenate(owners)
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        query = np.array([x, y], dtype=np.float64)
+
+        # Punten: begin- en eindpunten van de kandidaat-segmenten.
+        vertex_dist = np.concatenate((np.hypot(*(starts - query).T), np.hypot(*(ends - query).T)))
+        nearest = vertex_dist.min()
+        if nearest < tolerance:
+            vertex_ids = np.concatenate((segment_ids, end_ids))
+            vertex_owners = np.concatenate((owners, owners))
+            tied = np.flatnonzero(vertex_dist == nearest)
+            first = tied[np.lexsort((vertex_ids[tied], vertex_owners[tied]))[0]]
+            return int(vertex_owners[first]), int(vertex_ids[first])
+
+        # Lijnen: afstand tot het dichtstbijzijnde punt op elk segment.
+        deltas = ends - starts
+        length_sq = np.einsum('ij,ij->i', deltas, deltas)
+        t = np.einsum('ij,ij->i', query - starts, deltas) / np.where(length_sq > 0, length_sq, 1.0)
+        closest = starts + deltas * np.clip(t, 0.0, 1.0)[:, None]
+        line_dist = np.hypot(*(closest - query).T)
+        nearest = line_dist.min()
+        if nearest < tolerance:
+            return int(owners[line_dist == nearest].min()), -1
+        return -1, -1
@@ -0,0 +1,76 @@
+"""
+Opstarttijden meten, ook in de bevroren (cx_Freeze) build waar `python -X importtime`
+niet beschikbaar is. Wordt aangezet met `main.py --startup-timing`.
+
+Imports worden gemeten door builtins.__import__ te omhullen: per module die
+nog niet geladen was de eigen tijd en de cumulatieve tijd (inclusief de imports
+die hij zelf doet), zoals -X importtime. Daarnaast kunnen met mark() momenten
+worden vastgelegd, zoals "venster getoond".
+"""
+import builtins
+import importlib.util
+import sys
+import time
+
+REPORT_TOP = 25 # Aantal modules in het rapport, gesorteerd op cumulatieve tijd
+
+
+def _module_name(name, globals, level):
+    """Volledige modulenaam, ook voor relatieve imports (from . import x)."""
+    if not level:
+        return name
+    try:
+        return importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__') or '')
+    except (ImportError, ValueError):
+        return '.' * level + name
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = [] # (label, seconden sinds start)
+        self.imports = [] # (module, eigen tijd, cumulatieve tijd) in seconden
+        self._child_time = [] # per lopende import: tijd van geneste imports
+        self._original_import = None
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if level == 0 and not fromlist and name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        loaded_before = len(sys.modules)
+        self._child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._child_time.pop()
+            if self._child_time:
+                self._child_time[-1] += elapsed
+            # Alleen imports die echt iets geladen hebben.
+            if len(sys.modules) > loaded_before:
+                self.imports.append((_module_name(name, globals, level), elapsed - children, elapsed))
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def report(self, file=None):
+        """Stopt het meten en schrijft de momenten en de traagste imports naar stderr."""
+        self.uninstall()
+        file = file if file is not None else sys.stderr
+        print("Opstarttijden (sinds start van main.py):", file=file)
+        for label, seconds in self.marks:
+            print(f"  {seconds * 1000:8.1f} ms  {label}", file=file)
+        print(f"Traagste imports (eigen | cumulatief, in ms; top {REPORT_TOP}):", file=file)
+        for name, own, cumulative in sorted(self.imports, key=lambda item: item[2], reverse=True)[:REPORT_TOP]:
+            print(f"  {own * 1000:8.1f} | {cumulative * 1000:8.1f}  {name}", file=file)
+        file.flush()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# De modules staan in de projectmap zelf, niet in een pakket.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
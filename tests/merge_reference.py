@@ -0,0 +1,73 @@
+"""
+Referentie voor merge.merge_polylines: de oude merge_lines uit de visualizer,
+zonder de Qt-afhandeling, plus testinvoer die op een geïmporteerde tekening
+lijkt. Gedeeld door tests/test_merge.py en benchmarks/bench_merge.py.
+"""
+import random
+
+from merge import DEFAULT_MERGE_DISTANCE
+from utils import distance
+
+
+def make_segments(count, seed=1):
+    """Korte, deels omgedraaide stukken langs kronkelende paden, door elkaar gehusseld."""
+    rng = random.Random(seed)
+    paths = max(1, count // 100)
+    segments = []
+    for path in range(paths):
+        x, y = rng.uniform(0, 4000), rng.uniform(0, 3000)
+        for _ in range(count // paths):
+            points = [(x, y)]
+            for _ in range(rng.randint(1, 4)):
+                x += rng.uniform(-20, 20)
+                y += rng.uniform(-20, 20)
+                points.append((x, y))
+            if rng.random() < 0.5:
+                points.reverse()
+            segments.append(points)
+            # Af en toe een gat dat alleen de geforceerde fase overbrugt.
+            if rng.random() < 0.02:
+                x += rng.choice((-1, 1)) * rng.uniform(200, 600)
+                y += rng.choice((-1, 1)) * rng.uniform(200, 600)
+    rng.shuffle(segments)
+    return segments
+
+
+def old_merge(polylines, max_distance=DEFAULT_MERGE_DISTANCE):
+    """De oude merge_lines, zonder de Qt-afhandeling."""
+    work_list = [list(points) for points in polylines]
+    merged = []
+    while work_list:
+        chain = work_list.pop(0)
+        while True:
+            best, min_dist = None, max_distance
+            for i, other in enumerate(work_list):
+                for dist, how in ((distance(chain[-1], other[0]), 0), (distance(chain[-1], other[-1]), 1),
+                                  (distance(chain[0], other[-1]), 2), (distance(chain[0], other[0]), 3)):
+                    if dist < min_dist:
+                        min_dist, best = dist, (how, i)
+            if best is None:
+                break
+            how, i = best
+            other = work_list.pop(i)
+            if how == 0: chain = chain + other
+            elif how == 1: chain = chain + list(reversed(other))
+            elif how == 2: chain = other + chain
+            else: chain = list(reversed(other)) + chain
+        merged.append(chain)
+    while len(merged) > 1:
+        best, min_dist = None, float('inf')
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                c1, c2 = merged[i], merged[j]
+                for dist, how in ((distance(c1[-1], c2[0]), 0), (distance(c1[-1], c2[-1]), 1),
+                                  (distance(c1[0], c2[0]), 2), (distance(c1[0], c2[-1]), 3)):
+                    if dist < min_dist:
+                        min_dist, best = dist, (how, i, j)
+        how, i, j = best
+        c1, c2 = merged[i], merged.pop(j)
+        if how == 0: merged[i] = c1 + c2
+        elif how == 1: merged[i] = c1 + list(reversed(c2))
+        elif how == 2: merged[i] = list(reversed(c2)) + c1
+        else: merged[i] = c2 + c1
+    return merged
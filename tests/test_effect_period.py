@@ -0,0 +1,38 @@
+"""Effect.period(): na precies één periode moet het beeld gelijk zijn aan frame 0 (naadloze loop)."""
+import numpy as np
+import pytest
+
+from actions import create_effect
+from effects.registry import effect_names
+
+
+def _effect(effect_name, num_leds, **fields):
+    action = {'id': "test", 'points': [], 'mode': "Effect", 'effect_name': effect_name,
+              'color': (255, 0, 0), 'brightness': 1.0, 'speed': 3, **fields}
+    return create_effect(action, num_leds, effect_name, (255, 0, 0), 1.0, 3)
+
+
+def _frame(effect, t):
+    out = np.zeros((effect.num_leds, 4), dtype=np.uint8)
+    effect.render_at(out, t)
+    return out
+
+
+@pytest.mark.parametrize("num_leds, number_of_lines", [(100, 3), (101, 4), (50, 7), (102, 4), (90, 3), (5, 7)])
+@pytest.mark.parametrize("line_width", [1, 5])
+def test_running_line_repeats_after_period(num_leds, number_of_lines, line_width):
+    effect = _effect("Running Line", num_leds, number_of_lines=number_of_lines, line_width=line_width)
+    period = effect.period()
+    assert period > 0
+    assert np.array_equal(_frame(effect, period), _frame(effect, 0.0))
+    assert np.array_equal(_frame(effect, 2 * period + 0.25), _frame(effect, 0.25))
+
+
+@pytest.mark.parametrize("effect_name", effect_names())
+@pytest.mark.parametrize("num_leds", [97, 101])
+def test_periodic_effects_repeat_after_period(effect_name, num_leds):
+    effect = _effect(effect_name, num_leds)
+    period = effect.period()
+    if not period:
+        pytest.skip(f"{effect_name} is niet periodiek")
+    assert np.array_equal(_frame(effect, period), _frame(effect, 0.0))
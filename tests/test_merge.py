@@ -0,0 +1,87 @@
+"""Tests voor merge.merge_polylines."""
+import random
+
+import pytest
+
+from merge import merge_polylines
+from tests.merge_reference import make_segments, old_merge
+
+LINE = [(0, 0), (10, 0)]
+
+
+def _merged(polylines, threshold=5, force=False):
+    return merge_polylines(polylines, threshold=threshold, force=force)
+
+
+def test_threshold_is_exclusive():
+    # Een gat van precies threshold wordt niet direct verbonden, net iets minder wel.
+    assert _merged([LINE, [(15, 0), (20, 0)]]) == [(0, LINE), (1, [(15, 0), (20, 0)])]
+    assert _merged([LINE, [(14.9, 0), (20, 0)]]) == [(0, LINE + [(14.9, 0), (20, 0)])]
+
+
+@pytest.mark.parametrize("other, expected", [
+    ([(11, 0), (20, 0)], LINE + [(11, 0), (20, 0)]), # eind -> begin
+    ([(20, 0), (11, 0)], LINE + [(11, 0), (20, 0)]), # eind -> eind: de andere lijn omgekeerd
+    ([(-20, 0), (-1, 0)], [(-20, 0), (-1, 0)] + LINE), # begin -> eind
+    ([(-1, 0), (-20, 0)], [(-20, 0), (-1, 0)] + LINE), # begin -> begin: de andere lijn omgekeerd
+])
+def test_connection_kinds(other, expected):
+    assert _merged([LINE, other]) == [(0, expected)]
+
+
+def test_tie_prefers_connection_order():
+    # Eén punt op gelijke afstand van beide uiteinden: eind -> begin wint, dus achteraan geplakt.
+    assert _merged([LINE, [(5, 5)]], threshold=10) == [(0, LINE + [(5, 5)])]
+    # Beide eindpunten van de andere lijn even ver van het eind: eind -> begin wint van eind -> eind.
+    assert _merged([LINE, [(10, 1), (10, -1)]]) == [(0, LINE + [(10, 1), (10, -1)])]
+
+
+def test_tie_prefers_first_line():
+    first, second = [(11, 0), (20, 0)], [(10, 1), (10, 4)]
+    assert _merged([LINE, first, second], threshold=2) == [(0, LINE + first), (2, second)]
+    assert _merged([LINE, second, first], threshold=2) == [(0, LINE + second), (2, first)]
+
+
+def test_force():
+    far = [(500, 0), (510, 0)]
+    assert _merged([LINE, far], force=False) == [(0, LINE), (1, far)]
+    assert _merged([LINE, far], force=True) == [(0, LINE + far)]
+    # Het dichtstbijzijnde paar eindpunten wordt verbonden, ook als dat een omkering vraagt.
+    assert _merged([LINE, [(-510, 0), (-500, 0)]], force=True) == [(0, [(-510, 0), (-500, 0)] + LINE)]
+
+
+def test_empty_lines_are_skipped_and_sources_keep_original_indices():
+    far, near = [(500, 0), (510, 0)], [(11, 0), (20, 0)]
+    result = _merged([[], far, [], LINE, near, []])
+    assert result == [(1, far), (3, LINE + near)]
+    assert _merged([[], []]) == []
+
+
+def test_source_is_first_line_of_chain():
+    # De keten begint bij de eerste vrije lijn, ook als er een lijn vóór geplakt wordt.
+    before = [(-20, 0), (-1, 0)]
+    assert _merged([LINE, before]) == [(0, before + LINE)]
+    assert _merged([before, LINE]) == [(0, before + LINE)]
+
+
+def _random_lines(rng, count):
+    lines = []
+    for _ in range(count):
+        # Kleine gehele coördinaten, zodat er veel gelijke afstanden zijn.
+        lines.append([(rng.randint(0, 60), rng.randint(0, 60)) for _ in range(rng.randint(1, 3))])
+    return lines
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("threshold", [1, 8, 25, 150])
+def test_matches_old_merge_lines_on_random_input(seed, threshold):
+    lines = _random_lines(random.Random(seed), 40)
+    new = [points for _, points in merge_polylines(lines, threshold=threshold)]
+    assert new == old_merge(lines, max_distance=threshold)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_old_merge_lines_on_drawing_like_input(seed):
+    segments = make_segments(300, seed=seed)
+    new = [points for _, points in merge_polylines(segments)]
+    assert new == old_merge(segments)
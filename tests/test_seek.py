@@ -0,0 +1,46 @@
+"""Effects.seek en render_at: een frame op tijd t is gelijk aan gewoon afspelen tot t."""
+import numpy as np
+import pytest
+
+from actions import create_effect
+from effects.base_effect import AnalyticEffect
+from effects.registry import effect_names
+
+STEP = 1.0 / 30.0
+NUM_LEDS = 120
+
+
+def _effect(effect_name):
+    action = {'id': "test", 'points': [], 'mode': "Effect", 'effect_name': effect_name,
+              'color': (255, 0, 0), 'brightness': 1.0, 'speed': 3, 'meteor_count': 2}
+    return create_effect(action, NUM_LEDS, effect_name, (255, 0, 0), 1.0, 3)
+
+
+@pytest.mark.parametrize("effect_name", effect_names())
+def test_render_at_matches_playback_in_any_order(effect_name):
+    effect = _effect(effect_name)
+    out = np.zeros((NUM_LEDS, 4), dtype=np.uint8)
+    played = []
+    for _ in range(90):
+        effect.render_into(out, STEP)
+        played.append(out.copy())
+
+    seeker = _effect(effect_name)
+    # Een AnalyticEffect rekent met (frame + 1) * STEP in plaats van opgetelde stappen: hooguit 1 verschil.
+    tolerance = 1 if isinstance(seeker, AnalyticEffect) else 0
+    for frame in (60, 5, 89, 0, 30, 31):
+        seeker.render_at(out, (frame + 1) * STEP, STEP)
+        assert np.abs(out.astype(np.int16) - played[frame]).max() <= tolerance, frame
+
+
+@pytest.mark.parametrize("effect_name", effect_names())
+def test_fast_forward_matches_playback(effect_name):
+    played, skipped = _effect(effect_name), _effect(effect_name)
+    out = np.zeros((NUM_LEDS, 4), dtype=np.uint8)
+    for _ in range(45):
+        played.render_into(out, STEP)
+    skipped.fast_forward(45, STEP)
+    expected = out.copy()
+    played.render_into(expected, STEP)
+    skipped.render_into(out, STEP)
+    assert np.array_equal(out, expected)
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import sip
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem
+
+from image_pyramid import ImagePyramid
+
+TILE_CACHE_BYTES = 128 * 1024 * 1024 # Geheugen voor omgezette tegels (QImage), alle niveaus samen
+
+
+class TiledImageItem(pg.GraphicsObject):
+    """
+    Tekent een (grote) achtergrondfoto in tegels uit een ImagePyramid.
+
+    Bij elke paint wordt het niveau gekozen dat past bij de schaal van de
+    painter: ingezoomd niveau 0, uitgezoomd een verkleind niveau. Zo hangt het
+    werk per paint af van het aantal schermpixels, niet van de grootte van de
+    foto. Een export die de scène op volle resolutie rendert krijgt vanzelf
+    niveau 0.
+
+    Tegels worden bij eerste gebruik omgezet naar een QImage in een formaat
+    dat Qt direct kan tekenen en in een LRU-cache bewaard (TILE_CACHE_BYTES).
+
+    De afbeelding beslaat (0, 0) - (breedte, hoogte) in data-coördinaten, met
+    rij 0 bovenaan (data-y = hoogte - rij), net als de lijnen.
+
+    Helderheid (setBrightness) is een weergave-instelling: er wordt een zwarte,
+    half doorzichtige rechthoek over de afbeelding getekend. De pixels en de
+    tegelcache blijven ongemoeid, dus een slider-stap kost alleen een herteken.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pyramid = None
+        self._tiles = OrderedDict() # (niveau, tx, ty) -> QImage
+        self._tile_bytes = 0
+        self._shade = QColor(0, 0, 0, 0) # zwart met alfa = 1 - helderheid
+
+    @property
+    def pyramid(self):
+        return self._pyramid
+
+    def setImage(self, image):
+        """Stelt de afbeelding in als (H, W, 3|4) uint8 array, rij 0 = bovenkant."""
+        self.prepareGeometryChange()
+        self._pyramid = ImagePyramid(np.ascontiguousarray(image))
+        self._tiles.clear()
+        self._tile_bytes = 0
+        self.update()
+
+    def setBrightness(self, factor):
+        """Stelt de helderheid in als factor 0-1 (1 = origineel)."""
+        alpha = int(round(255 * (1.0 - min(1.0, max(0.0, factor)))))
+        if alpha != self._shade.alpha():
+            self._shade = QColor(0, 0, 0, alpha)
+            self.update()
+
+    def boundingRect(self):
+        if self._pyramid is None:
+            return QRectF()
+        return QRectF(0, 0, self._pyramid.width, self._pyramid.height)
+
+    def _tile_image(self, level, tx, ty):
+        key = (level, tx, ty)
+        image = self._tiles.get(key)
+        if image is not None:
+            self._tiles.move_to_end(key)
+            return image
+        tile = self._pyramid.tile(level, tx, ty)
+        if self._pyramid.channels == 4:
+            source_format, target_format = QImage.Format_RGBA8888, QImage.Format_ARGB32_Premultiplied
+        else:
+            source_format, target_format = QImage.Format_RGB888, QImage.Format_RGB32
+        # Een view met de rijafstand van het niveau; convertToFormat maakt er een eigen kopie van.
+        view = QImage(sip.voidptr(tile.ctypes.data), tile.shape[1], tile.shape[0], tile.strides[0], source_format)
+        image = view.convertToFormat(target_format)
+        self._tiles[key] = image
+        self._tile_bytes += image.sizeInBytes()
+        while self._tile_bytes > TILE_CACHE_BYTES and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._tile_bytes -= evicted.sizeInBytes()
+        return image
+
+    def paint(self, p, *args):
+        pyramid = self._pyramid
+        if pyramid is None:
+            return
+        transform = p.combinedTransform()
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(transform)
+        level = pyramid.level_for_scale(scale)
+
+        # Zichtbaar deel van de afbeelding in data-coördinaten, en daarna in rijen van niveau 0.
+        device = p.device()
+        inverse, invertible = transform.inverted()
+        visible = self.boundingRect()
+        if invertible and device is not None:
+            visible = visible.intersected(inverse.mapRect(QRectF(0, 0, device.width(), device.height())))
+        if visible.isEmpty():
+            return
+        height = pyramid.height
+        x0, x1 = visible.left(), visible.right()
+        row0, row1 = height - visible.bottom(), height - visible.top()
+
+        p.save()
+        # Rij 0 bovenaan: spiegel de y-as zodat de tegels in rij-coördinaten getekend kunnen worden.
+        p.translate(0, height)
+        p.scale(1, -1)
+        p.setRenderHint(QPainter.Antialiasing, False)
+        # Ingezoomd voorbij niveau 0 scherpe pixels, net als ImageItem; anders gladgestreken.
+        p.setRenderHint(QPainter.SmoothPixmapTransform, scale < 1)
+        for tx, ty, (left, top, width, tile_height) in pyramid.tiles(level, x0, row0, x1, row1):
+            p.drawImage(QRectF(left, top, width, tile_height), self._tile_image(level, tx, ty))
+        p.restore()
+        if self._shade.alpha():
+            p.fillRect(visible, self._shade)
@@ -0,0 +1,110 @@
+"""
+Tijdlijn onder de tekening: bekijk de show op een vaste tijd in plaats van live.
+
+Zolang "Tijdlijn" uit staat, lopen de effecten live door zoals voorheen. Staat
+hij aan, dan toont de visualizer frame .frame van een show van
+TIMELINE_SECONDS seconden op TIMELINE_FPS frames per seconde, met dezelfde
+frametijden als een export op die framerate (zie effects/clock.py). Met de
+schuifregelaar kies je een frame; met afspelen loopt de tijdlijn in echte tijd
+door en begint aan het eind weer bij 0. De getekende frames komen uit een
+FrameCache (zie frame_cache.py), zodat heen en weer scrubben niets opnieuw
+berekent.
+"""
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QCheckBox, QHBoxLayout, QLabel, QPushButton, QSlider, QWidget
+
+from effects.clock import SimulationClock
+
+TIMELINE_SECONDS = 30
+TIMELINE_FPS = 30
+
+
+class TimelinePanel(QWidget):
+    # Uitgezonden als de gebruiker iets aan de tijdlijn verandert; de visualizer tekent dan opnieuw.
+    changed = pyqtSignal()
+
+    def __init__(self, duration=TIMELINE_SECONDS, fps=TIMELINE_FPS, parent=None):
+        super().__init__(parent)
+        self.clock = SimulationClock(1.0 / fps)
+        self.frame_count = max(1, int(round(duration * fps)))
+        self._playing = False
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.active_checkbox = QCheckBox("Tijdlijn")
+        self.active_checkbox.toggled.connect(self._set_active)
+        layout.addWidget(self.active_checkbox)
+
+        self.play_button = QPushButton("Afspelen")
+        self.play_button.setCheckable(True)
+        self.play_button.setEnabled(False)
+        self.play_button.toggled.connect(self._set_playing)
+        layout.addWidget(self.play_button)
+
+        self.slider = QSlider(Qt.Horizontal, minimum=0, maximum=self.frame_count - 1, value=0)
+        self.slider.setEnabled(False)
+        self.slider.valueChanged.connect(self._slider_moved)
+        layout.addWidget(self.slider, 1)
+
+        self.time_label = QLabel()
+        layout.addWidget(self.time_label)
+        self._update_label()
+
+    @property
+    def active(self):
+        return self.active_checkbox.isChecked()
+
+    @property
+    def playing(self):
+        return self.active and self._playing
+
+    @property
+    def frame(self):
+        return self.slider.value()
+
+    @property
+    def step(self):
+        return self.clock.step
+
+    def frame_time(self, frame=None):
+        """Tijd van frame (standaard het huidige frame) in seconden."""
+        return self.clock.frame_time(self.frame if frame is None else frame)
+
+    def advance(self, delta_time):
+        """
+        Zet de tijdlijn tijdens het afspelen delta_time verder (aan het eind weer
+        naar het begin) en geeft het huidige frame.
+        """
+        if self.playing and delta_time:
+            duration = self.frame_count * self.clock.step
+            self.clock.seek(self.clock.tick(delta_time) % duration)
+            self._show_frame(min(self.frame_count - 1, self.clock.frame_index(self.clock.time)))
+        return self.frame
+
+    def _show_frame(self, frame):
+        if frame != self.slider.value():
+            self.slider.blockSignals(True)
+            self.slider.setValue(frame)
+            self.slider.blockSignals(False)
+            self._update_label()
+
+    def _update_label(self):
+        total = self.frame_count * self.clock.step
+        self.time_label.setText(f"{self.frame_time():5.2f} / {total:.2f} s")
+
+    def _set_active(self, active):
+        self.play_button.setEnabled(active)
+        self.slider.setEnabled(active)
+        self.changed.emit()
+
+    def _set_playing(self, playing):
+        self._playing = playing
+        self.play_button.setText("Pauze" if playing else "Afspelen")
+        self.changed.emit()
+
+    def _slider_moved(self, frame):
+        # Afspelen gaat verder vanaf het gekozen frame.
+        self.clock.seek(self.frame_time(frame))
+        self._update_label()
+        self.changed.emit()
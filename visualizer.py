@@ -1,15 +1,16 @@
 import sys
 import math
-import time
 import copy
 import random
 import os
 import numpy as np
-import cv2
-import imageio
 import uuid # For generating unique IDs
 import re # For regex in stylesheet parsing
-import resources_rc # Importeer de gecompileerde resources
+import resources_rc # Importeer de gecompileerde resources (iconen van de undo/redo-knoppen)
+
+# cv2, PIL, de exportmodules (renderer, watermark, encoder) en de beeldpiramide worden
+# pas geïmporteerd in de functies die ze nodig hebben: ze zijn niet nodig voor het
+# eerste venster en vertragen anders het opstarten (zie main.py --startup-timing).
 
 # Add the script's directory to sys.path so modules can be found
 # This is crucial if the script is not run from the project's root folder.
@@ -23,39 +24,15 @@ if script_dir not in sys.path:
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QSlider, QComboBox, QFileDialog, QColorDialog, QApplication, QMessageBox,
-    QStatusBar, QGroupBox, QSizePolicy, QProgressDialog
+    QStatusBar, QGroupBox, QSizePolicy, QProgressDialog, QCheckBox
 )
-from PyQt5.QtCore import Qt, QTimer, QEvent, QSize, QRectF
+from PyQt5.QtCore import Qt, QEvent, QSize, QRectF
 from PyQt5.QtGui import QMouseEvent, QIcon, QImage, QPixmap, QPainter, QColor
 import pyqtgraph as pg
-from pyqtgraph.exporters import ImageExporter
-from PIL import Image
 
 # Enable OpenGL for smoother rendering and anti-aliasing
 pg.setConfigOptions(useOpenGL=True)
 
-# Define the correct RGB to RGBW conversion function globally
-# This function will now be used by all effects and for the final display.
-def rgb_to_rgbw(r, g, b):
-    r, g, b = int(r), int(g), int(b) # Ensure they are integers
-
-    # Find the minimum value of R, G, B to determine the white component
-    white = min(r, g, b)
-
-    # Subtract the white component from R, G, B to get the remaining RGB values
-    r_out = r - white
-    g_out = g - white
-    b_out = b - white
-
-    # Ensure the values stay within the 0-255 range
-    r_out = max(0, min(255, r_out))
-    g_out = max(0, min(255, g_out))
-    b_out = max(0, min(255, b_out))
-    white = max(0, min(255, white)) # Ensure white is also within range
-
-    return r_out, g_out, b_out, white
-
-
 # --- Import the actual utility and effect files ---
 try:
     # IMPORTANT NOTE: Make sure the 'effects' folder is a valid Python package
@@ -63,37 +40,27 @@ try:
     # Also check if the method names in your effect files (e.g., effects/base_effect.py,
     # effects/static.py, effects/breathing.py) all use 'get_next_frame' (snake_case)
     # instead of 'getNextFrame' (camelCase). This is crucial for functionality.
-    from effects.schemas import ( # Adjusted import path
-        EffectModel, StaticParams, BreathingParams, Color,
-        KnightRiderParams, MeteorParams, MulticolorParams,
-        RunningLineParams, ChristmasSnowParams, FlagParams
-    )
     from effects.base_effect import Effects # Adjusted import path
-    from effects.breathing import BreathingEffect # Adjusted import path
-    from effects.knight_rider import KnightRiderEffect # Adjusted import path
-    from effects.meteor import MeteorEffect # Adjusted import path
-    from effects.multicolor import MulticolorEffect # Adjusted import path
-    from effects.running_line import RunningLineEffect # Adjusted import path
-    from effects.christmas_snow import ChristmasSnowEffect # Adjusted import path
-    from effects.flag import FlagEffect # Adjusted import path
-    from effects.static import StaticEffect # Adjusted import path
     
     from utils import distance, resample_points, smooth_points, point_line_distance # Adjusted import path
-    # We are now NOT importing rgb_to_rgbw from effects.converts, we are using the local version.
+    from led_strip_item import LEDStripItem
+    from geometry import as_polyline, cumulative_arc_length
+    from spatial_index import ActionHitIndex
+    from merge import DEFAULT_MERGE_DISTANCE, merge_polylines
+    from history import UndoHistory
+    from frame_scheduler import FrameScheduler
+    from frame_cache import FrameCache
+    from timeline_panel import TimelinePanel
+    from actions import (
+        touch_geometry, touch_params,
+        touch_effect, versions, create_effect, resample_for_leds
+    )
+    from effects.registry import effect_names, get_effect_class
+    from effects.ui_params import SliderParam
+    from export_profiles import EXPORT_PROFILES, DEFAULT_EXPORT_PROFILE
+    # RGB -> RGBW conversion lives in effects.converts (see rgb_to_rgbw_batch); the effects use it directly.
     print("INFO: Actual 'utils' and 'effects' modules loaded.")
 
-    # Mapping of effect names to their classes
-    _effect_classes = {
-        "Static": StaticEffect,
-        "Pulseline": BreathingEffect,
-        "Knight Rider": KnightRiderEffect,
-        "Meteor": MeteorEffect,
-        "Multicolor": MulticolorEffect,
-        "Running Line": RunningLineEffect,
-        "Christmas Snow": ChristmasSnowEffect,
-        "Flag": FlagEffect
-    }
-    def get_effect_class(effect_name): return _effect_classes.get(effect_name)
 
 except ImportError as e:
     # This error handling is now more critical, as there are no more dummy implementations.
@@ -119,18 +86,24 @@ class LEDVisualizer(QMainWindow):
             print(f"WARNING: Could not load 'icons/pulseline1.ico': {e}")
 
         self.original_image = None
-        self.image = None
+        self.image = None # Afbeelding die het achtergronditem toont (dezelfde array als original_image)
         self.image_item = None
+        self.background_brightness = 1.0 # Van de slider "Achtergrond donkerte"; wordt pas bij weergave/export toegepast
 
         self.actions = []
         self.current_action = None
         
         # Store the different plot items
-        self.line_plot_items = {} # For the bright core of the effects (ScatterPlotItem)
+        self.line_plot_items = {} # For the bright core of the effects (LEDStripItem)
         self.glow_plot_items = {} # NEW: For the glow of the effects (PlotDataItem)
         self.line_data_items = {} # For 'Free Drawing' mode (PlotDataItem)
         self.point_plot_items = {} # For editing points (ScatterPlotItem)
         self.effect_instances = {}
+        self.frame_buffers = {} # Preallocated (num_leds, 4) uint8 RGBW buffers per action
+        self.action_render_state = {} # Per action: last drawn versions and derived data (resampled points, glow color)
+        self.hit_index = ActionHitIndex() # Grid of line segments for hit-testing in "Lijn Bewerken" mode
+        self.frame_cache = FrameCache() # Colors per action and timeline frame, so scrubbing replays instead of re-rendering
+        self.timeline_effects = {} # Per action: (versions, effect instance) used only for timeline frames
 
         self.effect_index = 0
         self.default_brightness = 1.0
@@ -146,21 +119,18 @@ class LEDVisualizer(QMainWindow):
         self.selected_point_index = -1
         self.drag_start_pos = None
 
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = UndoHistory() # Undo/redo with snapshots shared between steps (see history.py)
 
         # New global state for effect parameters
         self.current_global_effect_params = {} 
 
-        # Time tracking for delta_time calculation
-        self.last_frame_time = time.perf_counter()
+        # Draws frames only while an effect is animated; slower when the window is hidden (see frame_scheduler.py)
+        self.frame_scheduler = FrameScheduler(lambda delta_time: self.update_drawing(delta_time=delta_time), self)
 
         self.init_ui()
         self.push_undo_state()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.timer_update)
-        self.timer.start(10) # Increased FPS to 100 (10ms interval) for smoother animations
+        self.frame_scheduler.start()
 
     def init_ui(self):
         central_widget = QWidget(self)
@@ -181,7 +151,12 @@ class LEDVisualizer(QMainWindow):
         view_box.setContentsMargins(0, 0, 0, 0)
         plot_item.setContentsMargins(0, 0, 0, 0)
 
-        main_layout.addWidget(self.plot_widget, 80)
+        view_layout = QVBoxLayout()
+        view_layout.addWidget(self.plot_widget, 1)
+        self.timeline_panel = TimelinePanel()
+        self.timeline_panel.changed.connect(self._timeline_changed)
+        view_layout.addWidget(self.timeline_panel)
+        main_layout.addLayout(view_layout, 80)
         self.plot_widget.viewport().installEventFilter(self)
 
         control_layout = QVBoxLayout()
@@ -223,8 +198,8 @@ class LEDVisualizer(QMainWindow):
         control_layout.addWidget(QLabel("Effect:"))
         self.effect_combo = QComboBox()
         
-        # Use the actual effect classes now
-        self.effect_names = list(globals()['_effect_classes'].keys())
+        # Ingebouwde effecten plus effecten uit plugins (zie effects/registry.py)
+        self.effect_names = effect_names()
 
         self.effect_combo.addItems(self.effect_names)
         self.effect_combo.currentIndexChanged.connect(self.change_effect)
@@ -251,7 +226,8 @@ class LEDVisualizer(QMainWindow):
         extra_options_layout.addWidget(self.darkness_slider)
 
         extra_options_layout.addWidget(QLabel("Samenvoeg-afstand:"))
-        self.merge_slider = QSlider(Qt.Horizontal, minimum=1, maximum=100, value=25)
+        # Eindpunten binnen deze afstand (pixels) worden eerst direct verbonden, zie merge.py.
+        self.merge_slider = QSlider(Qt.Horizontal, minimum=1, maximum=500, value=DEFAULT_MERGE_DISTANCE)
         extra_options_layout.addWidget(self.merge_slider)
         
 
@@ -264,6 +240,14 @@ class LEDVisualizer(QMainWindow):
         # extra_options_layout.addWidget(QPushButton("Ongedaan Maken", clicked=self.undo_action))
         # extra_options_layout.addWidget(QPushButton("Opnieuw Uitvoeren", clicked=self.redo_action))
         extra_options_layout.addWidget(QPushButton("Sla Afbeelding Op", clicked=self.save_image))
+        extra_options_layout.addWidget(QLabel("Exportprofiel:"))
+        self.export_profile_combo = QComboBox()
+        for profile_name, profile in EXPORT_PROFILES.items():
+            self.export_profile_combo.addItem(profile.label, profile_name)
+        self.export_profile_combo.setCurrentIndex(list(EXPORT_PROFILES).index(DEFAULT_EXPORT_PROFILE))
+        extra_options_layout.addWidget(self.export_profile_combo)
+        self.seamless_loop_checkbox = QCheckBox("Naadloze loop (één effectperiode)")
+        extra_options_layout.addWidget(self.seamless_loop_checkbox)
         extra_options_layout.addWidget(QPushButton("Exporteer MP4", clicked=self.export_video))
         extra_options_layout.addWidget(QPushButton("Roteer Links", clicked=lambda: self.rotate_image(-90)))
         extra_options_layout.addWidget(QPushButton("Roteer Rechts", clicked=lambda: self.rotate_image(90)))
@@ -298,13 +282,13 @@ class LEDVisualizer(QMainWindow):
 
         if self.selected_action_index != -1:
             self.actions[self.selected_action_index]['brightness'] = brightness_val
-            self.actions[self.selected_action_index]['reset_effect_state'] = True
+            touch_params(self.actions[self.selected_action_index])
             self.show_status_message(f"Brightness of selected line set to {value}%")
         else:
             self.default_brightness = brightness_val # Update default for new lines
             for action in self.actions:
                 action['brightness'] = brightness_val
-                action['reset_effect_state'] = True
+                touch_params(action)
             self.show_status_message(f"Global brightness set to {value}%")
         self.update_drawing()
 
@@ -314,13 +298,13 @@ class LEDVisualizer(QMainWindow):
 
         if self.selected_action_index != -1:
             self.actions[self.selected_action_index]['speed'] = value
-            self.actions[self.selected_action_index]['reset_effect_state'] = True
+            touch_params(self.actions[self.selected_action_index])
             self.show_status_message(f"Speed of selected line set to {value}")
         else:
             self.default_speed = value # Update default for new lines
             for action in self.actions:
                 action['speed'] = value
-                action['reset_effect_state'] = True
+                touch_params(action)
             self.show_status_message(f"Global speed set to {value}")
         self.update_drawing()
 
@@ -362,45 +346,72 @@ class LEDVisualizer(QMainWindow):
         self.update_effect_parameters_ui() # Update effect-specific UI
         self.update_drawing()
 
-    def timer_update(self):
-        # Calculate delta_time
-        current_time = time.perf_counter()
-        delta_time = current_time - self.last_frame_time
-        self.last_frame_time = current_time
-        self.update_drawing(delta_time=delta_time)
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.frame_scheduler.set_hidden(self.isMinimized() or not self.isVisible())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.frame_scheduler.set_hidden(self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.frame_scheduler.set_hidden(True)
+        super().hideEvent(event)
+
+    def _remove_action_items(self, action_id):
+        """Removes all plot items, the effect instance and the render state of one action."""
+        for item_dict in [self.line_plot_items, self.glow_plot_items, self.line_data_items, self.point_plot_items]:
+            if action_id in item_dict:
+                self.plot_widget.removeItem(item_dict.pop(action_id))
+        self.effect_instances.pop(action_id, None)
+        self.frame_buffers.pop(action_id, None)
+        self.action_render_state.pop(action_id, None)
+        self.hit_index.discard(action_id)
+        self.frame_cache.discard(action_id)
+        self.timeline_effects.pop(action_id, None)
+
+    def _clear_action_items(self):
+        """Removes the plot items and render state of all actions."""
+        for item_dict in [self.line_plot_items, self.glow_plot_items, self.line_data_items, self.point_plot_items]:
+            for item in list(item_dict.values()):
+                self.plot_widget.removeItem(item)
+            item_dict.clear()
+        self.effect_instances.clear()
+        self.frame_buffers.clear()
+        self.action_render_state.clear()
+        self.hit_index.clear()
+        self.frame_cache.clear()
+        self.timeline_effects.clear()
 
     def update_drawing(self, force_next_frame=False, delta_time: float = 0.0):
+        """
+        Draws all actions and advances the effects by delta_time.
+        Returns True if any effect is animated, i.e. more frames are needed.
+        """
         # If delta_time is not provided (e.g., direct call without timer), use a default.
         # This is important for initial drawing or calls not from the timer.
         if delta_time is None:
             delta_time = 1.0 / 100.0 # Default to 100 FPS (10ms) if not specified
+        animated = False
+        # With the timeline on, every effect shows the same timeline frame instead of running live
+        timeline_frame = self.timeline_panel.advance(delta_time) if self.timeline_panel.active else None
 
-        # Remove actions that no longer exist
-        current_action_ids = {action['id'] for action in self.actions}
-        items_to_remove = [action_id for action_id in self.line_plot_items if action_id not in current_action_ids]
-        
-        for action_id in items_to_remove:
-            if action_id in self.line_plot_items:
-                self.plot_widget.removeItem(self.line_plot_items[action_id])
-                del self.line_plot_items[action_id]
-            if action_id in self.glow_plot_items:
-                self.plot_widget.removeItem(self.glow_plot_items[action_id])
-                del self.glow_plot_items[action_id]
-            if action_id in self.line_data_items:
-                self.plot_widget.removeItem(self.line_data_items[action_id])
-                del self.line_data_items[action_id]
-            if action_id in self.point_plot_items:
-                self.plot_widget.removeItem(self.point_plot_items[action_id])
-                del self.point_plot_items[action_id]
-            if action_id in self.effect_instances:
-                del self.effect_instances[action_id]
-
-        # Add the temporary action if drawing
+        # Add the temporary action if drawing (a shallow copy is enough: only the id differs)
         all_actions_to_draw = self.actions[:]
         if self.current_action and len(self.current_action["points"]) > 0 and self.drawing:
-            temp_action = copy.deepcopy(self.current_action)
+            temp_action = dict(self.current_action)
             temp_action['id'] = 'temp_current_action'
             all_actions_to_draw.append(temp_action)
+        elif 'temp_current_action' in self.action_render_state:
+            self._remove_action_items('temp_current_action')
+
+        # Remove actions that no longer exist. Existing actions never change their id,
+        # so this is only needed when we track more actions than there are to draw.
+        if len(self.action_render_state) > len(all_actions_to_draw):
+            current_action_ids = {action.get('id') for action in all_actions_to_draw}
+            for action_id in [action_id for action_id in self.action_render_state if action_id not in current_action_ids]:
+                self._remove_action_items(action_id)
 
         for action_idx, action in enumerate(all_actions_to_draw):
             action_id = action.get('id', str(uuid.uuid4()))
@@ -411,201 +422,172 @@ class LEDVisualizer(QMainWindow):
             # Skip empty or too short lines
             if len(pts) < 1:
                 # Ensure all related items are cleaned up
-                for item_dict in [self.line_plot_items, self.glow_plot_items, self.line_data_items, self.point_plot_items]:
-                    if action_id in item_dict:
-                        self.plot_widget.removeItem(item_dict[action_id])
-                        del item_dict[action_id]
-                if action_id in self.effect_instances:
-                    del self.effect_instances[action_id]
+                self._remove_action_items(action_id)
                 continue
+
+            # What did we draw last time for this action? Only redo the work whose version changed.
+            state = self.action_render_state.get(action_id)
+            if state is None:
+                state = self.action_render_state[action_id] = {}
+            geometry_version, params_version, effect_version = versions(action)
+            geometry_changed = state.get('geometry_version') != geometry_version
+            params_changed = state.get('params_version') != params_version
+            line_width_changed = state.get('line_width') != self.line_width
+            state['geometry_version'] = geometry_version
+            state['params_version'] = params_version
+            state['line_width'] = self.line_width
             
             action_draw_mode = action.get("mode", "Effect")
 
             if action_draw_mode == "Vrij Tekenen" or action_draw_mode == "Lijn Tekenen":
                 # This is a simple line. Remove any effect items.
                 if action_id in self.line_plot_items:
-                    self.plot_widget.removeItem(self.line_plot_items[action_id])
-                    del self.line_plot_items[action_id]
+                    self.plot_widget.removeItem(self.line_plot_items.pop(action_id))
                 if action_id in self.glow_plot_items:
-                    self.plot_widget.removeItem(self.glow_plot_items[action_id])
-                    del self.glow_plot_items[action_id]
-                if action_id in self.effect_instances:
-                    del self.effect_instances[action_id]
+                    self.plot_widget.removeItem(self.glow_plot_items.pop(action_id))
+                self.effect_instances.pop(action_id, None)
+                self.frame_buffers.pop(action_id, None)
 
                 # Draw as a continuous line (PlotDataItem)
                 line_item = self.line_data_items.get(action_id)
-                pen = pg.mkPen(QColor(*action["color"]), width=self.line_width, cap=Qt.RoundCap, join=Qt.RoundJoin)
-                if not line_item:
-                    line_item = pg.PlotDataItem(pen=pen, antialias=True)
-                    self.plot_widget.addItem(line_item)
-                    self.line_data_items[action_id] = line_item
-                else:
-                    line_item.setPen(pen)
-                line_item.setData(x=[p[0] for p in pts], y=[p[1] for p in pts])
+                if not line_item or params_changed or line_width_changed:
+                    pen = pg.mkPen(QColor(*action["color"]), width=self.line_width, cap=Qt.RoundCap, join=Qt.RoundJoin)
+                    if not line_item:
+                        line_item = pg.PlotDataItem(pen=pen, antialias=True)
+                        self.plot_widget.addItem(line_item)
+                        self.line_data_items[action_id] = line_item
+                        geometry_changed = True
+                    else:
+                        line_item.setPen(pen)
+                if geometry_changed:
+                    line_item.setData(x=[p[0] for p in pts], y=[p[1] for p in pts])
 
             else: # Apply effect (draw as glow + bright core)
                 # This is an effect. Remove any simple line items.
                 if action_id in self.line_data_items:
-                    self.plot_widget.removeItem(self.line_data_items[action_id])
-                    del self.line_data_items[action_id]
+                    self.plot_widget.removeItem(self.line_data_items.pop(action_id))
 
-                # Determine the current effect and its parameters
+                # Determine the current effect
                 effect_name = action.get('effect_name', self.effect_names[self.effect_combo.currentIndex()])
-                EffectClass = get_effect_class(effect_name)
-                
-                ParamsModel = StaticParams
-                if effect_name == "Pulseline": ParamsModel = BreathingParams
-                elif effect_name == "Knight Rider": ParamsModel = KnightRiderParams
-                elif effect_name == "Meteor": ParamsModel = MeteorParams
-                elif effect_name == "Multicolor": ParamsModel = MulticolorParams
-                elif effect_name == "Running Line": ParamsModel = RunningLineParams
-                elif effect_name == "Christmas Snow": ParamsModel = ChristmasSnowParams
-                elif effect_name == "Flag": ParamsModel = FlagParams
-
-                current_speed = action.get('speed', self.default_speed)
-                current_brightness = action.get('brightness', self.default_brightness)
-                r_base, g_base, b_base = action.get("color", self.led_color)
-                
-                params_data = {}
-                if effect_name == "Static" or effect_name == "Pulseline":
-                    params_data = {"color": [Color(red=r_base, green=g_base, blue=b_base)], "brightness": int(current_brightness * 100)}
-                elif effect_name == "Knight Rider":
-                    params_data = {"color": [Color(red=r_base, green=g_base, blue=b_base)], "brightness": int(current_brightness * 100), "line_length": action.get('line_length', 10)}
-                elif effect_name == "Meteor":
-                    params_data = {"color": [Color(red=r_base, green=g_base, blue=b_base)], "brightness": int(current_brightness * 100), "meteor_width": action.get('meteor_width', 10), "spark_intensity": action.get('spark_intensity', 50)}
-                elif effect_name == "Multicolor":
-                    params_data = {"brightness": int(current_brightness * 100)}
-                elif effect_name == "Running Line":
-                    bg_color_rgb = action.get('background_color', (0,0,0))
-                    params_data = {"color": [Color(red=r_base, green=g_base, blue=b_base)], "brightness": int(current_brightness * 100), "line_width": action.get('line_width', 5), "background_color": Color(red=bg_color_rgb[0], green=bg_color_rgb[1], blue=bg_color_rgb[2]), "number_of_lines": action.get('number_of_lines', 3)}
-                elif effect_name == "Christmas Snow":
-                    params_data = {"brightness": int(current_brightness * 100), "red_chance": action.get('red_chance', 30), "dark_green_chance": action.get('dark_green_chance', 30)}
-                elif effect_name == "Flag":
-                    default_flag_colors_rgb = [(255,0,0), (255,255,255), (0,0,255)]
-                    default_flag_widths = [10, 10, 10]
-                    flag_colors_data = action.get('color', default_flag_colors_rgb)
-                    if not (isinstance(flag_colors_data, list) and all(isinstance(c, (list, tuple)) for c in flag_colors_data)):
-                        flag_colors_data = default_flag_colors_rgb
-                    flag_colors = [Color(red=c[0], green=c[1], blue=c[2]) for c in flag_colors_data]
-                    flag_widths = action.get('width', default_flag_widths)
-                    if not (isinstance(flag_widths, list) and all(isinstance(w, (int, float)) for w in flag_widths)):
-                        flag_widths = default_flag_widths
-                    bg_color_rgb = action.get('background_color', (0,0,0))
-                    params_data = {"color": flag_colors, "brightness": int(current_brightness * 100), "width": flag_widths, "background_color": Color(red=bg_color_rgb[0], green=bg_color_rgb[1], blue=bg_color_rgb[2])}
-                else:
-                    params_data = {"color": [Color(red=r_base, green=g_base, blue=b_base)], "brightness": int(current_brightness * 100)}
-
-                total_line_length = sum(distance(pts[k], pts[k+1]) for k in range(len(pts) - 1))
-                num_leds_for_this_line = max(2, int(total_line_length / 2.0)) if total_line_length > 0 else 1
-
-                if action.get('recalculate_resample', True) or action.get('reset_effect_state', True):
-                    resampling_interval = total_line_length / (num_leds_for_this_line - 1) if num_leds_for_this_line > 1 else 1.0
-                    points_for_effect = resample_points(pts, resampling_interval)
-                    action['resampled_points'] = points_for_effect
-                    action['num_leds_actual'] = len(points_for_effect)
-                    action['recalculate_resample'] = False
+                effect_changed = state.get('effect_version') != effect_version or state.get('effect_name') != effect_name
+                state['effect_version'] = effect_version
+                state['effect_name'] = effect_name
+
+                if geometry_changed or 'resampled_xy' not in state:
+                    # Booglengte en LED-posities hangen alleen van de punten af: één keer per geometry_version.
+                    state['arc_length'] = cumulative_arc_length(pts)
+                    state['resampled_xy'] = resample_for_leds(pts, state['arc_length'])
+                    geometry_changed = True
                 
-                num_leds_for_this_line = action.get('num_leds_actual', 1)
+                num_leds_for_this_line = len(state['resampled_xy'])
 
                 effect_instance = self.effect_instances.get(action_id)
                 
-                if not effect_instance or action.get('reset_effect_state', False) or not isinstance(effect_instance, EffectClass):
-                    params_instance = ParamsModel(**params_data)
-                    # Pass the current_speed directly to the model for effects to use
-                    model = EffectModel(params=params_instance, frame_skip=0, speed=current_speed, num_leds=num_leds_for_this_line) 
-                    effect_instance = EffectClass(model)
+                if not effect_instance or effect_changed or params_changed:
+                    # The effect class is looked up and the parameters validated only when they actually changed
+                    effect_instance = create_effect(action, num_leds_for_this_line, effect_name, self.led_color, self.default_brightness, self.default_speed)
                     self.effect_instances[action_id] = effect_instance
-                    action['reset_effect_state'] = False
-                else:
-                    effect_instance.params = ParamsModel(**params_data)
+                elif geometry_changed:
                     effect_instance.num_leds = num_leds_for_this_line
-                    effect_instance.speed = current_speed # Update speed in the model
                 
-                # Pass delta_time to get_next_frame
-                frame_colors = effect_instance.get_next_frame(delta_time)
-
-                
-                # Ensure all colors in frame_colors are 4-element (R, G, B, W)
-                processed_frame_colors = []
-                for color_tuple in frame_colors:
-                    if len(color_tuple) == 3:
-                        # Convert RGB to RGBW using the global rgb_to_rgbw
-                        r, g, b, w = rgb_to_rgbw(color_tuple[0], color_tuple[1], color_tuple[2])
-                        processed_frame_colors.append((r, g, b, w))
-                    elif len(color_tuple) == 4:
-                        processed_frame_colors.append(color_tuple)
-                    else:
-                        # Handle unexpected format, e.g., default to black
-                        processed_frame_colors.append((0, 0, 0, 0))
-
+                # Render the frame straight into the preallocated RGBW buffer of this action
+                frame_buffer = self.frame_buffers.get(action_id)
+                if frame_buffer is None or len(frame_buffer) != num_leds_for_this_line:
+                    frame_buffer = np.zeros((num_leds_for_this_line, 4), dtype=np.uint8)
+                    self.frame_buffers[action_id] = frame_buffer
+                animated = animated or effect_instance.is_animated()
+                if timeline_frame is None:
+                    effect_instance.render_into(frame_buffer, delta_time)
+                    display_rgb = self._display_rgb(frame_buffer)
+                else:
+                    display_rgb = self._timeline_colors(action_id, action, effect_name, frame_buffer, timeline_frame)
 
                 # --- GLOW EFFECT LOGIC ---
                 avg_r_display, avg_g_display, avg_b_display = 0, 0, 0
-                num_colors = len(processed_frame_colors)
-                if num_colors > 0:
-                    for r_out, g_out, b_out, w_val in processed_frame_colors:
-                        # Convert RGBW back to RGB for display in PyQtGraph
-                        display_r = min(255, r_out + w_val)
-                        display_g = min(255, g_out + w_val)
-                        display_b = min(255, b_out + w_val)
-                        
-                        avg_r_display += display_r
-                        avg_g_display += avg_g_display
-                        avg_b_display += avg_b_display
-                    
-                    avg_r_display //= num_colors
-                    avg_g_display //= num_colors
-                    avg_b_display //= num_colors
+                if len(display_rgb) > 0:
+                    avg_r_display, avg_g_display, avg_b_display = (int(c) for c in display_rgb.mean(axis=0))
+                glow_color = (avg_r_display, avg_g_display, avg_b_display, 70)
                 
                 glow_item = self.glow_plot_items.get(action_id)
-                glow_pen = pg.mkPen(color=(avg_r_display, avg_g_display, avg_b_display, 70), width=self.line_width * 2, cap=Qt.RoundCap, join=Qt.RoundJoin)
-                if not glow_item:
-                    glow_item = pg.PlotDataItem(pen=glow_pen, antialias=True)
-                    self.plot_widget.addItem(glow_item)
-                    self.glow_plot_items[action_id] = glow_item
-                else:
-                    glow_item.setPen(glow_pen)
-                glow_item.setData(x=[p[0] for p in pts], y=[p[1] for p in pts])
-
-                # --- BRIGHT CORE LOGIC (ScatterPlot) ---
-                brushes = []
-                for i in range(len(action['resampled_points'])):
-                    # Get RGBW components
-                    r_out, g_out, b_out, w_val = (processed_frame_colors[i][0], processed_frame_colors[i][1], processed_frame_colors[i][2], processed_frame_colors[i][3]) if i < len(processed_frame_colors) else (0,0,0,0)
-                    
-                    # Convert RGBW back to RGB for display in PyQtGraph
-                    display_r = min(255, r_out + w_val)
-                    display_g = min(255, g_out + w_val)
-                    display_b = min(255, b_out + w_val)
-
-                    brushes.append(pg.mkBrush(QColor(display_r, display_g, display_b)))
-
-                x_coords = [p[0] for p in action['resampled_points']]
-                y_coords = [p[1] for p in action['resampled_points']]
-
-                scatter_item = self.line_plot_items.get(action_id)
-                if not scatter_item:
-                    scatter_item = pg.ScatterPlotItem(
-                        x=x_coords, y=y_coords, size=self.line_width, brush=brushes, 
-                        antialias=True, pen=pg.mkPen(None)
-                    )
-                    self.plot_widget.addItem(scatter_item)
-                    self.line_plot_items[action_id] = scatter_item
-                else:
-                    scatter_item.setData(x=x_coords, y=y_coords, size=self.line_width, brush=brushes)
+                if not glow_item or line_width_changed or state.get('glow_color') != glow_color:
+                    glow_pen = pg.mkPen(color=glow_color, width=self.line_width * 2, cap=Qt.RoundCap, join=Qt.RoundJoin)
+                    if not glow_item:
+                        glow_item = pg.PlotDataItem(pen=glow_pen, antialias=True)
+                        self.plot_widget.addItem(glow_item)
+                        self.glow_plot_items[action_id] = glow_item
+                        geometry_changed = True
+                    else:
+                        glow_item.setPen(glow_pen)
+                    state['glow_color'] = glow_color
+                if geometry_changed:
+                    glow_item.setData(x=[p[0] for p in pts], y=[p[1] for p in pts])
+
+                # --- BRIGHT CORE LOGIC (LEDStripItem) ---
+                # Colors go to the item as one array per line; no QBrush per LED.
+                led_item = self.line_plot_items.get(action_id)
+                if not led_item:
+                    led_item = LEDStripItem(size=self.line_width)
+                    self.plot_widget.addItem(led_item)
+                    self.line_plot_items[action_id] = led_item
+                    geometry_changed = True
+                # Only new LED positions need the geometry update and polygon refill of setPoints.
+                if geometry_changed:
+                    led_item.setPoints(state['resampled_xy'])
+                led_item.setSize(self.line_width)
+                led_item.setColors(display_rgb)
             
             # Draw editing points
             if self.draw_mode == "Lijn Bewerken" and action_idx == self.selected_action_index:
                 point_item = self.point_plot_items.get(action_id)
-                if not point_item:
-                    point_item = pg.ScatterPlotItem(size=self.line_width + 5, brush=pg.mkBrush('b'), pen=pg.mkPen('w', width=1))
-                    self.plot_widget.addItem(point_item)
-                    self.point_plot_items[action_id] = point_item
-                point_item.setData(x=[p[0] for p in pts], y=[p[1] for p in pts])
+                if not point_item or geometry_changed or line_width_changed:
+                    if not point_item:
+                        point_item = pg.ScatterPlotItem(size=self.line_width + 5, brush=pg.mkBrush('b'), pen=pg.mkPen('w', width=1))
+                        self.plot_widget.addItem(point_item)
+                        self.point_plot_items[action_id] = point_item
+                    # Eén setData met positie en grootte: ScatterPlotItem bouwt zijn punten dan maar één keer op.
+                    point_item.setData(pos=as_polyline(pts), size=self.line_width + 5)
             else:
                 if action_id in self.point_plot_items:
-                    self.plot_widget.removeItem(self.point_plot_items[action_id])
-                    del self.point_plot_items[action_id]
+                    self.plot_widget.removeItem(self.point_plot_items.pop(action_id))
+
+        # A paused timeline shows one fixed frame
+        if timeline_frame is not None and not self.timeline_panel.playing:
+            animated = False
+        # Something changed that needs frames (e.g. a new or edited effect line): resume the frames.
+        if animated:
+            self.frame_scheduler.wake()
+        return animated
+
+    @staticmethod
+    def _display_rgb(frame_buffer):
+        """Converts an RGBW buffer back to RGB for display in PyQtGraph (white is added to every channel)."""
+        return np.minimum(frame_buffer[:, :3].astype(np.uint16) + frame_buffer[:, 3:4], 255).astype(np.uint8)
+
+    def _timeline_colors(self, action_id, action, effect_name, frame_buffer, frame):
+        """
+        Returns the display colors of an action at a timeline frame: from the frame cache,
+        or rendered with render_at (deterministic, also when scrubbing backwards) and cached.
+        """
+        version = versions(action)
+        # The line being drawn changes with every mouse move; caching it would only evict useful frames.
+        cacheable = action_id != 'temp_current_action'
+        display_rgb = self.frame_cache.get(action_id, version, frame) if cacheable else None
+        if display_rgb is None:
+            # A separate instance that only renders timeline frames: the live instance has rendered
+            # frames of its own, so its state no longer follows from its time alone.
+            timeline_version, effect_instance = self.timeline_effects.get(action_id, (None, None))
+            if timeline_version != version:
+                effect_instance = create_effect(action, len(frame_buffer), effect_name, self.led_color, self.default_brightness, self.default_speed)
+                self.timeline_effects[action_id] = (version, effect_instance)
+            effect_instance.render_at(frame_buffer, self.timeline_panel.frame_time(frame), self.timeline_panel.step)
+            display_rgb = self._display_rgb(frame_buffer)
+            if cacheable:
+                self.frame_cache.put(action_id, version, frame, display_rgb)
+        return display_rgb
+
+    def _timeline_changed(self):
+        """The timeline was switched on or off, started, paused or scrubbed (update_drawing resumes the frames if needed)."""
+        self.update_drawing()
 
     def change_effect(self):
         self.effect_index = self.effect_combo.currentIndex()
@@ -614,7 +596,7 @@ class LEDVisualizer(QMainWindow):
         self._update_global_effect_params_with_defaults(selected_effect_name)
         
         for action in self.actions:
-            action['reset_effect_state'] = True
+            touch_effect(action)
             action['effect_name'] = selected_effect_name
             if action.get('mode') in ["Vrij Tekenen", "Lijn Tekenen"]:
                 action['mode'] = "Effect"
@@ -633,12 +615,12 @@ class LEDVisualizer(QMainWindow):
             
             if self.selected_action_index != -1:
                 self.actions[self.selected_action_index]['color'] = new_color
-                self.actions[self.selected_action_index]['reset_effect_state'] = True
+                touch_params(self.actions[self.selected_action_index])
                 self.show_status_message(f"Color of selected line changed to RGB{new_color}")
             else:
                 for action in self.actions:
                     action['color'] = new_color
-                    action['reset_effect_state'] = True
+                    touch_params(action)
                 self.show_status_message(f"Global LED color changed to RGB{new_color}")
             self.update_drawing()
 
@@ -646,8 +628,13 @@ class LEDVisualizer(QMainWindow):
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Image", "", "Images (*.png *.jpg *.jpeg *.bmp)")
         if file_path:
             try:
-                pil_image = Image.open(file_path).convert("RGBA")
-                self.original_image = np.array(pil_image)
+                from PIL import Image
+
+                pil_image = Image.open(file_path)
+                # Alleen een alfakanaal als de afbeelding er een heeft: scheelt een kwart van het geheugen.
+                has_alpha = 'A' in pil_image.getbands() or 'transparency' in pil_image.info
+                self.original_image = np.array(pil_image.convert("RGBA" if has_alpha else "RGB"))
+                del pil_image
                 
                 self.darkness_slider.setValue(0)
                 self.update_background_darkness(0)
@@ -668,13 +655,12 @@ class LEDVisualizer(QMainWindow):
     def update_display(self):
         if self.image is not None:
             if not self.image_item:
-                self.image_item = pg.ImageItem()
+                from tiled_image_item import TiledImageItem
+
+                # Tegels uit een beeldpiramide: het niveau volgt de zoom (zie tiled_image_item.py).
+                self.image_item = TiledImageItem()
                 self.plot_widget.addItem(self.image_item)
-            
-            transposed_image = np.transpose(np.flipud(self.image), (1, 0, 2))
-            self.image_item.setImage(transposed_image)
-            h, w, _ = self.image.shape
-            self.image_item.setRect(0, 0, w, h)
+            self.image_item.setImage(self.image)
         else:
             if self.image_item:
                 self.plot_widget.removeItem(self.image_item)
@@ -682,12 +668,7 @@ class LEDVisualizer(QMainWindow):
         self.update_drawing()
 
     def clear_all_lines(self, push_undo=True):
-        for item_dict in [self.line_plot_items, self.glow_plot_items, self.line_data_items, self.point_plot_items]:
-            for item in list(item_dict.values()):
-                self.plot_widget.removeItem(item)
-            item_dict.clear()
-
-        self.effect_instances.clear()
+        self._clear_action_items()
         self.actions.clear()
         self.current_action = None
         self.selected_action_index = -1
@@ -712,209 +693,69 @@ class LEDVisualizer(QMainWindow):
     def update_background_darkness(self, value):
         if self.original_image is None:
             return
-        
-        # This is the original, simple brightness adjustment.
-        # The 'evening mode' has been reverted as discussed earlier.
-        brightness_factor = 1.0 - (value / 100.0)
-        self.image = self.original_image.copy()
-        
-        rgb_channels = self.image[:, :, :3].astype('float')
-        rgb_channels *= brightness_factor
-        rgb_channels = np.clip(rgb_channels, 0, 255)
-        self.image[:, :, :3] = rgb_channels.astype('uint8')
-        
-        self.update_display()
+
+        # Donkerte is een weergave-instelling van het achtergronditem; de pixels blijven
+        # ongewijzigd. Alleen na laden of draaien moet de afbeelding zelf opnieuw worden ingesteld.
+        self.background_brightness = 1.0 - (value / 100.0)
+        if self.image is not self.original_image:
+            self.image = self.original_image
+            self.update_display()
+        self.image_item.setBrightness(self.background_brightness)
         self.show_status_message(f"Background darkness set to {value}%")
 
     def merge_lines(self):
         """
         Voegt alle getekende lijnen samen tot één enkele, ononderbroken lijn,
-        zelfs bij complexe splitsingen.
+        zelfs bij complexe splitsingen. Zie merge.py voor het algoritme.
         """
         if len(self.actions) < 2:
             self.show_status_message("Minstens twee lijnen nodig om samen te voegen.")
             return
 
-        self.push_undo_state()
-
-        MAX_REASONABLE_DISTANCE = 150
-        work_list = copy.deepcopy(self.actions)
-        
-        # --- STAP 1: GREEDY CHAINING (verbind duidelijke buren) ---
+        # Elke keten neemt de eigenschappen (effect, kleur, id) over van de lijn waarmee hij begon.
         merged_actions = []
-        while work_list:
-            current_chain = work_list.pop(0)
-            while True:
-                chain_start = current_chain['points'][0]
-                chain_end = current_chain['points'][-1]
-                best_match = None
-                min_dist = MAX_REASONABLE_DISTANCE
-
-                for i, other_line in enumerate(work_list):
-                    other_start = other_line['points'][0]
-                    other_end = other_line['points'][-1]
-                    connections = [
-                        (distance(chain_end, other_start), 'end_to_start', i),
-                        (distance(chain_end, other_end), 'end_to_end', i),
-                        (distance(chain_start, other_end), 'start_to_end', i),
-                        (distance(chain_start, other_start), 'start_to_start', i),
-                    ]
-                    for dist, how, other_index in connections:
-                        if dist < min_dist:
-                            min_dist = dist
-                            best_match = {'how': how, 'index': other_index}
-                
-                if best_match:
-                    matched_line = work_list.pop(best_match['index'])
-                    pts_to_add = matched_line['points']
-                    if best_match['how'] == 'end_to_start':
-                        current_chain['points'].extend(pts_to_add)
-                    elif best_match['how'] == 'end_to_end':
-                        current_chain['points'].extend(reversed(pts_to_add))
-                    elif best_match['how'] == 'start_to_end':
-                        current_chain['points'] = pts_to_add + current_chain['points']
-                    elif best_match['how'] == 'start_to_start':
-                        current_chain['points'] = list(reversed(pts_to_add)) + current_chain['points']
-                else:
-                    break
-            merged_actions.append(current_chain)
-
-        # --- STAP 2: FORCED CHAINING (verbind de overgebleven ketens tot 1 lijn) ---
-        while len(merged_actions) > 1:
-            global_min_dist = float('inf')
-            best_connection = None
-
-            for i in range(len(merged_actions)):
-                for j in range(i + 1, len(merged_actions)):
-                    chain1, chain2 = merged_actions[i]['points'], merged_actions[j]['points']
-                    connections = [
-                        (distance(chain1[-1], chain2[0]), 'end1_start2', i, j),
-                        (distance(chain1[-1], chain2[-1]), 'end1_end2', i, j),
-                        (distance(chain1[0], chain2[0]), 'start1_start2', i, j),
-                        (distance(chain1[0], chain2[-1]), 'start1_end2', i, j),
-                    ]
-                    for dist, how, idx1, idx2 in connections:
-                        if dist < global_min_dist:
-                            global_min_dist = dist
-                            best_connection = {'how': how, 'idx1': idx1, 'idx2': idx2}
-            
-            if best_connection:
-                idx1, idx2 = best_connection['idx1'], best_connection['idx2']
-                how = best_connection['how']
-                if idx1 > idx2:
-                    idx1, idx2 = idx2, idx1
-                    parts = how.split('_')
-                    how = f"{parts[0][:5]}{'2' if parts[0][-1] == '1' else '1'}_{parts[1][:5]}{'2' if parts[1][-1] == '1' else '1'}"
-                
-                chain1_action, chain2_action = merged_actions[idx1], merged_actions[idx2]
-                if how == 'end1_start2': chain1_action['points'].extend(chain2_action['points'])
-                elif how == 'end1_end2': chain1_action['points'].extend(reversed(chain2_action['points']))
-                elif how == 'start1_end2': chain1_action['points'] = chain2_action['points'] + chain1_action['points']
-                elif how == 'start1_start2': chain1_action['points'] = list(reversed(chain2_action['points'])) + chain1_action['points']
-                merged_actions.pop(idx2)
-            else:
-                break # Geen verbindingen meer mogelijk
+        for source_index, points in merge_polylines([action['points'] for action in self.actions], threshold=self.merge_slider.value()):
+            merged_action = copy.deepcopy({k: v for k, v in self.actions[source_index].items() if k != 'points'})
+            merged_action['points'] = points
+            merged_actions.append(merged_action)
 
         # --- Afronding ---
         if len(self.actions) != len(merged_actions) or any(len(a['points']) != len(b['points']) for a, b in zip(self.actions, merged_actions)):
-            for item_dict in [self.line_plot_items, self.glow_plot_items, self.line_data_items, self.point_plot_items]:
-                for item in list(item_dict.values()): self.plot_widget.removeItem(item)
-                item_dict.clear()
-            self.effect_instances.clear()
+            self._clear_action_items()
+            for action in merged_actions:
+                touch_geometry(action)
             self.actions = merged_actions
             self.selected_action_index = -1
+            self.push_undo_state()
             self.show_status_message(f"Alle lijnen succesvol samengevoegd tot 1 lijn.")
         else:
             self.show_status_message("Geen lijnen gevonden om samen te voegen.")
-            self.undo_stack.pop()
-            
-        self.update_drawing()
-        
-        if len(self.actions) < 2:
-            self.show_status_message("Minstens twee lijnen nodig om samen te voegen.")
-            return
-
-        self.push_undo_state()
-        merge_threshold = self.merge_slider.value()
-        exact_merge_tolerance = 1.0
-
-        def dedup(points):
-            result = []
-            for pt in points:
-                if not result or distance(pt, result[-1]) > exact_merge_tolerance:
-                    result.append(pt)
-            return result
-
-        merged_any = True
-        while merged_any:
-            merged_any = False
-            for i in range(len(self.actions)):
-                for j in range(i + 1, len(self.actions)):
-                    l1, l2 = self.actions[i], self.actions[j]
-                    pts1, pts2 = l1['points'], l2['points']
-
-                    # Check alle combinaties, met logging
-                    pairs = [
-                        (pts1[-1], pts2[0], 'end1→start2', lambda: pts1 + ([pts2[0]] if distance(pts1[-1], pts2[0]) > exact_merge_tolerance else []) + pts2[1:]),
-                        (pts1[-1], pts2[-1], 'end1→end2', lambda: pts1 + ([pts2[-1]] if distance(pts1[-1], pts2[-1]) > exact_merge_tolerance else []) + list(reversed(pts2[:-1]))),
-                        (pts1[0], pts2[-1], 'start1←end2', lambda: pts2[:-1] + ([pts1[0]] if distance(pts1[0], pts2[-1]) > exact_merge_tolerance else []) + pts1),
-                        (pts1[0], pts2[0], 'start1←start2', lambda: list(reversed(pts2[1:])) + ([pts1[0]] if distance(pts1[0], pts2[0]) > exact_merge_tolerance else []) + pts1)
-                    ]
-                    merged = False
-                    for p1, p2, desc, build in pairs:
-                        d = distance(p1, p2)
-                        print(f"Check {desc}: {d:.2f} px (threshold {merge_threshold})")
-                        if d < merge_threshold:
-                            print(f"MERGE: {desc} bij afstand {d:.2f} px")
-                            l1['points'] = dedup(build())
-                            l1['recalculate_resample'] = True
-                            l1['reset_effect_state'] = True
-                            self.actions.pop(j)
-                            merged_any = True
-                            merged = True
-                            break
-                    if merged:
-                        break
-                if merged_any:
-                    break
 
-        self.show_status_message("Lijnen samengevoegd als ze aan elkaar lagen.")
         self.update_drawing()
 
 
-
-
-
     def push_undo_state(self):
-        state_to_save = []
-        for action in self.actions:
-            clean_action = {k: v for k, v in action.items() if k not in ['effect_instance', 'plot_items', 'resampled_points']}
-            state_to_save.append(copy.deepcopy(clean_action))
-        self.undo_stack.append(state_to_save)
-        self.redo_stack.clear()
+        self.history.record(self.actions)
 
+    def _restore_actions(self, actions):
+        """
+        Zet een toestand uit de geschiedenis terug. Ongewijzigde acties zijn dezelfde
+        objecten gebleven; update_drawing bouwt alleen de lijnen met andere versies
+        opnieuw op en ruimt verdwenen lijnen op.
+        """
+        self.actions = actions
+        self.current_action = None
+        self.selected_action_index = -1
+        self.selected_point_index = -1
+        self.update_drawing()
+        self.update_ui_for_selected_action()
 
     def undo_action(self):
         try:
-            if len(self.undo_stack) <= 1:
+            restored = self.history.undo(self.actions)
+            if restored is None:
                 return  # No popup
-
-            current_state = self.undo_stack.pop()
-            self.redo_stack.append(current_state)
-
-            self.clear_all_lines(False)
-
-            previous_state = self.undo_stack[-1]
-            self.actions = copy.deepcopy(previous_state)
-
-            for action in self.actions:
-                action["reset_effect_state"] = True
-                action["recalculate_resample"] = True
-
-            self.selected_action_index = -1
-            self.selected_point_index = -1
-            self.update_drawing()
-            self.update_ui_for_selected_action()
+            self._restore_actions(restored)
 
         except Exception as e:
             print(f"[ERROR in undo_action]: {e}")
@@ -922,23 +763,13 @@ class LEDVisualizer(QMainWindow):
 
 
     def redo_action(self):
-        if not self.redo_stack:
-            return  # No popup or status message if there's nothing to redo
-
         try:
-            next_state = self.redo_stack.pop()
-            self.undo_stack.append(copy.deepcopy(next_state))
-
-            self.clear_all_lines(False)
-            self.actions = copy.deepcopy(next_state)
-
-            # Re-activate effect
-            for action in self.actions:
-                action["reset_effect_state"] = True
-                action["recalculate_resample"] = True
+            restored = self.history.redo(self.actions)
+            if restored is None:
+                return  # No popup or status message if there's nothing to redo
 
             # ✅ Restore global effect settings from last restored action
-            for action in reversed(self.actions):
+            for action in reversed(restored):
                 if "effect_name" in action:
                     effect_name = action["effect_name"]
 
@@ -950,16 +781,13 @@ class LEDVisualizer(QMainWindow):
 
                     # Restore global effect settings
                     self.current_global_effect_params = {
-                        key: action[key]
+                        key: copy.deepcopy(action[key])
                         for key in action
                         if key not in ["points", "id", "mode", "color"]
                     }
                     break
 
-            self.selected_action_index = -1
-            self.selected_point_index = -1
-            self.update_drawing()
-            self.update_ui_for_selected_action()
+            self._restore_actions(restored)
 
             # Optional: turn off message if you want it silent
             # self.show_status_message("Last action redone.")
@@ -976,6 +804,8 @@ class LEDVisualizer(QMainWindow):
             return
 
         try:
+            import cv2
+
             if angle == 90:
                 self.original_image = cv2.rotate(self.original_image, cv2.ROTATE_90_CLOCKWISE)
             elif angle == -90:
@@ -1015,68 +845,34 @@ class LEDVisualizer(QMainWindow):
                 return True
         return super().eventFilter(source, event)
     
+    @staticmethod
+    def _button_color(button, default=(0, 0, 0)):
+        """Reads the (R, G, B) color shown on a color picker button from its stylesheet."""
+        match = re.search(r'rgb\((\d+),(\d+),(\d+)\)', button.styleSheet())
+        return tuple(int(c) for c in match.groups()) if match else default
+
     def _get_current_ui_effect_params(self):
         """
         Retrieves the current values of the effect-specific UI elements.
         This method reads directly from the UI elements.
         """
         params = {}
-        selected_effect_name = self.effect_combo.currentText()
+        EffectClass = get_effect_class(self.effect_combo.currentText())
 
         # Retrieve global brightness and speed (these are always present)
         params['brightness'] = self.brightness_slider.value() / 100.0
         params['speed'] = self.speed_slider.value()
 
-        # Retrieve effect-specific parameters
-        if selected_effect_name == "Knight Rider":
-            params['line_length'] = self.current_effect_ui_elements.get('line_length', QSlider()).value()
-        elif selected_effect_name == "Meteor":
-            params['meteor_width'] = self.current_effect_ui_elements.get('meteor_width', QSlider()).value()
-            params['spark_intensity'] = self.current_effect_ui_elements.get('spark_intensity', QSlider()).value()
-        elif selected_effect_name == "Running Line":
-            params['line_width'] = self.current_effect_ui_elements.get('line_width', QSlider()).value()
-            params['number_of_lines'] = self.current_effect_ui_elements.get('number_of_lines', QSlider()).value()
-            
-            bg_button = self.current_effect_ui_elements.get('background_color')
-            if bg_button:
-                style = bg_button.styleSheet()
-                match = re.search(r'rgb\((\d+),(\d+),(\d+)\)', style)
-                if match:
-                    params['background_color'] = (int(match.group(1)), int(match.group(2)), int(match.group(3)))
-                else:
-                    params['background_color'] = (0,0,0) # Default if not found
-            else:
-                params['background_color'] = (0,0,0) # Default if button does not exist
-                
-        elif selected_effect_name == "Christmas Snow":
-            params['red_chance'] = self.current_effect_ui_elements.get('red_chance', QSlider()).value()
-            params['dark_green_chance'] = self.current_effect_ui_elements.get('dark_green_chance', QSlider()).value()
-        elif selected_effect_name == "Flag":
-            colors = []
-            widths = []
-            for i in range(3):
-                color_button = self.current_effect_ui_elements.get(f'color_{i}')
-                if color_button:
-                    style = color_button.styleSheet()
-                    match = re.search(r'rgb\((\d+),(\d+),(\d+)\)', style)
-                    if match:
-                        colors.append((int(match.group(1)), int(match.group(2)), int(match.group(3))))
-                width_slider = self.current_effect_ui_elements.get(f'width_{i}')
-                if width_slider:
-                    widths.append(width_slider.value())
-            if colors: params['color'] = colors
-            if widths: params['width'] = widths
-
-            bg_button = self.current_effect_ui_elements.get('background_color')
-            if bg_button:
-                style = bg_button.styleSheet()
-                match = re.search(r'rgb\((\d+),(\d+),(\d+)\)', style)
-                if match:
-                    params['background_color'] = (int(match.group(1)), int(match.group(2)), int(match.group(3)))
-                else:
-                    params['background_color'] = (0,0,0) # Default if not found
+        # Retrieve effect-specific parameters, as declared by the effect (UI_PARAMS)
+        for param in (EffectClass.UI_PARAMS if EffectClass else ()):
+            widget = self.current_effect_ui_elements.get(param.ui_name)
+            if widget is None:
+                continue
+            value = widget.value() if isinstance(param, SliderParam) else self._button_color(widget)
+            if param.index is None:
+                params[param.key] = value
             else:
-                params['background_color'] = (0,0,0) # Default if button does not exist
+                params.setdefault(param.key, []).append(value)
 
         return params
 
@@ -1102,23 +898,9 @@ class LEDVisualizer(QMainWindow):
         }
 
         # Apply effect-specific defaults
-        if effect_name == "Knight Rider":
-            self.current_global_effect_params['line_length'] = 10
-        elif effect_name == "Meteor":
-            self.current_global_effect_params['meteor_width'] = 10
-            self.current_global_effect_params['spark_intensity'] = 50
-        elif effect_name == "Running Line":
-            self.current_global_effect_params['line_width'] = 5
-            self.current_global_effect_params['number_of_lines'] = 3
-            self.current_global_effect_params['background_color'] = (0,0,0)
-        elif effect_name == "Christmas Snow":
-            self.current_global_effect_params['red_chance'] = 30
-            self.current_global_effect_params['dark_green_chance'] = 30
-        elif effect_name == "Flag":
-            self.current_global_effect_params['color'] = [(255,0,0), (255,255,255), (0,0,255)]
-            self.current_global_effect_params['width'] = [10, 10, 10]
-            self.current_global_effect_params['background_color'] = (0,0,0)
-
+        EffectClass = get_effect_class(effect_name)
+        if EffectClass is not None:
+            self.current_global_effect_params.update(copy.deepcopy(EffectClass.DEFAULTS))
 
     def handle_mouse_press(self, event):
         pos = self.plot_widget.getViewBox().mapSceneToView(event.pos())
@@ -1132,8 +914,6 @@ class LEDVisualizer(QMainWindow):
             "id": str(uuid.uuid4()),
             "points": [point],
             "color": self.led_color,
-            'reset_effect_state': True,
-            'recalculate_resample': True,
             'effect_name': selected_effect_name, # Always apply the selected effect
             'mode': "Effect" # Default new lines as effects
         }
@@ -1163,34 +943,10 @@ class LEDVisualizer(QMainWindow):
                     self.show_status_message("Line completed.")
                 self.current_action, self.drawing, self.line_drawing_first_click = None, False, False
         elif self.draw_mode == "Lijn Bewerken":
-            self.selected_action_index = -1
-            self.selected_point_index = -1
-            min_dist = float('inf')
-            
             click_tolerance = 20 
 
-            for i, action in enumerate(self.actions):
-                for j, p in enumerate(action["points"]):
-                    dist = distance(point, p)
-                    if dist < click_tolerance and dist < min_dist:
-                        min_dist = dist
-                        self.selected_action_index = i
-                        self.selected_point_index = j
-            
-            if self.selected_action_index == -1:
-                min_dist_line = float('inf')
-                closest_action_idx = -1
-                for i, action in enumerate(self.actions):
-                    if len(action["points"]) < 2: continue
-                    for k in range(len(action["points"]) - 1):
-                        dist = point_line_distance(point, action["points"][k], action["points"][k+1])
-                        if dist < min_dist_line:
-                            min_dist_line = dist
-                            closest_action_idx = i
-                
-                if min_dist_line < click_tolerance:
-                    self.selected_action_index = closest_action_idx
-                    self.selected_point_index = -1
+            # Dichtstbijzijnde punt, anders dichtstbijzijnde lijn, binnen de tolerantie (zie spatial_index.py).
+            self.selected_action_index, self.selected_point_index = self.hit_index.hit_test(self.actions, point, click_tolerance)
 
             if self.selected_action_index != -1:
                 self.drawing = True
@@ -1209,12 +965,10 @@ class LEDVisualizer(QMainWindow):
 
         if self.draw_mode == "Vrij Tekenen" and self.current_action:
             self.current_action["points"].append(point)
-            self.current_action['recalculate_resample'] = True
-            self.current_action['reset_effect_state'] = True
+            touch_geometry(self.current_action)
         elif self.draw_mode == "Lijn Tekenen" and self.current_action:
             self.current_action["points"][1] = point
-            self.current_action['recalculate_resample'] = True
-            self.current_action['reset_effect_state'] = True
+            touch_geometry(self.current_action)
         elif self.draw_mode == "Lijn Bewerken" and self.selected_action_index != -1:
             action = self.actions[self.selected_action_index]
             if self.selected_point_index != -1:
@@ -1223,8 +977,7 @@ class LEDVisualizer(QMainWindow):
                 dx, dy = point[0] - self.drag_start_pos[0], point[1] - self.drag_start_pos[1]
                 action["points"] = [(px + dx, py + dy) for px, py in action["points"]]
                 self.drag_start_pos = point
-            action['reset_effect_state'] = True
-            action['recalculate_resample'] = True
+            touch_geometry(action)
         self.update_drawing()
 
     def handle_mouse_release(self, event):
@@ -1263,8 +1016,7 @@ class LEDVisualizer(QMainWindow):
                                 merged = True
                             
                             if merged:
-                                last_line['recalculate_resample'] = True
-                                last_line['reset_effect_state'] = True
+                                touch_geometry(last_line)
                                 self.show_status_message("Lijn automatisch verlengd.")
 
                     if not merged:
@@ -1292,45 +1044,12 @@ class LEDVisualizer(QMainWindow):
         self.current_effect_ui_elements[param_name] = slider
         return slider
 
-    def _add_color_picker(self, label_text, param_name):
+    def _add_color_picker(self, label_text, param_name, initial_color=None):
         label = QLabel(label_text)
         button = QPushButton("Choose Color")
         button.clicked.connect(lambda: self._choose_effect_color(param_name, button))
-        
-        initial_color = self.led_color
-        if self.selected_action_index != -1:
-            selected_action = self.actions[self.selected_action_index]
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in selected_action:
-                    if isinstance(selected_action['color'], list) and len(selected_action['color']) > color_idx:
-                        initial_color = selected_action['color'][color_idx]
-                    elif isinstance(selected_action['color'], tuple):
-                        initial_color = selected_action['color']
-            elif param_name == "background_color" and 'background_color' in selected_action and isinstance(selected_action['background_color'], tuple):
-                initial_color = selected_action['background_color']
-        elif self.drawing and self.current_action:
-            current_drawing_action = self.current_action
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in current_drawing_action:
-                    if isinstance(current_drawing_action['color'], list) and len(current_drawing_action['color']) > color_idx:
-                        initial_color = current_drawing_action['color'][color_idx]
-                    elif isinstance(current_drawing_action['color'], tuple):
-                        initial_color = current_drawing_action['color']
-            elif param_name == "background_color" and 'background_color' in current_drawing_action and isinstance(current_drawing_action['background_color'], tuple):
-                initial_color = current_drawing_action['background_color']
-        else:
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['color'], list) and len(self.current_global_effect_params['color']) > color_idx:
-                    initial_color = self.current_global_effect_params['color'][color_idx]
-                elif 'color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['color'], tuple):
-                    initial_color = self.current_global_effect_params['color']
-            elif param_name == "background_color" and 'background_color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['background_color'], tuple):
-                initial_color = self.current_global_effect_params['background_color']
-
 
+        initial_color = initial_color if initial_color is not None else self.led_color
         button.setStyleSheet(f"background-color: rgb({initial_color[0]},{initial_color[1]},{initial_color[2]});")
         
         self.effect_params_layout.addWidget(label)
@@ -1339,38 +1058,8 @@ class LEDVisualizer(QMainWindow):
         return button
 
     def _choose_effect_color(self, param_name, button):
-        current_color_rgb = self.led_color
-        if self.selected_action_index != -1:
-            selected_action = self.actions[self.selected_action_index]
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in selected_action:
-                    if isinstance(selected_action['color'], list) and len(selected_action['color']) > color_idx:
-                        current_color_rgb = selected_action['color'][color_idx]
-                    elif isinstance(selected_action['color'], tuple):
-                        current_color_rgb = selected_action['color']
-            elif param_name == "background_color" and 'background_color' in selected_action and isinstance(selected_action['background_color'], tuple):
-                current_color_rgb = selected_action['background_color']
-        elif self.drawing and self.current_action:
-            current_drawing_action = self.current_action
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in current_drawing_action:
-                    if isinstance(current_drawing_action['color'], list) and len(current_drawing_action['color']) > color_idx:
-                        current_color_rgb = current_drawing_action['color'][color_idx]
-                    elif isinstance(current_drawing_action['color'], tuple):
-                        current_color_rgb = current_drawing_action['color']
-            elif param_name == "background_color" and 'background_color' in current_drawing_action and isinstance(current_drawing_action['background_color'], tuple):
-                current_color_rgb = current_drawing_action['background_color']
-        else:
-            if param_name.startswith("color_"):
-                color_idx = int(param_name.split('_')[1])
-                if 'color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['color'], list) and len(self.current_global_effect_params['color']) > color_idx:
-                    current_color_rgb = self.current_global_effect_params['color'][color_idx]
-                elif 'color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['color'], tuple):
-                    current_color_rgb = self.current_global_effect_params['color']
-            elif param_name == "background_color" and 'background_color' in self.current_global_effect_params and isinstance(self.current_global_effect_params['background_color'], tuple):
-                current_color_rgb = self.current_global_effect_params['background_color']
+        # The button always shows the current value of the parameter
+        current_color_rgb = self._button_color(button, self.led_color)
 
         color = QColorDialog.getColor(QColor(*current_color_rgb))
         if color.isValid():
@@ -1378,24 +1067,28 @@ class LEDVisualizer(QMainWindow):
             button.setStyleSheet(f"background-color: rgb({new_rgb[0]},{new_rgb[1]},{new_rgb[2]});")
             self.set_effect_specific_param(param_name, new_rgb)
 
+    def _set_list_param(self, values, param, value):
+        """Sets one element of a list parameter (e.g. the colors and widths of Flag) in an action or params dict."""
+        EffectClass = get_effect_class(self.effect_combo.currentText())
+        items = list(EffectClass.param_value(values, param.key))
+        default_list = EffectClass.DEFAULTS[param.key]
+        while len(items) <= param.index:
+            items.append(default_list[min(len(items), len(default_list) - 1)])
+        items[param.index] = value
+        values[param.key] = items
+
     def set_effect_specific_param(self, param_name, value):
+        # Look up which parameter of the current effect this is; list parameters
+        # (like 'color_0' of Flag) update one element of the list in 'color'.
+        EffectClass = get_effect_class(self.effect_combo.currentText())
+        param = next((p for p in (EffectClass.UI_PARAMS if EffectClass else ()) if p.ui_name == param_name), None)
+        is_list_item = param is not None and param.index is not None
+
         # Update self.current_global_effect_params based on the specific parameter being changed
         # This part correctly handles updating the global state for sliders/color pickers
         # that are not tied to a specific selected line.
-        if param_name.startswith("color_"):
-            color_idx = int(param_name.split('_')[1])
-            if 'color' not in self.current_global_effect_params or not isinstance(self.current_global_effect_params['color'], list):
-                self.current_global_effect_params['color'] = [(255,255,255)] * 3
-            while len(self.current_global_effect_params['color']) <= color_idx:
-                self.current_global_effect_params['color'].append((255,255,255))
-            self.current_global_effect_params['color'][color_idx] = value
-        elif param_name.startswith("width_"):
-            width_idx = int(param_name.split('_')[1])
-            if 'width' not in self.current_global_effect_params or not isinstance(self.current_global_effect_params['width'], list):
-                self.current_global_effect_params['width'] = [10] * 3
-            while len(self.current_global_effect_params['width']) <= width_idx:
-                self.current_global_effect_params['width'].append(10)
-            self.current_global_effect_params['width'][width_idx] = value
+        if is_list_item:
+            self._set_list_param(self.current_global_effect_params, param, value)
         else:
             self.current_global_effect_params[param_name] = value
 
@@ -1418,45 +1111,19 @@ class LEDVisualizer(QMainWindow):
 
         for target_action in actions_to_modify:
             # Always set the effect name to the current selection from the dropdown
+            if target_action.get('effect_name') != self.effect_combo.currentText():
+                touch_effect(target_action)
             target_action['effect_name'] = self.effect_combo.currentText()
             
-            # Update the specific parameter being changed
-            # This is the important change: only update the *specific* parameter
-            # that triggered this function call.
-            if param_name.startswith("color_"):
-                # If a specific color component is being changed (e.g., color_0 for Flag)
-                if target_action['effect_name'] == "Flag":
-                    if 'color' not in target_action or not isinstance(target_action['color'], list):
-                        target_action['color'] = [(255,255,255)] * 3 # Initialize if not present
-                    while len(target_action['color']) <= color_idx:
-                        target_action['color'].append((255,255,255))
-                    target_action['color'][color_idx] = value
-                else:
-                    # For effects with a single color, update the main color directly
-                    # This should ideally be handled by choose_led_color, but for robustness
-                    target_action['color'] = value # Assuming 'value' is an (R,G,B) tuple
-            elif param_name == "background_color":
-                target_action['background_color'] = value
-            elif param_name == "color": # This is for the main LED color picker (choose_led_color doesn't call this with 'color')
-                 # This branch should only be activated if 'param_name' is actually 'color'.
-                 # The 'choose_led_color' function already handles this directly on the 'actions' list.
-                 # So, in practice, this branch will rarely or never be executed by UI interaction with sliders.
-                 target_action['color'] = value
-            elif param_name.startswith("width_"): # For Flag widths
-                width_idx = int(param_name.split('_')[1])
-                if 'width' not in target_action or not isinstance(target_action['width'], list):
-                    target_action['width'] = [10] * 3
-                while len(target_action['width']) <= width_idx:
-                    target_action['width'].append(10)
-                target_action['width'][width_idx] = value
+            # Update only the specific parameter that triggered this function call
+            if is_list_item:
+                self._set_list_param(target_action, param, value)
             else:
-                # For non-color, non-width parameters (like line_length, meteor_width, brightness, speed)
-                # Update the target_action directly with the value.
+                # For plain parameters (like line_length, meteor_width, background_color, brightness, speed)
                 target_action[param_name] = value
 
-            # Always mark for reset and recalculation
-            target_action['reset_effect_state'] = True
-            target_action['recalculate_resample'] = True # Ensures resampling if needed (e.g., line_length changes)
+            # Always mark the parameters as changed (this also resets the effect state)
+            touch_params(target_action)
 
         self.update_drawing()
 
@@ -1477,176 +1144,18 @@ class LEDVisualizer(QMainWindow):
         else:
             params_to_display = self.current_global_effect_params
 
-        if selected_effect_name == "Knight Rider":
-            default_val = params_to_display.get('line_length', 10) 
-            # Adjusted: Increased maximum from 50 to 100 for 'Line Length'
-            slider = self._add_slider("Line Length", "line_length", 1, 100, default_val) 
-            slider.blockSignals(True); slider.setValue(default_val); slider.blockSignals(False)
-        
-        elif selected_effect_name == "Meteor":
-            default_meteor_width = params_to_display.get('meteor_width', 10)
-            slider_width = self._add_slider("Meteor Width", "meteor_width", 1, 100, default_meteor_width)
-            slider_width.blockSignals(True); slider_width.setValue(default_meteor_width); slider_width.blockSignals(False)
-
-            default_spark_intensity = params_to_display.get('spark_intensity', 50)
-            slider_spark = self._add_slider("Spark Intensity", "spark_intensity", 0, 100, default_spark_intensity)
-            slider_spark.blockSignals(True); slider_spark.setValue(default_spark_intensity); slider_spark.blockSignals(False)
-        
-        elif selected_effect_name == "Running Line":
-            default_line_width = params_to_display.get('line_width', 5)
-            slider_line_width = self._add_slider("Line Width", "line_width", 1, 50, default_line_width) 
-            slider_line_width.blockSignals(True); slider_line_width.setValue(default_line_width); slider_line_width.blockSignals(False)
-
-            default_num_lines = params_to_display.get('number_of_lines', 3)
-            slider_num_lines = self._add_slider("Number of Lines", "number_of_lines", 1, 10, default_num_lines)
-            slider_num_lines.blockSignals(True); slider_num_lines.setValue(default_num_lines); slider_num_lines.blockSignals(False)
-
-            color_button = self._add_color_picker("Background Color", "background_color")
-            bg_color_rgb = params_to_display.get('background_color', (0,0,0))
-            color_button.setStyleSheet(f"background-color: rgb({bg_color_rgb[0]},{bg_color_rgb[1]},{bg_color_rgb[2]});")
-        
-        elif selected_effect_name == "Christmas Snow":
-            default_red_chance = params_to_display.get('red_chance', 30)
-            slider_red_chance = self._add_slider("Red Chance (%)", "red_chance", 0, 100, default_red_chance)
-            slider_red_chance.blockSignals(True); slider_red_chance.setValue(default_red_chance); slider_red_chance.blockSignals(False)
-
-            default_dark_green_chance = params_to_display.get('dark_green_chance', 30)
-            slider_dark_green_chance = self._add_slider("Dark Green Chance (%)", "dark_green_chance", 0, 100, default_dark_green_chance)
-            slider_dark_green_chance.blockSignals(True); slider_dark_green_chance.setValue(default_dark_green_chance); slider_dark_green_chance.blockSignals(False)
-        
-        elif selected_effect_name == "Flag":
-            default_colors = params_to_display.get('color')
-            if not isinstance(default_colors, list) or not all(isinstance(c, (list, tuple)) for c in default_colors):
-                default_colors = [(255,0,0), (255,255,255), (0,0,255)]
-            
-            default_widths = params_to_display.get('width')
-            if not isinstance(default_widths, list) or not all(isinstance(w, (int, float)) for w in default_widths):
-                default_widths = [10, 10, 10]
-
-            for i in range(3):
-                color_button = self._add_color_picker(f"Color {i+1}", f"color_{i}")
-                current_color_rgb = default_colors[i] if i < len(default_colors) else (255,255,255)
-                color_button.setStyleSheet(f"background-color: rgb({current_color_rgb[0]},{current_color_rgb[1]},{current_color_rgb[2]});")
-
-                current_width = default_widths[i] if i < len(default_widths) else 10
-                slider_width = self._add_slider(f"Width {i+1}", f"width_{i}", 1, 50, current_width)
-                slider_width.blockSignals(True); slider_width.setValue(current_width); slider_width.blockSignals(False)
-            
-            bg_button = self._add_color_picker("Background Color", "background_color")
-            bg_color_rgb = params_to_display.get('background_color', (0,0,0))
-            bg_button.setStyleSheet(f"background-color: rgb({bg_color_rgb[0]},{bg_color_rgb[1]},{bg_color_rgb[2]});")
-
-
-
-   
-    
-    def _capture_and_crop_frame(self):
-        """
-        Legt de huidige weergave vast, schaalt deze correct, en voegt een verkleind watermark toe.
-        """
-        from PyQt5.QtGui import QPainter, QPixmap, QColor, QImage
-        from PyQt5.QtCore import QSize, QRectF, Qt
-
-        if not self.image_item and not self.actions:
-            QMessageBox.warning(self, "Export Fout", "Geen afbeelding of lijnen geladen om te exporteren.")
-            return None
-
-        QApplication.processEvents()
-
-        if self.original_image is not None:
-            img_height, img_width, _ = self.original_image.shape
-            EXPORT_WIDTH = img_width
-            EXPORT_HEIGHT = img_height
-        else:
-            EXPORT_WIDTH = 1920
-            EXPORT_HEIGHT = 1080
-
-        target_qimage_size = QSize(EXPORT_WIDTH, EXPORT_HEIGHT)
-        pixmap = QPixmap(target_qimage_size)
-        pixmap.fill(QColor(0, 0, 0))
-
-        painter = QPainter(pixmap)
-        view_box = self.plot_widget.getViewBox()
-        plot_item = self.plot_widget.getPlotItem()
-        
-        original_x_range, original_y_range = view_box.viewRange()
-
-        try:
-            painter.setRenderHint(QPainter.Antialiasing)
-            scene = plot_item.scene()
-
-            # Deze logica berekent de grenzen van alle content (afbeelding + lijnen)
-            # en zorgt ervoor dat alles precies in het beeld past.
-            if self.original_image is not None:
-                content_x_min, content_x_max = 0.0, float(img_width)
-                content_y_min, content_y_max = 0.0, float(img_height)
+        EffectClass = get_effect_class(selected_effect_name)
+        for param in (EffectClass.UI_PARAMS if EffectClass else ()):
+            value = EffectClass.param_value(params_to_display, param.key)
+            if param.index is not None:
+                default_list = EffectClass.DEFAULTS[param.key]
+                value = value[param.index] if param.index < len(value) else default_list[param.index]
+            if isinstance(param, SliderParam):
+                slider = self._add_slider(param.label, param.ui_name, param.minimum, param.maximum, value)
+                slider.blockSignals(True); slider.setValue(value); slider.blockSignals(False)
             else:
-                content_x_min, content_x_max = float('inf'), float('-inf')
-                content_y_min, content_y_max = float('inf'), float('-inf')
-
-            for action in self.actions:
-                for p in action['points']:
-                    content_x_min = min(content_x_min, p[0])
-                    content_x_max = max(content_x_max, p[0])
-                    content_y_min = min(content_y_min, p[1])
-                    content_y_max = max(content_y_max, p[1])
-            
-            if content_x_min == float('inf'): # Simpele check is voldoende
-                painter.end()
-                return None
-
-            content_width = (content_x_max - content_x_min) or 1.0
-            content_height = (content_y_max - content_y_min) or 1.0
-
-            scale = max(EXPORT_WIDTH / content_width, EXPORT_HEIGHT / content_height)
-            view_width, view_height = EXPORT_WIDTH / scale, EXPORT_HEIGHT / scale
-            center_x, center_y = content_x_min + content_width / 2, content_y_min + content_height / 2
-            
-            final_x_min = center_x - view_width / 2
-            final_x_max = center_x + view_width / 2
-            final_y_min = center_y - view_height / 2
-            final_y_max = center_y + view_height / 2
-
-            view_box.setRange(xRange=(final_x_min, final_x_max), yRange=(final_y_min, final_y_max), padding=0)
-            QApplication.processEvents()
-            
-            scene.render(painter, QRectF(pixmap.rect()), view_box.viewRect())
-
-            # --- WATERMARK LOGICA (VERBETERD) ---
-            watermark_path = os.path.join(script_dir, "images", "pulseline1.png")
-            if os.path.exists(watermark_path):
-                watermark_image = QImage(watermark_path)
-                if not watermark_image.isNull():
-                    # Schaal het watermark naar 8% van de videohoogte
-                    target_height = int(EXPORT_HEIGHT * 0.08)
-                    scaled_watermark = watermark_image.scaledToHeight(target_height, Qt.SmoothTransformation)
-
-                    # Plaats het geschaalde watermark linksonder met een marge
-                    margin = 20
-                    wm_x = margin
-                    wm_y = EXPORT_HEIGHT - scaled_watermark.height() - margin
-                    painter.drawImage(wm_x, wm_y, scaled_watermark)
-
-        finally:
-            painter.end()
-            view_box.setRange(xRange=original_x_range, yRange=original_y_range, padding=0)
-            
-        qimage_result = pixmap.toImage()
-        if qimage_result.isNull(): return None
-
-        buffer = qimage_result.constBits()
-        buffer.setsize(qimage_result.sizeInBytes())
-        arr = np.frombuffer(buffer, dtype=np.uint8).reshape((qimage_result.height(), qimage_result.width(), 4))
-        
-        arr_rgba = cv2.cvtColor(arr, cv2.COLOR_BGRA2RGBA)
-        pil_image = Image.fromarray(arr_rgba, 'RGBA')
-        return pil_image
-
-
-
+                self._add_color_picker(param.label, param.ui_name, value)
 
-
-    
     def save_image(self):
         if self.plot_widget:
             try:
@@ -1654,6 +1163,7 @@ class LEDVisualizer(QMainWindow):
                 import cv2
                 import numpy as np
                 import os
+                from watermark import watermark_for
 
                 self.plot_widget.getViewBox().autoRange(padding=0.0)
 
@@ -1679,27 +1189,8 @@ class LEDVisualizer(QMainWindow):
                     if image.shape[2] == 3:
                         image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
 
-                    # Load the watermark
-                    logo_path = os.path.join(script_dir, "images", "pulseline1.png")
-                    logo = cv2.imread(logo_path, cv2.IMREAD_UNCHANGED)                    
-                    if logo is not None and logo.shape[2] == 4:
-                        target_height = int(image.shape[0] * 0.05)
-                        scale_factor = target_height / logo.shape[0]
-                        logo_resized = cv2.resize(
-                            logo,
-                            (int(logo.shape[1] * scale_factor), target_height),
-                            interpolation=cv2.INTER_AREA
-                        )
-
-                        x_offset = 12
-                        y_offset = image.shape[0] - logo_resized.shape[0] - 12
-
-                        overlay = logo_resized[..., :3]
-                        mask = logo_resized[..., 3:] / 255.0
-
-                        roi = image[y_offset:y_offset + overlay.shape[0], x_offset:x_offset + overlay.shape[1], :3]
-                        blended = (overlay * mask + roi * (1 - mask)).astype(np.uint8)
-                        image[y_offset:y_offset + overlay.shape[0], x_offset:x_offset + overlay.shape[1], :3] = blended
+                    # Add the watermark
+                    watermark_for(image.shape[1], image.shape[0], margin=12).apply(image)
 
                     # Convert back to BGR (without alpha) if needed
                     if image.shape[2] == 4:
@@ -1719,7 +1210,9 @@ class LEDVisualizer(QMainWindow):
         import os
         import cv2
         import numpy as np
-        from PyQt5.QtGui import QImage, QPainter
+        from renderer import render_export_frames, seamless_loop_frames
+        from watermark import watermark_for
+        from encoder import FrameEncoder
 
         if self.original_image is None:
             self.show_status_message("Geen afbeelding geladen om te exporteren.")
@@ -1734,11 +1227,24 @@ class LEDVisualizer(QMainWindow):
             output_path += '.mp4'
 
         # --- Setup ---
-        img_height, img_width, _ = self.original_image.shape
-        fps = 30
-        duration_seconds = 10
-        total_frames = fps * duration_seconds
+        # De renderer werkt direct op de resolutie van het gekozen profiel.
+        profile = EXPORT_PROFILES[self.export_profile_combo.currentData()]
+        source_height, source_width, _ = self.original_image.shape
+        img_width, img_height = profile.output_size(source_width, source_height)
+        fps = profile.fps
+        total_frames = profile.total_frames
         delta_time_per_frame = 1.0 / fps
+        export_scene = self._export_scene((img_width, img_height))
+
+        # Naadloze loop: precies het kleinste gemeenschappelijke veelvoud van de effectperiodes.
+        loop_note = ""
+        if self.seamless_loop_checkbox.isChecked():
+            loop_frames = seamless_loop_frames(export_scene, fps, profile.max_loop_frames, min_frames=fps)
+            if loop_frames is None:
+                loop_note = " (geen naadloze loop mogelijk: niet alle effecten zijn periodiek binnen de limiet)"
+            else:
+                total_frames = loop_frames
+                loop_note = f" (naadloze loop van {total_frames / fps:.2f} s)"
 
         # --- Voortgangsvenster ---
         progress = QProgressDialog("Video wordt geëxporteerd...", "Annuleren", 0, total_frames, self)
@@ -1748,96 +1254,102 @@ class LEDVisualizer(QMainWindow):
         progress.setAutoReset(False)
         progress.setAutoClose(False)
 
-        # Pauzeer de live-timer.
-        self.timer.stop()
-
-        # Bewaar de originele staat van de widget.
-        original_size = self.plot_widget.size()
-        view_box = self.plot_widget.getViewBox()
-        original_range = view_box.viewRange()
+        # Pauzeer de live weergave.
+        self.frame_scheduler.stop()
 
         was_cancelled = False
+        completed = False
+        export_error = None
+        frames = None
+        encoder = None
+        video_writer = None
         try:
             progress.show()
             QApplication.processEvents()
 
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            fourcc = cv2.VideoWriter_fourcc(*profile.codec)
             video_writer = cv2.VideoWriter(output_path, fourcc, fps, (img_width, img_height))
+            if not video_writer.isOpened() and profile.codec != 'mp4v':
+                # Niet elke OpenCV-build heeft elke codec; mp4v is altijd beschikbaar.
+                video_writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (img_width, img_height))
 
             if not video_writer.isOpened():
                 self.show_status_message("Fout: Kon videobestand niet openen.")
                 # Belangrijk: return hier binnen de try, zodat de finally wel wordt uitgevoerd.
                 return
+            # Wordt genegeerd door backends zonder kwaliteitsinstelling.
+            video_writer.set(cv2.VIDEOWRITER_PROP_QUALITY, profile.quality)
 
-            # Dwing de widget naar de juiste staat voor renderen.
-            self.plot_widget.resize(img_width, img_height)
-            view_box.setRange(xRange=(0, img_width), yRange=(0, img_height), padding=0)
-
-            for action in self.actions:
-                action['reset_effect_state'] = True
-            self.update_drawing(delta_time=0.0)
+            # Frames worden buiten de widget gerenderd, met eigen effectinstanties
+            # die vanaf een verse staat beginnen, verdeeld over meerdere processen.
+            # De live weergave blijft onaangeroerd.
+            frames = render_export_frames(export_scene, total_frames, delta_time_per_frame)
+            # Omzetten naar BGR, watermerk en encoderen gebeuren in een eigen thread.
+            encoder = FrameEncoder(video_writer, img_width, img_height, watermark_for(img_width, img_height, interpolation=cv2.INTER_LINEAR))
+            encoder.start()
 
             # --- Render Loop ---
-            for frame_idx in range(total_frames):
+            for frame_idx, frame_rgb in enumerate(frames):
                 if progress.wasCanceled():
                     was_cancelled = True
                     break
-                
+
                 progress.setValue(frame_idx)
-                self.update_drawing(delta_time=delta_time_per_frame, force_next_frame=True)
-                QApplication.processEvents()
-
-                image = QImage(img_width, img_height, QImage.Format_RGBA8888)
-                image.fill(0)
-                painter = QPainter(image)
-                self.plot_widget.render(painter)
-                painter.end()
-
-                ptr = image.bits()
-                ptr.setsize(image.byteCount())
-                frame_rgba = np.array(ptr).reshape((img_height, img_width, 4))
-                frame_bgr = cv2.cvtColor(frame_rgba, cv2.COLOR_RGBA2BGR)
-                
-                logo_path = os.path.join(script_dir, "images", "pulseline1.png")
-                if os.path.exists(logo_path):
-                    logo = cv2.imread(logo_path, cv2.IMREAD_UNCHANGED)
-                    if logo is not None:
-                        target_height = int(img_height * 0.05)
-                        scale = target_height / logo.shape[0]
-                        logo_resized = cv2.resize(logo, (int(logo.shape[1] * scale), target_height))
-                        
-                        margin = 20
-                        x_offset = margin
-                        y_offset = img_height - target_height - margin
-
-                        overlay = logo_resized[..., :3]
-                        mask = logo_resized[..., 3:] / 255.0
-                        roi = frame_bgr[y_offset:y_offset+target_height, x_offset:x_offset+logo_resized.shape[1]]
-                        blended = (overlay * mask + roi * (1 - mask)).astype(np.uint8)
-                        frame_bgr[y_offset:y_offset+target_height, x_offset:x_offset+logo_resized.shape[1]] = blended
-
-                video_writer.write(frame_bgr)
+                progress.setLabelText(f"Video wordt geëxporteerd... ({encoder.fps():.1f} fps)")
+                encoder.submit(frame_rgb)
 
             # --- Afronding ---
+            if was_cancelled:
+                encoder.abort()
+            else:
+                encoder.finish() # Geeft ook een fout uit de encoderthread door
+                completed = True
             progress.setValue(total_frames)
-            video_writer.release()
+
+        except Exception as e:
+            # Een fout in een exportproces, bij het encoderen of bij het schrijven.
+            export_error = e
 
         finally:
-            # Herstel de widget en de live-timer altijd.
+            # Stop de exportprocessen en de encoder (ook bij annuleren of een fout) en hervat de live weergave altijd.
+            if frames is not None:
+                frames.close()
+            if encoder is not None:
+                encoder.abort()
+            if video_writer is not None:
+                video_writer.release()
             progress.close()
-            self.plot_widget.resize(original_size)
-            self.plot_widget.getViewBox().setRange(xRange=original_range[0], yRange=original_range[1])
-            self.timer.start(10)
+            self.frame_scheduler.start()
 
-            # Geef de eindstatus weer nadat alles is hersteld.
-            if was_cancelled:
+            # Geef de eindstatus weer nadat alles is hersteld; een onvolledig bestand wordt verwijderd.
+            if export_error is not None or was_cancelled:
                 if os.path.exists(output_path): os.remove(output_path)
+            if export_error is not None:
+                self.show_status_message(f"Fout bij het exporteren: {export_error}")
+                QMessageBox.critical(self, "Export Fout", f"De video kon niet worden geëxporteerd: {export_error}")
+            elif was_cancelled:
                 self.show_status_message("Export geannuleerd.")
-            else:
-                self.show_status_message(f"Video succesvol geëxporteerd naar: {output_path}")
+            elif completed:
+                self.show_status_message(f"Video succesvol geëxporteerd naar: {output_path}{loop_note}")
+
+    def _export_scene(self, size=None):
+        """
+        Beschrijft de huidige afbeelding en lijnen als picklebare argumenten voor
+        renderer.build_renderer, zodat exportprocessen dezelfde scène kunnen opbouwen.
+        size is de uitvoerresolutie (breedte, hoogte); standaard die van de afbeelding.
+        """
+        return dict(
+            size=size,
+            background=self.original_image,
+            background_brightness=self.background_brightness,
+            line_width=self.line_width,
+            actions=[{k: v for k, v in action.items() if k not in ['effect_instance', 'plot_items', 'resampled_points']} for action in self.actions],
+            default_effect_name=self.effect_names[self.effect_combo.currentIndex()],
+            default_color=self.led_color,
+            default_brightness=self.default_brightness,
+            default_speed=self.default_speed,
+        )
 
-            
-        
     def _capture_and_crop_frame(self):
         """
         Legt de huidige weergave vast, zorgt dat de afbeelding het volledige frame vult,
@@ -1845,6 +1357,9 @@ class LEDVisualizer(QMainWindow):
         """
         from PyQt5.QtGui import QPainter, QPixmap, QColor, QImage
         from PyQt5.QtCore import QSize, QRectF, Qt
+        from PIL import Image
+        import cv2
+        from watermark import watermark_for
 
         # Vereist een afbeelding om de kadrering en resolutie te bepalen.
         if self.original_image is None:
@@ -1886,21 +1401,6 @@ class LEDVisualizer(QMainWindow):
             # Render de scène met de nieuwe, perfect passende view.
             scene.render(painter, QRectF(pixmap.rect()), view_box.viewRect())
 
-            # --- WATERMARK LOGICA (AANGEPAST) ---
-            watermark_path = os.path.join(script_dir, "images", "pulseline1.png")
-            if os.path.exists(watermark_path):
-                watermark_image = QImage(watermark_path)
-                if not watermark_image.isNull():
-                    # Schaal het watermark naar 5% van de videohoogte.
-                    target_height = int(EXPORT_HEIGHT * 0.05)
-                    scaled_watermark = watermark_image.scaledToHeight(target_height, Qt.SmoothTransformation)
-
-                    # Plaats het geschaalde watermark linksonder met een marge.
-                    margin = 20
-                    wm_x = margin
-                    wm_y = EXPORT_HEIGHT - scaled_watermark.height() - margin
-                    painter.drawImage(wm_x, wm_y, scaled_watermark)
-
         finally:
             # Herstel de live-view naar de oorspronkelijke staat.
             painter.end()
@@ -1915,6 +1415,7 @@ class LEDVisualizer(QMainWindow):
         arr = np.frombuffer(buffer, dtype=np.uint8).reshape((qimage_result.height(), qimage_result.width(), 4))
         
         arr_rgba = cv2.cvtColor(arr, cv2.COLOR_BGRA2RGBA)
+        watermark_for(EXPORT_WIDTH, EXPORT_HEIGHT, rgb=True).apply(arr_rgba)
         pil_image = Image.fromarray(arr_rgba, 'RGBA')
         
         return pil_image
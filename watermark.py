@@ -0,0 +1,75 @@
+"""
+Watermerk (images/pulseline1.png) voor alle exports: video, afbeelding en frame-capture.
+
+Het logo wordt per uitvoergrootte één keer geladen, geschaald en met zijn
+alpha vermenigvuldigd. Daarna is het aanbrengen per frame alleen nog een blend
+op het kleine gebied linksonder. De blend rekent in float en kapt af naar
+uint8, zoals de oorspronkelijke code per frame deed, zodat de exports
+hetzelfde blijven.
+"""
+import os
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+WATERMARK_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), "images", "pulseline1.png")
+WATERMARK_HEIGHT_RATIO = 0.05 # Hoogte van het logo als fractie van de framehoogte
+WATERMARK_MARGIN = 20
+
+
+class WatermarkCompositor:
+    """
+    Brengt het watermerk aan op frames van een vaste grootte.
+
+    :param frame_width, frame_height: grootte van de frames in pixels.
+    :param rgb: True voor RGB(A) frames, False voor BGR(A) frames (OpenCV).
+    :param margin: afstand tot de linker- en onderrand in pixels.
+    :param interpolation: cv2-interpolatie voor het schalen van het logo (de video-export
+                          gebruikte altijd INTER_LINEAR, het opslaan van een afbeelding INTER_AREA).
+    """
+    def __init__(self, frame_width, frame_height, rgb=False, margin=WATERMARK_MARGIN, path=WATERMARK_PATH,
+                 interpolation=cv2.INTER_AREA):
+        self.roi = None
+        logo = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        target_height = int(frame_height * WATERMARK_HEIGHT_RATIO)
+        if logo is None or target_height < 1:
+            return
+
+        scale = target_height / logo.shape[0]
+        target_width = max(1, int(logo.shape[1] * scale))
+        logo = cv2.resize(logo, (target_width, target_height), interpolation=interpolation)
+        if logo.ndim == 2:
+            logo = cv2.cvtColor(logo, cv2.COLOR_GRAY2BGR)
+
+        # Logo dat niet in het frame past wordt afgesneden.
+        x0, y0 = margin, frame_height - target_height - margin
+        x1, y1 = min(frame_width, x0 + target_width), min(frame_height, y0 + target_height)
+        x0c, y0c = max(0, x0), max(0, y0)
+        if x0c >= x1 or y0c >= y1:
+            return
+        logo = logo[y0c - y0:y1 - y0, x0c - x0:x1 - x0]
+        self.roi = (slice(y0c, y1), slice(x0c, x1))
+
+        color = logo[..., :3]
+        if rgb:
+            color = color[..., ::-1]
+        mask = logo[..., 3:] / 255.0 if logo.shape[2] == 4 else 1.0
+        # Dezelfde float-waarden als logo * mask en (1 - mask) in de oude blend, maar één keer berekend.
+        self.weighted_logo = color * mask
+        self.inverse_mask = 1 - mask
+
+    def apply(self, frame):
+        """Brengt het watermerk in-place aan op een (H, W, 3|4) uint8 frame en geeft het frame terug."""
+        if self.roi is None:
+            return frame
+        roi = frame[self.roi + (slice(0, 3),)]
+        # logo * a + achtergrond * (1 - a), afgekapt naar uint8.
+        roi[:] = (self.weighted_logo + roi * self.inverse_mask).astype(np.uint8)
+        return frame
+
+
+@lru_cache(maxsize=8)
+def watermark_for(frame_width, frame_height, rgb=False, margin=WATERMARK_MARGIN, interpolation=cv2.INTER_AREA):
+    """Gedeelde WatermarkCompositor per uitvoergrootte, zodat het logo maar één keer geladen wordt."""
+    return WatermarkCompositor(frame_width, frame_height, rgb=rgb, margin=margin, interpolation=interpolation)